@@ -2,31 +2,25 @@ from flask import Flask, jsonify
 from flask_jwt_extended import JWTManager
 from flask_jwt_extended.exceptions import NoAuthorizationError, InvalidHeaderError, WrongTokenError, RevokedTokenError
 from flask_cors import CORS
-from flask_caching import Cache
-from sqlalchemy import event
-from sqlalchemy.engine import Engine
 
-from .database import db
+from .database import db, migrate, configure_engine, upgrade_database, startup_lock, MIGRATIONS_DIR, DatabaseBusy
 from .models import *
 from .config import config_dict
 from .auth import init_admin_user
 from .api.routes import init_api
+from .commands import register_commands
 from .default_data import create_default_data
 from .celery_worker import make_celery
 from .cache import cache as redis_cache
 
-@event.listens_for(Engine, "connect")
-def set_sqlite_pragma(dbapi_connection, connection_record):
-    if 'sqlite' in str(dbapi_connection):
-        cursor = dbapi_connection.cursor()
-        cursor.execute("PRAGMA foreign_keys=ON")
-        cursor.close()
-
 def create_app(config_name='development'):
     app = Flask(__name__)
     app.config.from_object(config_dict[config_name])
 
     db.init_app(app)
+    migrate.init_app(app, db, directory=MIGRATIONS_DIR, render_as_batch=True)
+    with app.app_context():
+        configure_engine(app)
     jwt = JWTManager(app)
 
     CORS(app,
@@ -36,19 +30,7 @@ def create_app(config_name='development'):
          supports_credentials=True)
 
     redis_cache.init_app(app)
-
-    try:
-        import redis
-        redis_client = redis.Redis(host='localhost', port=6379, db=1, socket_connect_timeout=1)
-        redis_client.ping()
-        flask_cache = Cache(app, config={
-            'CACHE_TYPE': 'RedisCache',
-            'CACHE_REDIS_URL': app.config.get('CACHE_REDIS_URL', 'redis://localhost:6379/1'),
-            'CACHE_DEFAULT_TIMEOUT': app.config.get('CACHE_DEFAULT_TIMEOUT', 300)
-        })
-    except Exception:
-        flask_cache = Cache(app, config={'CACHE_TYPE': 'SimpleCache'})
-    app.flask_cache = flask_cache
+    redis_cache.track_model_changes(db.session)
 
     app.celery = make_celery(app)
     
@@ -90,6 +72,9 @@ def create_app(config_name='development'):
 
     @app.errorhandler(Exception)
     def handle_exception(e):
+        if isinstance(e, DatabaseBusy):
+            # Its own 503 with Retry-After, e.g. from the CSV export blueprint
+            return e
         if "jwt" in str(type(e)).lower() or "authorization" in str(e).lower() or "decode" in str(e).lower():
             return jsonify({"error": "Authentication failed"}), 401
         elif "not found" in str(e).lower():
@@ -101,9 +86,11 @@ def create_app(config_name='development'):
         return jsonify({"error": "Resource not found"}), 404
     
     init_api(app)
+    register_commands(app)
 
-    with app.app_context():
-        db.create_all()
+    with app.app_context(), startup_lock():
+        if app.config.get('AUTO_MIGRATE', True):
+            upgrade_database()
         init_admin_user()
 
         if app.config.get('CREATE_DEFAULT_DATA', True):
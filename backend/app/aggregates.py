@@ -0,0 +1,49 @@
+from datetime import datetime
+from sqlalchemy import func, case
+from .database import db
+
+# Shared SQL building blocks for dashboard and report aggregates.
+
+SCORE_BANDS = (
+    ('poor', 40),        # 0-40%
+    ('average', 60),     # 41-60%
+    ('good', 80),        # 61-80%
+    ('excellent', None)  # 81-100%
+)
+
+def month_start(column):
+    """SQL expression truncating a timestamp column to the first day of its month"""
+    if db.engine.dialect.name == 'postgresql':
+        return func.date_trunc('month', column)
+    return func.date(column, 'start of month', type_=db.Date)
+
+def recent_months(count, now=None):
+    """First day of the last `count` calendar months, oldest first.
+
+    Months are UTC, as the monthly rollups are keyed by datetime.utcnow().
+    """
+    now = now or datetime.utcnow()
+    year, month = now.year, now.month
+    months = []
+    for _ in range(count):
+        months.append(datetime(year, month, 1))
+        month -= 1
+        if month == 0:
+            year, month = year - 1, 12
+    months.reverse()
+    return months
+
+def score_band_columns(percentage):
+    """One SUM(CASE ...) column per score band, in SCORE_BANDS order"""
+    columns = []
+    lower = None
+    for name, upper in SCORE_BANDS:
+        conditions = []
+        if lower is not None:
+            conditions.append(percentage > lower)
+        if upper is not None:
+            conditions.append(percentage <= upper)
+        condition = db.and_(*conditions) if conditions else db.true()
+        columns.append(func.sum(case((condition, 1), else_=0)).label(name))
+        lower = upper
+    return columns
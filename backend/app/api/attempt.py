@@ -0,0 +1,126 @@
+from flask import request, current_app
+from flask_restful import Resource
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from ..models import Quiz
+from ..auth import user_required
+from ..grading import answer_key, InvalidAnswer
+from ..attempts import attempt_counts, saved_attempts
+from ..submissions import pending_attempts
+from ..attempt_sessions import (SessionUnavailable, load_session, start_session, save_answers,
+                                claim_submission, release_submission, close_session, format_duration)
+from .score import submit_attempt
+
+UNAVAILABLE = {'message': 'Attempt sessions are unavailable right now'}, 503
+
+def _own_session(session_id):
+    """The caller's session, or the error response to return instead"""
+    session = load_session(session_id)
+    if session is None or str(session.user_id) != get_jwt_identity():
+        return None, ({'message': 'Attempt session not found'}, 404)
+    return session, None
+
+def _finish(session, submitted):
+    """Close a submitted session, or release the claim of one that was not saved.
+
+    The attempt's outcome stands if Redis fails here: a submitted session keeps
+    its claim, so it cannot be graded again, and expires on its own.
+    """
+    try:
+        if submitted:
+            close_session(session)
+        else:
+            release_submission(session)
+    except SessionUnavailable:
+        current_app.logger.warning(f"Could not finish attempt session {session.id}")
+
+class AttemptSessionApi(Resource):
+    @jwt_required()
+    @user_required()
+    def post(self):
+        """Start an attempt at a quiz, or resume the open one"""
+        data = request.get_json() or {}
+        quiz = Quiz.query.get(data.get('quiz_id'))
+        if not quiz:
+            return {'message': 'Quiz not found'}, 404
+        if not quiz.is_active:
+            return {'message': 'Quiz is not active'}, 400
+
+        user_id = int(get_jwt_identity())
+        try:
+            used = attempt_counts([(user_id, quiz.id)]).get((user_id, quiz.id))
+            if used is None:
+                used = saved_attempts(user_id, quiz.id) + pending_attempts(user_id, quiz.id)
+            if used >= quiz.max_attempts:
+                return {'message': f'You have reached the maximum number of attempts ({quiz.max_attempts}) for this quiz'}, 409
+            return start_session(user_id, quiz).convert_to_json(), 201
+        except SessionUnavailable:
+            return UNAVAILABLE
+
+    @jwt_required()
+    def get(self, session_id):
+        """Current state of an attempt: remaining time and saved answers"""
+        try:
+            session, error = _own_session(session_id)
+        except SessionUnavailable:
+            return UNAVAILABLE
+        if error:
+            return error
+        return session.convert_to_json(), 200
+
+class AttemptAnswersApi(Resource):
+    @jwt_required()
+    def put(self, session_id):
+        """Autosave answers ({question id: option, or null to clear}) without touching the database"""
+        answers = (request.get_json() or {}).get('answers')
+        if not isinstance(answers, dict):
+            return {'message': 'answers must map question ids to options'}, 400
+
+        try:
+            session, error = _own_session(session_id)
+            if error:
+                return error
+            if not session.accepts_answers():
+                return {'message': 'Time is up for this attempt'}, 409
+            saved = save_answers(session, answers, answer_key(session.quiz_id))
+        except SessionUnavailable:
+            return UNAVAILABLE
+        except InvalidAnswer as e:
+            return {'message': str(e)}, 400
+        return {'saved': saved, 'time_remaining': session.time_remaining()}, 200
+
+class AttemptSubmitApi(Resource):
+    @jwt_required()
+    @user_required()
+    def post(self, session_id):
+        """Grade the attempt from its saved answers, timed by the server"""
+        try:
+            session, error = _own_session(session_id)
+            if error:
+                return error
+
+            # Answers sent with the submit are saved first, as a final autosave
+            answers = (request.get_json(silent=True) or {}).get('answers')
+            if isinstance(answers, dict) and answers and session.accepts_answers():
+                try:
+                    save_answers(session, answers, answer_key(session.quiz_id))
+                except InvalidAnswer as e:
+                    return {'message': str(e)}, 400
+                session = load_session(session_id) or session
+
+            quiz = Quiz.query.get(session.quiz_id)
+            if not quiz or not quiz.is_active:
+                return {'message': 'Quiz is not active'}, 400
+
+            # A double-clicked submit must not grade the attempt twice
+            if not claim_submission(session):
+                return {'message': 'This attempt is already being submitted'}, 409
+            submitted = False
+            try:
+                result = submit_attempt(quiz, session.user_id, session.answers,
+                                        format_duration(session.time_taken()))
+                submitted = result[1] < 400
+            finally:
+                _finish(session, submitted)
+            return result
+        except SessionUnavailable:
+            return UNAVAILABLE
@@ -3,6 +3,7 @@ from flask_restful import Resource
 from flask_jwt_extended import create_access_token, create_refresh_token, jwt_required, get_jwt_identity
 from werkzeug.security import generate_password_hash
 from ..models import db, User, Role
+from ..models.stats import record_registration
 from ..auth import authenticate_user, create_tokens
 
 class LoginApi(Resource):
@@ -64,6 +65,8 @@ class RegisterApi(Resource):
             user.roles.append(user_role)
         
         db.session.add(user)
+        db.session.flush()
+        record_registration(user)
         db.session.commit()
         
         # Create tokens for the new user
@@ -1,13 +1,23 @@
 from flask import request, current_app
 from flask_restful import Resource
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from ..models import db, User, Subject, Chapter, Quiz, Question, Score
+from ..models import db, User, Subject, Chapter, Quiz, Question, Score, UserStats
+from ..database import DatabaseBusy
+from ..models.stats import forget_scores
 from ..auth import admin_required
+from ..serializers import serialize_chapters
+from ..cache import cached
+
+def chapter_cache_tags(identity, chapter_id=None):
+    # Chapters embed their subject's name and quiz counts
+    if chapter_id:
+        return [f'Chapter:{chapter_id}', 'Subject', 'Quiz']
+    return ['Chapter', 'Subject', 'Quiz']
 
 class ChapterApi(Resource):
+    @cached('chapters', tags=chapter_cache_tags, local=True)
     def get(self, chapter_id=None):
         """Get all chapters or specific chapter"""
-        cache = current_app.cache
         if chapter_id:
             chapter = Chapter.query.get(chapter_id)
             if chapter:
@@ -25,12 +35,7 @@ class ChapterApi(Resource):
         if subject_id:
             chapters = chapters.filter_by(subject_id=subject_id)
         
-        chapters = chapters.all()
-        
-        chapter_list = []
-        for chapter in chapters:
-            chapter_list.append(chapter.convert_to_json())
-        return chapter_list, 200
+        return serialize_chapters(chapters), 200
 
     @jwt_required()
     @admin_required()
@@ -71,15 +76,11 @@ class ChapterApi(Resource):
             db.session.add(new_chapter)
             db.session.commit()
 
-            # Clear cache safely
-            try:
-                cache = current_app.cache
-                cache.clear()
-            except Exception as cache_error:
-                print(f"Cache clear error: {cache_error}")
-
             return new_chapter.convert_to_json(), 201
 
+        except DatabaseBusy:
+            db.session.rollback()
+            raise
         except Exception as e:
             db.session.rollback()
             print(f"Error creating chapter: {e}")
@@ -127,15 +128,11 @@ class ChapterApi(Resource):
 
             db.session.commit()
 
-            # Clear cache safely
-            try:
-                cache = current_app.cache
-                cache.clear()
-            except Exception as cache_error:
-                print(f"Cache clear error: {cache_error}")
-
             return chapter.convert_to_json(), 200
 
+        except DatabaseBusy:
+            db.session.rollback()
+            raise
         except Exception as e:
             db.session.rollback()
             print(f"Error updating chapter: {e}")
@@ -163,22 +160,23 @@ class ChapterApi(Resource):
                 total_scores += quiz.scores.count()
 
             chapter_name = chapter.name
+            affected_users = forget_scores(
+                db.select(Quiz.id).where(Quiz.chapter_id == chapter.id)
+            )
 
             # Delete the chapter - cascade should handle the rest
             db.session.delete(chapter)
+            db.session.flush()
+            UserStats.rebuild(affected_users)
             db.session.commit()
 
-            # Invalidate caches
-            try:
-                cache = current_app.cache
-                cache.clear()
-            except Exception as e:
-                print(f"Cache clear error: {e}")
-
             return {
                 'message': f'Chapter "{chapter_name}" deleted successfully along with {total_quizzes} quizzes, {total_questions} questions, and {total_scores} quiz attempts.'
             }, 200
 
+        except DatabaseBusy:
+            db.session.rollback()
+            raise
         except Exception as e:
             db.session.rollback()
             print(f"Error deleting chapter: {e}")
@@ -1,14 +1,71 @@
-from flask import Blueprint, request, jsonify, make_response
+from flask import Blueprint, request, jsonify, Response, current_app, stream_with_context
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from app.models import User, Score, Quiz, Chapter, Subject, Question, db
+from app.models import User, Score, Quiz, Chapter, Subject, Question, UserStats, db
+from app.database import DatabaseBusy
 from app.auth import admin_required
-from sqlalchemy import func
 import csv
 import io
 from datetime import datetime
 
 export_bp = Blueprint('export', __name__)
 
+def _csv_line(row):
+    buffer = io.StringIO()
+    csv.writer(buffer).writerow(row)
+    return buffer.getvalue()
+
+def _csv_response(header, rows, filename):
+    """Stream CSV rows so large exports never sit in memory at once.
+
+    The first row is fetched before the response is returned, so the export's
+    query runs (and fails) while the caller can still answer with an error.
+    """
+    rows = iter(rows)
+    first = next(rows, None)
+
+    def generate():
+        yield _csv_line(header)
+        if first is None:
+            return
+        yield _csv_line(first)
+        try:
+            for row in rows:
+                yield _csv_line(row)
+        except Exception as e:
+            # The status is already sent; the client gets a truncated file
+            current_app.logger.error(f"CSV export {filename} failed while streaming: {e}")
+            raise
+
+    response = Response(stream_with_context(generate()), mimetype='text/csv')
+    response.headers['Content-Disposition'] = f'attachment; filename={filename}'
+    return response
+
+def user_score_rows(user_id):
+    """Joined score/quiz/chapter/subject rows for a user, fetched in batches"""
+    return db.session.query(
+        Score.time_stamp_of_attempt,
+        Score.total_scored,
+        Score.total_questions,
+        Score.percentage,
+        Score.quiz_id,
+        Quiz.title.label('quiz_title'),
+        Quiz.date_of_quiz,
+        Quiz.time_duration,
+        Quiz.remarks,
+        Chapter.name.label('chapter_name'),
+        Subject.name.label('subject_name')
+    ).select_from(Score)\
+     .join(Quiz, Quiz.id == Score.quiz_id)\
+     .outerjoin(Chapter, Chapter.id == Quiz.chapter_id)\
+     .outerjoin(Subject, Subject.id == Chapter.subject_id)\
+     .filter(Score.user_id == user_id)\
+     .order_by(Score.time_stamp_of_attempt.desc())\
+     .yield_per(current_app.config.get('EXPORT_BATCH_SIZE', 500))
+
+def with_user_stats(users):
+    """Pair each user of a User query with their UserStats row (None before any attempt)"""
+    return users.add_entity(UserStats).outerjoin(UserStats, UserStats.user_id == User.id)
+
 @export_bp.route('/api/export/user-csv', methods=['POST'])
 @jwt_required()
 def export_user_csv_endpoint():
@@ -20,15 +77,7 @@ def export_user_csv_endpoint():
         if not user:
             return jsonify({'message': 'User not found'}), 404
 
-        # Get user's scores with quiz details
-        scores = Score.query.filter_by(user_id=user_id).all()
-
-        # Create CSV content
-        output = io.StringIO()
-        writer = csv.writer(output)
-
-        # Write header
-        writer.writerow([
+        header = [
             'Quiz Title',
             'Subject',
             'Chapter',
@@ -39,43 +88,28 @@ def export_user_csv_endpoint():
             'Quiz Date',
             'Duration',
             'Remarks'
-        ])
-
-        # Write data
-        for score in scores:
-            quiz = Quiz.query.get(score.quiz_id)
-            if quiz:
-                chapter = Chapter.query.get(quiz.chapter_id)
-                subject = Subject.query.get(chapter.subject_id) if chapter else None
-
-                # Calculate percentage based on actual total possible marks
-                from sqlalchemy import func
-                total_possible_marks = db.session.query(func.sum(Question.marks)).filter_by(quiz_id=quiz.id).scalar() or 0
-                percentage = (score.total_scored / total_possible_marks * 100) if total_possible_marks > 0 else 0
-
-                writer.writerow([
-                    quiz.title,
-                    subject.name if subject else 'Unknown',
-                    chapter.name if chapter else 'Unknown',
-                    score.time_stamp_of_attempt.strftime('%Y-%m-%d %H:%M:%S'),
-                    score.total_scored,
-                    score.total_questions,
-                    f"{percentage:.1f}%",
-                    quiz.date_of_quiz.strftime('%Y-%m-%d') if quiz.date_of_quiz else '',
-                    quiz.time_duration,
-                    quiz.remarks or ''
-                ])
-
-        # Create response
-        output.seek(0)
-        response = make_response(output.getvalue())
-        response.headers['Content-Type'] = 'text/csv'
-        response.headers['Content-Disposition'] = f'attachment; filename=quiz_data_{user.username}_{datetime.now().strftime("%Y%m%d")}.csv'
-
-        return response
-
+        ]
+
+        rows = ([
+            row.quiz_title,
+            row.subject_name or 'Unknown',
+            row.chapter_name or 'Unknown',
+            row.time_stamp_of_attempt.strftime('%Y-%m-%d %H:%M:%S'),
+            row.total_scored,
+            row.total_questions,
+            f"{row.percentage or 0:.1f}%",
+            row.date_of_quiz.strftime('%Y-%m-%d') if row.date_of_quiz else '',
+            row.time_duration,
+            row.remarks or ''
+        ] for row in user_score_rows(user.id))
+
+        filename = f'quiz_data_{user.username}_{datetime.now().strftime("%Y%m%d")}.csv'
+        return _csv_response(header, rows, filename)
+
+    except DatabaseBusy:
+        raise
     except Exception as e:
-        print(f"Error exporting user CSV: {e}")
+        current_app.logger.error(f"Error exporting user CSV: {e}")
         return jsonify({'message': 'Export failed. Please try again.'}), 500
 
 @export_bp.route('/api/export/admin-csv', methods=['POST'])
@@ -84,15 +118,10 @@ def export_user_csv_endpoint():
 def export_admin_csv_endpoint():
     """Export all users' quiz data as CSV (Admin only)"""
     try:
-        # Get all users and their scores
-        users = User.query.all()
+        users = with_user_stats(User.query).order_by(User.id)\
+            .yield_per(current_app.config.get('EXPORT_BATCH_SIZE', 500))
 
-        # Create CSV content
-        output = io.StringIO()
-        writer = csv.writer(output)
-
-        # Write header
-        writer.writerow([
+        header = [
             'User ID',
             'Username',
             'Full Name',
@@ -102,69 +131,28 @@ def export_admin_csv_endpoint():
             'Best Score',
             'Last Quiz Date',
             'Registration Date'
-        ])
-
-        # Write data
-        for user in users:
-            scores = Score.query.filter_by(user_id=user.id).all()
-
-            if scores:
-                total_quizzes = len(scores)
-                total_percentage = 0
-                valid_scores = 0
-
-                # Calculate average percentage correctly
-                for score in scores:
-                    quiz = Quiz.query.get(score.quiz_id)
-                    if quiz:
-                        total_possible_marks = db.session.query(func.sum(Question.marks)).filter_by(quiz_id=quiz.id).scalar() or 0
-                        if total_possible_marks > 0:
-                            percentage = (score.total_scored / total_possible_marks * 100)
-                            total_percentage += percentage
-                            valid_scores += 1
-
-                avg_score = total_percentage / valid_scores if valid_scores > 0 else 0
-
-                # Find best score
-                best_percentage = 0
-                for score in scores:
-                    quiz = Quiz.query.get(score.quiz_id)
-                    if quiz:
-                        total_possible_marks = db.session.query(func.sum(Question.marks)).filter_by(quiz_id=quiz.id).scalar() or 0
-                        if total_possible_marks > 0:
-                            percentage = (score.total_scored / total_possible_marks * 100)
-                            if percentage > best_percentage:
-                                best_percentage = percentage
-
-                # Find last quiz date
-                last_quiz = max(scores, key=lambda s: s.time_stamp_of_attempt)
-                last_quiz_date = last_quiz.time_stamp_of_attempt.strftime('%Y-%m-%d')
-            else:
-                total_quizzes = 0
-                avg_score = 0
-                best_percentage = 0
-                last_quiz_date = 'Never'
-
-            writer.writerow([
-                user.id,
-                user.username,
-                user.full_name,
-                user.email,
-                total_quizzes,
-                f"{avg_score:.1f}%",
-                f"{best_percentage:.1f}%",
-                last_quiz_date,
-                user.created_at.strftime('%Y-%m-%d') if user.created_at else ''
-            ])
-
-        # Create response
-        output.seek(0)
-        response = make_response(output.getvalue())
-        response.headers['Content-Type'] = 'text/csv'
-        response.headers['Content-Disposition'] = f'attachment; filename=admin_all_users_{datetime.now().strftime("%Y%m%d")}.csv'
-
-        return response
-
+        ]
+
+        def rows():
+            for user, stats in users:
+                writer_row = [user.id, user.username, user.full_name, user.email]
+                if stats and stats.attempts:
+                    writer_row += [
+                        stats.attempts,
+                        f"{stats.average_percentage:.1f}%",
+                        f"{stats.best_percentage:.1f}%",
+                        stats.last_attempt_at.strftime('%Y-%m-%d')
+                    ]
+                else:
+                    writer_row += [0, "0.0%", "0.0%", 'Never']
+                writer_row.append(user.created_at.strftime('%Y-%m-%d') if user.created_at else '')
+                yield writer_row
+
+        filename = f'admin_all_users_{datetime.now().strftime("%Y%m%d")}.csv'
+        return _csv_response(header, rows(), filename)
+
+    except DatabaseBusy:
+        raise
     except Exception as e:
-        print(f"Error exporting admin CSV: {e}")
-        return jsonify({'message': 'Export failed. Please try again.'}), 500
\ No newline at end of file
+        current_app.logger.error(f"Error exporting admin CSV: {e}")
+        return jsonify({'message': 'Export failed. Please try again.'}), 500
@@ -0,0 +1,23 @@
+from flask import current_app
+from flask_restful import Resource
+from sqlalchemy import text
+from ..database import db, pool_status
+
+class HealthApi(Resource):
+    def get(self):
+        """Liveness plus per-process database pool and cache metrics"""
+        try:
+            db.session.execute(text('SELECT 1'))
+            database_ok = True
+        except Exception:
+            database_ok = False
+
+        return {
+            'status': 'ok' if database_ok else 'degraded',
+            'database': {
+                'backend': db.engine.dialect.name,
+                'reachable': database_ok,
+                'pool': pool_status()
+            },
+            'cache': current_app.cache.stats()
+        }, 200 if database_ok else 503
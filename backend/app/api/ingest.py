@@ -0,0 +1,190 @@
+import json
+from datetime import datetime
+from flask import request, current_app
+from flask_restful import Resource
+from flask_jwt_extended import jwt_required
+from sqlalchemy import func
+from sqlalchemy.exc import SQLAlchemyError
+from ..models import db, User, Quiz, Score
+from ..models.stats import record_scores
+from ..auth import proctor_required
+from ..database import DatabaseBusy
+from ..grading import answer_key, InvalidAnswer
+from ..attempts import attempt_counts, add_attempts
+from .score import parse_time_taken
+
+class InvalidAttempt(ValueError):
+    pass
+
+def _identifier(record, name):
+    value = record.get(name)
+    if isinstance(value, bool):
+        raise InvalidAttempt(f'{name} must be an integer')
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise InvalidAttempt(f'{name} must be an integer')
+
+def parse_attempt(line):
+    """One uploaded line as {user_id, quiz_id, answers, time_taken, attempted_at}"""
+    try:
+        record = json.loads(line)
+    except ValueError:
+        raise InvalidAttempt('Line is not valid JSON')
+    if not isinstance(record, dict):
+        raise InvalidAttempt('Line must be a JSON object')
+
+    answers = record.get('answers')
+    if not isinstance(answers, dict) or not answers:
+        raise InvalidAttempt('answers must map question ids to options')
+
+    time_taken = parse_time_taken(record.get('time_taken'))
+    if time_taken is None:
+        raise InvalidAttempt('Invalid time format. Use HH:MM:SS')
+
+    attempted_at = record.get('attempted_at')
+    if attempted_at is None:
+        attempted_at = datetime.utcnow()
+    else:
+        try:
+            attempted_at = datetime.fromisoformat(attempted_at)
+        except (TypeError, ValueError):
+            raise InvalidAttempt('attempted_at must be an ISO 8601 timestamp')
+        if attempted_at.tzinfo is not None:
+            raise InvalidAttempt('attempted_at must be in UTC without an offset')
+
+    return {
+        'user_id': _identifier(record, 'user_id'),
+        'quiz_id': _identifier(record, 'quiz_id'),
+        'answers': answers,
+        'time_taken': time_taken,
+        'attempted_at': attempted_at
+    }
+
+class BulkScoreApi(Resource):
+    @jwt_required()
+    @proctor_required()
+    def post(self):
+        """Ingest attempts collected offline, one JSON object per line.
+
+        Lines are graded and inserted in batches of BULK_INGEST_BATCH_SIZE, each
+        committed on its own. Rejected lines are reported by line number and the
+        rest of their batch is still saved.
+        """
+        batch_size = current_app.config['BULK_INGEST_BATCH_SIZE']
+        report = {'received': 0, 'inserted': 0, 'batches': 0, 'errors': []}
+        batch = []
+
+        for line_number, line in enumerate(request.stream, start=1):
+            if not line.strip():
+                continue
+            report['received'] += 1
+            batch.append((line_number, line))
+            if len(batch) >= batch_size:
+                self._ingest(batch, report)
+                batch = []
+        if batch:
+            self._ingest(batch, report)
+
+        if not report['received']:
+            return {'message': 'Bad request! Send one attempt per line as JSON.'}, 400
+        report['errors'].sort(key=lambda error: error['line'])
+        return report, 200
+
+    def _ingest(self, batch, report):
+        errors = report['errors']
+        attempts = []
+        for line_number, line in batch:
+            try:
+                attempts.append((line_number, parse_attempt(line)))
+            except InvalidAttempt as e:
+                errors.append({'line': line_number, 'message': str(e)})
+
+        user_ids = {attempt['user_id'] for _, attempt in attempts}
+        quiz_ids = {attempt['quiz_id'] for _, attempt in attempts}
+        active_users = {user_id for user_id, in db.session.query(User.id)
+                        .filter(User.id.in_(user_ids), User.is_active == True)}
+        quizzes = {quiz.id: quiz for quiz in db.session.query(Quiz.id, Quiz.is_active, Quiz.max_attempts)
+                   .filter(Quiz.id.in_(quiz_ids))}
+        taken = {(user_id, quiz_id): count for user_id, quiz_id, count in
+                 db.session.query(Score.user_id, Score.quiz_id, func.count(Score.id))
+                 .filter(Score.user_id.in_(user_ids), Score.quiz_id.in_(quiz_ids))
+                 .group_by(Score.user_id, Score.quiz_id)}
+        # Counters also cover queued and in-flight submissions
+        for pair, count in attempt_counts({(a['user_id'], a['quiz_id']) for _, a in attempts}).items():
+            taken[pair] = max(taken.get(pair, 0), count)
+
+        # Grade each quiz's submissions together against its answer key
+        by_quiz = {}
+        for line_number, attempt in attempts:
+            if attempt['quiz_id'] in quizzes and quizzes[attempt['quiz_id']].is_active:
+                by_quiz.setdefault(attempt['quiz_id'], []).append(attempt)
+        keys = {}
+        for quiz_id, submissions in by_quiz.items():
+            key = keys[quiz_id] = answer_key(quiz_id)
+            if not len(key):
+                continue
+            for attempt, result in zip(submissions, key.grade_many([s['answers'] for s in submissions])):
+                attempt['result'] = result
+
+        # Validate in upload order so the attempt limit keeps the earliest lines
+        rows = []
+        lines = []
+        for line_number, attempt in attempts:
+            user_id, quiz_id = attempt['user_id'], attempt['quiz_id']
+            if user_id not in active_users:
+                message = 'User not found or inactive'
+            elif quiz_id not in quizzes:
+                message = 'Quiz not found'
+            elif not quizzes[quiz_id].is_active:
+                message = 'Quiz is not active'
+            elif not len(keys[quiz_id]):
+                message = 'No questions found for this quiz'
+            elif isinstance(attempt['result'], InvalidAnswer):
+                message = str(attempt['result'])
+            elif taken.get((user_id, quiz_id), 0) >= quizzes[quiz_id].max_attempts:
+                message = f'User has reached the maximum number of attempts ({quizzes[quiz_id].max_attempts}) for this quiz'
+            else:
+                message = None
+            if message:
+                errors.append({'line': line_number, 'message': message})
+                continue
+
+            taken[(user_id, quiz_id)] = taken.get((user_id, quiz_id), 0) + 1
+            key = keys[quiz_id]
+            total_scored = attempt['result']
+            rows.append({
+                'quiz_id': quiz_id,
+                'user_id': user_id,
+                'time_stamp_of_attempt': attempt['attempted_at'],
+                'total_scored': total_scored,
+                'total_questions': len(key),
+                'time_taken': attempt['time_taken'],
+                'max_marks': key.max_marks,
+                'percentage': Score.calculate_percentage(total_scored, key.max_marks)
+            })
+            lines.append(line_number)
+
+        if not rows:
+            return
+        try:
+            db.session.execute(db.insert(Score), rows)
+            record_scores(rows)
+            current_app.cache.tag_writes(
+                db.session, 'Score',
+                *{f'Score:user:{row["user_id"]}' for row in rows},
+                *{f'Score:quiz:{row["quiz_id"]}' for row in rows}
+            )
+            db.session.commit()
+        except (SQLAlchemyError, DatabaseBusy):
+            db.session.rollback()
+            errors.extend({'line': line_number, 'message': 'Not saved because the database was unavailable; resubmit this line'}
+                          for line_number in lines)
+            return
+        inserted = {}
+        for row in rows:
+            pair = (row['user_id'], row['quiz_id'])
+            inserted[pair] = inserted.get(pair, 0) + 1
+        add_attempts(inserted)
+        report['inserted'] += len(rows)
+        report['batches'] += 1
@@ -2,9 +2,24 @@ from flask import request
 from flask_restful import Resource
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from ..models import db, User, Quiz, Question
+from ..database import DatabaseBusy
 from ..auth import admin_required
+from ..serializers import serialize_questions
+from ..pagination import paginate, by_id, InvalidPageRequest
+from ..cache import cached
+from ..grading import MAX_QUESTION_MARKS
+
+def question_cache_tags(identity, question_id=None):
+    if question_id:
+        return [f'Question:{question_id}']
+    return ['Question']
+
+def valid_marks(marks):
+    # Answer keys hold marks in an unsigned 16-bit array
+    return isinstance(marks, int) and not isinstance(marks, bool) and 0 <= marks <= MAX_QUESTION_MARKS
 
 class QuestionApi(Resource):
+    @cached('questions', tags=question_cache_tags)
     def get(self, question_id=None):
         """Get all questions or specific question"""
         if question_id:
@@ -24,12 +39,10 @@ class QuestionApi(Resource):
         if quiz_id:
             questions = questions.filter_by(quiz_id=quiz_id)
         
-        questions = questions.all()
-        
-        question_list = []
-        for question in questions:
-            question_list.append(question.convert_to_json())
-        return question_list, 200
+        try:
+            return paginate(questions, by_id(Question), serialize_questions), 200
+        except InvalidPageRequest as e:
+            return {'message': str(e)}, 400
 
     @jwt_required()
     @admin_required()
@@ -64,6 +77,9 @@ class QuestionApi(Resource):
 
         if correct_option > available_options:
             return {'message': f'Correct option {correct_option} is not available. Only {available_options} options provided.'}, 400
+
+        if not valid_marks(data.get('marks', 1)):
+            return {'message': f'Marks must be a whole number between 0 and {MAX_QUESTION_MARKS}'}, 400
         
         # Check if question already exists in this quiz
         existing_question = Question.query.filter_by(
@@ -87,10 +103,15 @@ class QuestionApi(Resource):
             )
 
             db.session.add(new_question)
+            db.session.flush()
+            quiz.refresh_total_marks()
             db.session.commit()
 
             return new_question.convert_to_json(), 201
 
+        except DatabaseBusy:
+            db.session.rollback()
+            raise
         except Exception as e:
             db.session.rollback()
             print(f"Error creating question: {e}")
@@ -125,6 +146,9 @@ class QuestionApi(Resource):
         question = Question.query.get(question_id)
         if not question:
             return {'message': 'Question does not exist.'}, 404
+
+        if not valid_marks(data.get('marks', question.marks)):
+            return {'message': f'Marks must be a whole number between 0 and {MAX_QUESTION_MARKS}'}, 400
         
         # Check if question already exists in this quiz (excluding current question)
         existing_question = Question.query.filter_by(
@@ -135,6 +159,8 @@ class QuestionApi(Resource):
         if existing_question and existing_question.id != question_id:
             return {"message": "Question already exists in this quiz."}, 409
         
+        previous_quiz = question.quiz
+
         try:
             question.question_statement = data.get('question_statement').strip()
             question.option1 = data.get('option1').strip()
@@ -144,11 +170,20 @@ class QuestionApi(Resource):
             question.correct_option = correct_option
             question.quiz_id = data.get('quiz_id')
             question.marks = data.get('marks', question.marks)
+            db.session.flush()
+
+            # Keep stored total marks in sync, including the quiz the question moved out of
+            quiz.refresh_total_marks()
+            if previous_quiz and previous_quiz.id != quiz.id:
+                previous_quiz.refresh_total_marks()
 
             db.session.commit()
 
             return question.convert_to_json(), 200
 
+        except DatabaseBusy:
+            db.session.rollback()
+            raise
         except Exception as e:
             db.session.rollback()
             print(f"Error updating question: {e}")
@@ -164,7 +199,11 @@ class QuestionApi(Resource):
         if not question:
             return {'message': 'Question does not exist.'}, 404
         
+        quiz = question.quiz
         db.session.delete(question)
+        db.session.flush()
+        if quiz:
+            quiz.refresh_total_marks()
         db.session.commit()
         
         return {'message': 'Question deleted successfully.'}, 200 
\ No newline at end of file
@@ -2,10 +2,27 @@ from flask import request, current_app
 from flask_restful import Resource
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from datetime import datetime
-from ..models import db, User, Subject, Chapter, Quiz, Score
+from ..models import db, User, Subject, Chapter, Quiz, Score, UserStats
+from ..database import DatabaseBusy
+from ..models.stats import forget_scores
 from ..auth import admin_required
+from ..serializers import serialize_quizzes
+from ..pagination import paginate, by_id, InvalidPageRequest
+from ..cache import cached
+
+MAX_ATTEMPTS_LIMIT = 100
+
+def quiz_cache_tags(identity, quiz_id=None):
+    # Quizzes embed chapter and subject names and question counts
+    if quiz_id:
+        return [f'Quiz:{quiz_id}', 'Chapter', 'Subject', 'Question']
+    return ['Quiz', 'Chapter', 'Subject', 'Question']
+
+def valid_max_attempts(max_attempts):
+    return isinstance(max_attempts, int) and not isinstance(max_attempts, bool) and 1 <= max_attempts <= MAX_ATTEMPTS_LIMIT
 
 class QuizApi(Resource):
+    @cached('quizzes', tags=quiz_cache_tags)
     def get(self, quiz_id=None):
         try:
             if quiz_id:
@@ -29,10 +46,13 @@ class QuizApi(Resource):
             if is_active:
                 query = query.filter_by(is_active=is_active.lower() == 'true')
 
-            quizzes = query.all()
-            quiz_list = [quiz.convert_to_json() for quiz in quizzes]
-            return quiz_list, 200
+            return paginate(query, by_id(Quiz), serialize_quizzes), 200
 
+        except InvalidPageRequest as e:
+            return {'message': str(e)}, 400
+        except DatabaseBusy:
+            db.session.rollback()
+            raise
         except Exception as e:
             return {'message': 'Internal server error'}, 500
 
@@ -65,6 +85,10 @@ class QuizApi(Resource):
         if not re.match(time_pattern, time_duration):
             return {'message': 'Invalid time format. Use HH:MM:SS (e.g., 01:30:00)'}, 400
 
+        max_attempts = data.get('max_attempts', 5)
+        if not valid_max_attempts(max_attempts):
+            return {'message': f'max_attempts must be a whole number between 1 and {MAX_ATTEMPTS_LIMIT}'}, 400
+
         try:
             new_quiz = Quiz(
                 title=title,
@@ -72,13 +96,17 @@ class QuizApi(Resource):
                 date_of_quiz=quiz_date,
                 time_duration=time_duration,
                 remarks=data.get('remarks', '').strip(),
-                is_active=data.get('is_active', True)
+                is_active=data.get('is_active', True),
+                max_attempts=max_attempts
             )
 
             db.session.add(new_quiz)
             db.session.commit()
             return new_quiz.convert_to_json(), 201
 
+        except DatabaseBusy:
+            db.session.rollback()
+            raise
         except Exception as e:
             db.session.rollback()
             return {'message': f'Error creating quiz: {str(e)}'}, 500
@@ -116,6 +144,10 @@ class QuizApi(Resource):
         if not re.match(time_pattern, time_duration):
             return {'message': 'Invalid time format. Use HH:MM:SS (e.g., 01:30:00)'}, 400
 
+        max_attempts = data.get('max_attempts', quiz.max_attempts)
+        if not valid_max_attempts(max_attempts):
+            return {'message': f'max_attempts must be a whole number between 1 and {MAX_ATTEMPTS_LIMIT}'}, 400
+
         try:
             quiz.title = title
             quiz.chapter_id = data.get('chapter_id')
@@ -123,10 +155,14 @@ class QuizApi(Resource):
             quiz.time_duration = time_duration
             quiz.remarks = data.get('remarks', '').strip()
             quiz.is_active = data.get('is_active', quiz.is_active)
+            quiz.max_attempts = max_attempts
 
             db.session.commit()
             return quiz.convert_to_json(), 200
 
+        except DatabaseBusy:
+            db.session.rollback()
+            raise
         except Exception as e:
             db.session.rollback()
             return {'message': f'Error updating quiz: {str(e)}'}, 500
@@ -140,10 +176,16 @@ class QuizApi(Resource):
 
         try:
             quiz_title = quiz.title
+            affected_users = forget_scores([quiz.id])
             db.session.delete(quiz)
+            db.session.flush()
+            UserStats.rebuild(affected_users)
             db.session.commit()
             return {'message': f'Quiz "{quiz_title}" deleted successfully'}, 200
 
+        except DatabaseBusy:
+            db.session.rollback()
+            raise
         except Exception as e:
             db.session.rollback()
             return {'message': 'Error deleting quiz'}, 500
\ No newline at end of file
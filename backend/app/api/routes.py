@@ -4,10 +4,13 @@ from .subject import SubjectApi
 from .chapter import ChapterApi
 from .quiz import QuizApi
 from .question import QuestionApi
-from .score import ScoreApi, QuizAttemptApi
+from .score import ScoreApi, QuizAttemptApi, SubmissionReceiptApi
+from .ingest import BulkScoreApi
+from .attempt import AttemptSessionApi, AttemptAnswersApi, AttemptSubmitApi
 from .user import UserApi
 from .search import SearchApi
 from .dashboard import DashboardApi
+from .health import HealthApi
 from .export import export_bp
 from .jobs import (UserCSVExportApi, AdminCSVExportApi, JobStatusApi, DownloadCSVApi)
 
@@ -37,6 +40,11 @@ def init_api(app):
     # Score and quiz attempt routes
     api.add_resource(ScoreApi, '/scores', '/scores/<int:score_id>')
     api.add_resource(QuizAttemptApi, '/quiz-attempt/<int:quiz_id>')
+    api.add_resource(BulkScoreApi, '/scores/bulk')
+    api.add_resource(SubmissionReceiptApi, '/scores/receipts/<string:receipt>')
+    api.add_resource(AttemptSessionApi, '/attempts', '/attempts/<string:session_id>')
+    api.add_resource(AttemptAnswersApi, '/attempts/<string:session_id>/answers')
+    api.add_resource(AttemptSubmitApi, '/attempts/<string:session_id>/submit')
     
     # User management routes (Admin only)
     api.add_resource(UserApi, '/users', '/users/<int:user_id>')
@@ -47,6 +55,9 @@ def init_api(app):
     # Dashboard route
     api.add_resource(DashboardApi, '/dashboard')
 
+    # Health and pool metrics
+    api.add_resource(HealthApi, '/health')
+
     # Background Jobs routes
     api.add_resource(UserCSVExportApi, '/jobs/export/user')
     api.add_resource(AdminCSVExportApi, '/jobs/export/admin')
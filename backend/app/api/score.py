@@ -1,12 +1,119 @@
-from flask import request
+from flask import request, current_app
 from flask_restful import Resource
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from datetime import datetime
 from ..models import db, User, Quiz, Question, Score
+from ..models.stats import record_score
 from ..auth import user_required
+from ..serializers import serialize_scores
+from ..pagination import paginate, by_newest, InvalidPageRequest
+from ..cache import cached
+from ..grading import answer_key, InvalidAnswer
+from ..submissions import enqueue, pending_attempts, receipt_status
+from ..attempts import reserve_attempt, release_attempt, saved_attempts
+from ..attempt_sessions import sessions_available
+
+def parse_time_taken(value):
+    """Normalize an HH:MM:SS duration, or return None if it is not one"""
+    try:
+        hours, minutes, seconds = (int(part) for part in value.strip().split(':'))
+    except (AttributeError, ValueError):
+        return None
+    if not (0 <= hours <= 23 and 0 <= minutes <= 59 and 0 <= seconds <= 59):
+        return None
+    return f"{hours:02d}:{minutes:02d}:{seconds:02d}"
+
+def score_cache_tags(identity, score_id=None):
+    # Scores embed quiz titles and user names; non-admins only see their own
+    if score_id:
+        return [f'Score:{score_id}', 'Quiz', 'User']
+    user = User.query.get(int(identity))
+    if user and user.is_admin():
+        return ['Score', 'Quiz', 'User']
+    return [f'Score:user:{identity}', 'Quiz', f'User:{identity}']
+
+def quiz_attempt_cache_tags(identity, quiz_id):
+    return [f'Quiz:{quiz_id}', 'Question']
+
+def submit_attempt(quiz, user_id, answers, time_taken):
+    """Grade and save one attempt at an active quiz, within its attempt limit.
+
+    time_taken is an HH:MM:SS duration measured by the server, or None for an
+    untimed attempt. Returns the response for it: the score with 201, or 202
+    and a receipt when it was queued for write-behind.
+    """
+    # Take one of the quiz's attempts; it is given back unless the attempt is saved
+    reserved = reserve_attempt(user_id, quiz.id, quiz.max_attempts)
+    if reserved is None:
+        # No Redis counter to ask; count the saved and queued attempts instead
+        exhausted = saved_attempts(user_id, quiz.id) + pending_attempts(user_id, quiz.id) >= quiz.max_attempts
+    else:
+        exhausted = not reserved
+    if exhausted:
+        return {'message': f'You have reached the maximum number of attempts ({quiz.max_attempts}) for this quiz'}, 409
+
+    saved = False
+    try:
+        result = _save_attempt(quiz, user_id, answers, time_taken)
+        saved = result[1] < 400
+        return result
+    finally:
+        if reserved and not saved:
+            release_attempt(user_id, quiz.id)
+
+def _save_attempt(quiz, user_id, answers, time_taken):
+    # Grade against the quiz's cached answer key
+    key = answer_key(quiz.id)
+    if not len(key):
+        return {'message': 'No questions found for this quiz'}, 400
+
+    if not isinstance(answers, dict):
+        return {'message': 'answers must map question ids to options'}, 400
+
+    try:
+        total_scored = key.grade(answers)
+    except InvalidAnswer as e:
+        return {'message': str(e)}, 400
+    total_questions = len(key)
+    max_marks = key.max_marks
+
+    # Validate time taken format (HH:MM:SS)
+    if time_taken is not None:
+        time_taken = parse_time_taken(time_taken)
+        if time_taken is None:
+            return {'message': 'Invalid time format. Use HH:MM:SS'}, 400
+
+    row = {
+        'quiz_id': quiz.id,
+        'user_id': user_id,
+        'time_stamp_of_attempt': datetime.utcnow(),
+        'total_scored': total_scored,
+        'total_questions': total_questions,
+        'time_taken': time_taken,
+        'max_marks': max_marks,
+        'percentage': Score.calculate_percentage(total_scored, max_marks)
+    }
+
+    # Under write-behind the graded attempt is queued and saved by the drainer
+    receipt = enqueue(row) if current_app.config['ASYNC_SUBMISSIONS'] else None
+    if receipt:
+        location = f'/api/scores/receipts/{receipt}'
+        return dict(row, time_stamp_of_attempt=row['time_stamp_of_attempt'].isoformat(), id=None,
+                    quiz_title=quiz.title, receipt=receipt, status='queued', status_url=location), \
+            202, {'Location': location}
+
+    # Create score record
+    new_score = Score(**row)
+    db.session.add(new_score)
+    db.session.flush()
+    record_score(new_score)
+    db.session.commit()
+
+    return new_score.convert_to_json(), 201
 
 class ScoreApi(Resource):
     @jwt_required()
+    @cached('scores', tags=score_cache_tags, per_user=True)
     def get(self, score_id=None):
         """Get all scores or specific score"""
         current_user_id = get_jwt_identity()
@@ -31,22 +138,24 @@ class ScoreApi(Resource):
         if quiz_id:
             scores = scores.filter_by(quiz_id=quiz_id)
         
-        scores = scores.order_by(Score.time_stamp_of_attempt.desc()).all()
-        
-        score_list = []
-        for score in scores:
-            score_list.append(score.convert_to_json())
-        return score_list, 200
+        try:
+            return paginate(scores, by_newest(Score, Score.time_stamp_of_attempt), serialize_scores), 200
+        except InvalidPageRequest as e:
+            return {'message': str(e)}, 400
 
     @jwt_required()
     @user_required()
     def post(self):
-        """Submit quiz attempt and calculate score"""
+        """Submit a quiz attempt without a session, only while sessions are unavailable"""
         current_user_id = get_jwt_identity()
         data = request.get_json()
         
-        if not (data.get('quiz_id') and data.get('answers') and data.get('time_taken')):
-            return {'message': 'Bad request! quiz_id, answers, and time_taken are required.'}, 400
+        # Attempts are timed by their session; a duration reported by the client is not trusted
+        if sessions_available():
+            return {'message': 'Start the attempt with POST /api/attempts and submit it there'}, 409
+
+        if not (data.get('quiz_id') and data.get('answers')):
+            return {'message': 'Bad request! quiz_id and answers are required.'}, 400
         
         # Check if quiz exists and is active
         quiz = Quiz.query.get(data.get('quiz_id'))
@@ -56,75 +165,37 @@ class ScoreApi(Resource):
         if not quiz.is_active:
             return {'message': 'Quiz is not active'}, 400
         
-        # Check if user has exceeded maximum attempts (5 attempts allowed)
-        existing_attempts = Score.query.filter_by(
-            quiz_id=data.get('quiz_id'),
-            user_id=current_user_id
-        ).count()
-
-        if existing_attempts >= 5:
-            return {'message': 'You have reached the maximum number of attempts (5) for this quiz'}, 409
-        
-        # Get all questions for this quiz
-        questions = quiz.questions.all()
-        if not questions:
-            return {'message': 'No questions found for this quiz'}, 400
-        
-        # Calculate score
-        total_questions = len(questions)
-        total_scored = 0
-        answers = data.get('answers', {})
-        
-        for question in questions:
-            user_answer = answers.get(str(question.id))
-            # Validate that user_answer is a valid option (1-4)
-            if user_answer is not None and user_answer not in [1, 2, 3, 4]:
-                return {'message': f'Invalid answer option {user_answer} for question {question.id}. Must be 1, 2, 3, or 4.'}, 400
-            if user_answer and user_answer == question.correct_option:
-                total_scored += question.marks
-        
-        # Validate time taken format (HH:MM:SS)
-        time_taken = data.get('time_taken').strip()
-        try:
-            time_parts = time_taken.split(':')
-            if len(time_parts) != 3:
-                return {'message': 'Invalid time format. Use HH:MM:SS'}, 400
-            hours, minutes, seconds = int(time_parts[0]), int(time_parts[1]), int(time_parts[2])
-            if hours < 0 or hours > 23 or minutes < 0 or minutes > 59 or seconds < 0 or seconds > 59:
-                return {'message': 'Invalid time values'}, 400
-            # Store as string in HH:MM:SS format
-            time_taken = f"{hours:02d}:{minutes:02d}:{seconds:02d}"
-        except (ValueError, IndexError):
-            return {'message': 'Invalid time format. Use HH:MM:SS'}, 400
-        
-        # Create score record
-        new_score = Score(
-            quiz_id=data.get('quiz_id'),
-            user_id=current_user_id,
-            total_scored=total_scored,
-            total_questions=total_questions,
-            time_taken=time_taken
-        )
-        
-        db.session.add(new_score)
-        db.session.commit()
+        # Nothing timed this attempt, so it is saved untimed
+        return submit_attempt(quiz, int(current_user_id), data.get('answers', {}), None)
 
-        # Clear dashboard cache to ensure fresh statistics
-        try:
-            from flask import current_app
-            if hasattr(current_app, 'cache'):
-                # Clear user's dashboard cache
-                cache_key = f"dashboard_{current_user_id}_False"  # False for non-admin
-                current_app.cache.delete(cache_key)
-                print(f"Cleared dashboard cache for user {current_user_id}")
-        except Exception as e:
-            print(f"Cache clear error: {e}")
+class SubmissionReceiptApi(Resource):
+    @jwt_required()
+    def get(self, receipt):
+        """Status of a queued submission, with its score once saved"""
+        current_user_id = get_jwt_identity()
+        status = receipt_status(receipt)
+        if status is None:
+            # Receipt expired, or Redis is unavailable: the score itself knows it
+            score = Score.query.filter_by(receipt=receipt).first()
+            if not score:
+                return {'message': 'Receipt not found'}, 404
+            status = {'status': 'saved', 'user_id': score.user_id, 'score_id': score.id}
+
+        user = User.query.get(current_user_id)
+        if str(status['user_id']) != current_user_id and not user.is_admin():
+            return {'message': 'Access denied'}, 403
 
-        return new_score.convert_to_json(), 201
+        result = {'receipt': receipt, 'status': status['status']}
+        if status['status'] == 'saved':
+            result['score'] = Score.query.get(status['score_id']).convert_to_json()
+        elif status['status'] == 'failed':
+            result['message'] = status['message']
+        return result, 200
 
 class QuizAttemptApi(Resource):
     @jwt_required()
     @user_required()
+    @cached('quiz_attempt', tags=quiz_attempt_cache_tags)
     def get(self, quiz_id):
         """Get quiz for attempt (without correct answers)"""
         quiz = Quiz.query.get(quiz_id)
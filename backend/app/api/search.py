@@ -8,6 +8,8 @@ from ..models.quiz import Quiz
 from ..models.question import Question
 from ..models.score import Score
 from ..auth import admin_required
+from ..serializers import (serialize_users, serialize_subjects, serialize_chapters,
+                           serialize_quizzes, serialize_questions)
 
 class SearchApi(Resource):
     @jwt_required()
@@ -29,32 +31,32 @@ class SearchApi(Resource):
                 (User.email.ilike(f"%{search_query}%")) |
                 (User.full_name.ilike(f"%{search_query}%")) |
                 (User.qualification.ilike(f"%{search_query}%"))
-            ).limit(10).all()
-            results['users'] = [user.convert_to_json() for user in users]
+            ).limit(10)
+            results['users'] = serialize_users(users)
         
         # Search subjects
         if not entity_type or entity_type == 'subjects':
             subjects = Subject.query.filter(
                 (Subject.name.ilike(f"%{search_query}%")) |
                 (Subject.description.ilike(f"%{search_query}%"))
-            ).limit(10).all()
-            results['subjects'] = [subject.convert_to_json() for subject in subjects]
+            ).limit(10)
+            results['subjects'] = serialize_subjects(subjects)
         
         # Search chapters
         if not entity_type or entity_type == 'chapters':
             chapters = Chapter.query.filter(
                 (Chapter.name.ilike(f"%{search_query}%")) |
                 (Chapter.description.ilike(f"%{search_query}%"))
-            ).limit(10).all()
-            results['chapters'] = [chapter.convert_to_json() for chapter in chapters]
+            ).limit(10)
+            results['chapters'] = serialize_chapters(chapters)
         
         # Search quizzes
         if not entity_type or entity_type == 'quizzes':
             quizzes = Quiz.query.filter(
                 (Quiz.title.ilike(f"%{search_query}%")) |
                 (Quiz.remarks.ilike(f"%{search_query}%"))
-            ).limit(10).all()
-            results['quizzes'] = [quiz.convert_to_json() for quiz in quizzes]
+            ).limit(10)
+            results['quizzes'] = serialize_quizzes(quizzes)
         
         # Search questions
         if not entity_type or entity_type == 'questions':
@@ -64,8 +66,8 @@ class SearchApi(Resource):
                 (Question.option2.ilike(f"%{search_query}%")) |
                 (Question.option3.ilike(f"%{search_query}%")) |
                 (Question.option4.ilike(f"%{search_query}%"))
-            ).limit(10).all()
-            results['questions'] = [question.convert_to_json() for question in questions]
+            ).limit(10)
+            results['questions'] = serialize_questions(questions)
         
         return {
             'search_query': search_query,
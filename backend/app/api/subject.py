@@ -1,68 +1,41 @@
 from flask import request, current_app
 from flask_restful import Resource
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from ..models import db, User, Subject, Chapter, Quiz, Question, Score
+from ..models import db, User, Subject, Chapter, Quiz, Question, Score, UserStats
+from ..database import DatabaseBusy
+from ..models.stats import forget_scores
 from ..auth import admin_required
+from ..serializers import serialize_subjects
+from ..cache import cached
+
+def subject_cache_tags(identity, subject_id=None):
+    # Subjects embed chapter counts
+    if subject_id:
+        return [f'Subject:{subject_id}', 'Chapter']
+    return ['Subject', 'Chapter']
 
 class SubjectApi(Resource):
+    @cached('subjects', tags=subject_cache_tags, local=True)
     def get(self, subject_id=None):
         """Get all subjects or specific subject"""
         try:
-            cache = current_app.cache
-
             if subject_id:
-                # Cache individual subject for 15 minutes
-                cache_key = f"subject_{subject_id}"
-                try:
-                    cached_subject = cache.get(cache_key)
-                    if cached_subject:
-                        return cached_subject, 200
-                except Exception as e:
-                    print(f"Cache get error: {e}")
-
                 subject = Subject.query.get(subject_id)
                 if subject:
-                    subject_data = subject.convert_to_json()
-                    try:
-                        cache.set(cache_key, subject_data, timeout=900)
-                    except Exception as e:
-                        print(f"Cache set error: {e}")
-                    return subject_data, 200
+                    return subject.convert_to_json(), 200
                 return {'message': 'Subject does not exist.'}, 404
 
             search_query = request.args.get('search', '').strip()
-            bypass_cache = request.args.get('_t') is not None
-            cache_key = f"subjects_list_{search_query}"
-
-            # Try to get from cache first (unless bypassing)
-            if not bypass_cache:
-                try:
-                    cached_list = cache.get(cache_key)
-                    if cached_list:
-                        return cached_list, 200
-                except Exception as e:
-                    print(f"Cache get error: {e}")
-
             if search_query:
-                subjects = Subject.query.filter(Subject.name.ilike(f"%{search_query}%")).all()
+                subjects = Subject.query.filter(Subject.name.ilike(f"%{search_query}%"))
             else:
-                subjects = Subject.query.all()
+                subjects = Subject.query
 
-            subject_list = []
-            for subject in subjects:
-                # Force fresh data by refreshing the object
-                db.session.refresh(subject)
-                subject_list.append(subject.convert_to_json())
-
-            # Cache subject list for 10 minutes (unless bypassing)
-            if not bypass_cache:
-                try:
-                    cache.set(cache_key, subject_list, timeout=600)
-                except Exception as e:
-                    print(f"Cache set error: {e}")
-
-            return subject_list, 200
+            return serialize_subjects(subjects), 200
 
+        except DatabaseBusy:
+            db.session.rollback()
+            raise
         except Exception as e:
             print(f"Subject API error: {e}")
             return {'message': 'Internal server error'}, 500
@@ -96,15 +69,11 @@ class SubjectApi(Resource):
             db.session.add(new_subject)
             db.session.commit()
 
-            # Invalidate caches
-            try:
-                cache = current_app.cache
-                cache.clear()  # Simple approach - clear all cache
-            except Exception as e:
-                print(f"Cache clear error: {e}")
-
             return new_subject.convert_to_json(), 201
 
+        except DatabaseBusy:
+            db.session.rollback()
+            raise
         except Exception as e:
             db.session.rollback()
             print(f"Error creating subject: {e}")
@@ -142,15 +111,11 @@ class SubjectApi(Resource):
 
             db.session.commit()
 
-            # Invalidate caches
-            try:
-                cache = current_app.cache
-                cache.clear()  # Clear all cache to be safe
-            except Exception as e:
-                print(f"Cache clear error: {e}")
-
             return subject.convert_to_json(), 200
 
+        except DatabaseBusy:
+            db.session.rollback()
+            raise
         except Exception as e:
             db.session.rollback()
             print(f"Error updating subject: {e}")
@@ -183,22 +148,23 @@ class SubjectApi(Resource):
                     total_scores += quiz.scores.count()
 
             subject_name = subject.name
+            affected_users = forget_scores(
+                db.select(Quiz.id).join(Chapter).where(Chapter.subject_id == subject.id)
+            )
 
             # Delete the subject - cascade should handle the rest
             db.session.delete(subject)
+            db.session.flush()
+            UserStats.rebuild(affected_users)
             db.session.commit()
 
-            # Invalidate caches
-            try:
-                cache = current_app.cache
-                cache.clear()
-            except Exception as e:
-                print(f"Cache clear error: {e}")
-
             return {
                 'message': f'Subject "{subject_name}" deleted successfully along with {total_chapters} chapters, {total_quizzes} quizzes, {total_questions} questions, and {total_scores} quiz attempts.'
             }, 200
 
+        except DatabaseBusy:
+            db.session.rollback()
+            raise
         except Exception as e:
             db.session.rollback()
             print(f"Error deleting subject: {e}")
@@ -2,12 +2,22 @@ from flask import request
 from flask_restful import Resource
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from ..models.user import User, Role
+from ..models.stats import forget_user
 from ..database import db
 from ..auth import admin_required
+from ..serializers import serialize_users
+from ..pagination import paginate, by_id, InvalidPageRequest
+from ..cache import cached
+
+def user_cache_tags(identity, user_id=None):
+    if user_id:
+        return [f'User:{user_id}', 'Role']
+    return ['User', 'Role']
 
 class UserApi(Resource):
     @jwt_required()
     @admin_required()
+    @cached('users', tags=user_cache_tags)
     def get(self, user_id=None):
         """Get all users or specific user (Admin only)"""
         if user_id:
@@ -31,12 +41,10 @@ class UserApi(Resource):
         if role_filter:
             users = users.join(User.roles).filter(Role.name == role_filter)
         
-        users = users.all()
-        
-        user_list = []
-        for user in users:
-            user_list.append(user.convert_to_json())
-        return user_list, 200
+        try:
+            return paginate(users, by_id(User), serialize_users), 200
+        except InvalidPageRequest as e:
+            return {'message': str(e)}, 400
 
     @jwt_required()
     @admin_required()
@@ -86,6 +94,7 @@ class UserApi(Resource):
         if user.scores.count() > 0:
             return {'message': 'Cannot delete user with existing scores.'}, 400
         
+        forget_user(user.id)
         db.session.delete(user)
         db.session.commit()
         
@@ -0,0 +1,169 @@
+import time
+import uuid
+from datetime import datetime
+from functools import wraps
+from flask import current_app
+from redis import RedisError
+
+# Server-side attempt sessions, kept in Redis only. A session is one hash with
+# its owner, quiz, start time and deadline plus an "answer:<question id>" field
+# per autosaved answer, so an autosave is a single HSET and never reaches SQL.
+SESSION_PREFIX = 'attempt_session:'
+# The open session of each "user_id:quiz_id", so reloading the page resumes it
+ACTIVE_PREFIX = 'attempt_session:active:'
+ANSWER_PREFIX = 'answer:'
+# How long a session outlives its deadline, for a late submit to still grade it
+SESSION_LINGER = 3600
+
+class SessionUnavailable(Exception):
+    """Redis cannot hold attempt sessions right now"""
+
+def _client():
+    cache = getattr(current_app, 'cache', None)
+    return cache.redis_client if cache and cache.available else None
+
+def _redis():
+    client = _client()
+    if client is None:
+        raise SessionUnavailable()
+    return client
+
+def sessions_available():
+    """Whether attempts can be timed by a session right now"""
+    return _client() is not None
+
+def _redis_errors_unavailable(f):
+    """Report Redis errors to the circuit breaker and raise them as SessionUnavailable"""
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        try:
+            return f(*args, **kwargs)
+        except RedisError as e:
+            current_app.cache._failed(e)
+            raise SessionUnavailable() from e
+    return decorated_function
+
+def _text(value):
+    return value.decode() if isinstance(value, bytes) else value
+
+def duration_seconds(time_duration):
+    # HH:MM:SS, or HH:MM in the default data
+    hours, minutes, seconds = ([int(part) for part in time_duration.split(':')] + [0])[:3]
+    return hours * 3600 + minutes * 60 + seconds
+
+def format_duration(seconds):
+    # Score.time_taken holds HH:MM:SS, so longer attempts are capped
+    seconds = min(int(seconds), 24 * 3600 - 1)
+    return f"{seconds // 3600:02d}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}"
+
+class AttemptSession:
+    __slots__ = ('id', 'user_id', 'quiz_id', 'started_at', 'deadline', 'answers')
+
+    def __init__(self, session_id, fields):
+        self.id = session_id
+        self.user_id = int(fields['user_id'])
+        self.quiz_id = int(fields['quiz_id'])
+        self.started_at = float(fields['started_at'])
+        self.deadline = float(fields['deadline'])
+        self.answers = {
+            name[len(ANSWER_PREFIX):]: int(value)
+            for name, value in fields.items() if name.startswith(ANSWER_PREFIX)
+        }
+
+    @property
+    def key(self):
+        return SESSION_PREFIX + self.id
+
+    def time_remaining(self, now=None):
+        return max(0, int(self.deadline - (now or time.time())))
+
+    def accepts_answers(self, now=None):
+        """Autosaves are taken until the deadline plus ATTEMPT_SESSION_GRACE"""
+        return (now or time.time()) <= self.deadline + current_app.config['ATTEMPT_SESSION_GRACE']
+
+    def time_taken(self, now=None):
+        """Seconds from the start to now, at most the quiz's duration"""
+        return min(now or time.time(), self.deadline) - self.started_at
+
+    def convert_to_json(self):
+        now = time.time()
+        return {
+            'session_id': self.id,
+            'quiz_id': self.quiz_id,
+            'started_at': datetime.utcfromtimestamp(self.started_at).isoformat(),
+            'expires_at': datetime.utcfromtimestamp(self.deadline).isoformat(),
+            'elapsed': int(self.time_taken(now)),
+            'time_remaining': self.time_remaining(now),
+            'answers': self.answers
+        }
+
+@_redis_errors_unavailable
+def load_session(session_id):
+    """The session with this id, or None if it never existed or has expired"""
+    fields = _redis().hgetall(SESSION_PREFIX + session_id)
+    if not fields:
+        return None
+    return AttemptSession(session_id, {_text(name): _text(value) for name, value in fields.items()})
+
+@_redis_errors_unavailable
+def start_session(user_id, quiz):
+    """Open an attempt at a quiz, or resume the user's open one while it still takes answers"""
+    client = _redis()
+    active_key = f'{ACTIVE_PREFIX}{user_id}:{quiz.id}'
+    active = client.get(active_key)
+    if active:
+        session = load_session(_text(active))
+        if session and session.accepts_answers():
+            return session
+
+    session_id = uuid.uuid4().hex
+    started_at = time.time()
+    duration = duration_seconds(quiz.time_duration)
+    fields = {
+        'user_id': user_id,
+        'quiz_id': quiz.id,
+        'started_at': repr(started_at),
+        'deadline': repr(started_at + duration)
+    }
+    ttl = duration + current_app.config['ATTEMPT_SESSION_GRACE'] + SESSION_LINGER
+    pipe = client.pipeline(transaction=True)
+    pipe.hset(SESSION_PREFIX + session_id, mapping=fields)
+    pipe.expire(SESSION_PREFIX + session_id, ttl)
+    pipe.set(active_key, session_id, ex=ttl)
+    pipe.execute()
+    return AttemptSession(session_id, fields)
+
+@_redis_errors_unavailable
+def save_answers(session, answers, key):
+    """Autosave {question id: option or None} into the session; None clears an answer.
+
+    Answers are checked against the quiz's AnswerKey; InvalidAnswer is raised
+    before anything is written, and questions outside the quiz are ignored.
+    """
+    key.positions(answers)
+    chosen = {ANSWER_PREFIX + question_id: int(answer) for question_id, answer in answers.items()
+              if question_id in key.index and answer is not None}
+    cleared = [ANSWER_PREFIX + question_id for question_id, answer in answers.items()
+               if question_id in key.index and answer is None]
+
+    pipe = _redis().pipeline(transaction=True)
+    if chosen:
+        pipe.hset(session.key, mapping=chosen)
+    if cleared:
+        pipe.hdel(session.key, *cleared)
+    pipe.execute()
+    return len(chosen) + len(cleared)
+
+@_redis_errors_unavailable
+def claim_submission(session):
+    """Mark the session as being submitted; False if another request already did"""
+    return bool(_redis().hsetnx(session.key, 'submitting', 1))
+
+@_redis_errors_unavailable
+def release_submission(session):
+    _redis().hdel(session.key, 'submitting')
+
+@_redis_errors_unavailable
+def close_session(session):
+    client = _redis()
+    client.delete(session.key, f'{ACTIVE_PREFIX}{session.user_id}:{session.quiz_id}')
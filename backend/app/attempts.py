@@ -0,0 +1,137 @@
+from flask import current_app
+from sqlalchemy import func
+
+from .database import db
+from .models import Score
+from .submissions import pending_attempts, PENDING_KEY
+
+# Attempts per (user, quiz) counted in Redis, so the attempt limit is one atomic
+# round trip instead of a COUNT over scores, and concurrent submits cannot both
+# take the last attempt. A counter covers saved, queued and in-flight attempts:
+# it is reserved before grading and released if the attempt is not saved.
+COUNTER_PREFIX = 'attempts:'
+
+# 1+ = reserved, now this many; 0 = limit reached; -1 = no counter yet
+RESERVE_ATTEMPT_SCRIPT = """
+local current = redis.call('get', KEYS[1])
+if not current then
+    return -1
+end
+if tonumber(current) >= tonumber(ARGV[1]) then
+    return 0
+end
+return redis.call('incr', KEYS[1])
+"""
+
+RELEASE_ATTEMPT_SCRIPT = """
+local current = redis.call('get', KEYS[1])
+if current and tonumber(current) > 0 then
+    return redis.call('decr', KEYS[1])
+end
+return 0
+"""
+
+# Counters that do not exist yet are left to be seeded from the database
+ADD_ATTEMPTS_SCRIPT = """
+if redis.call('exists', KEYS[1]) == 1 then
+    return redis.call('incrby', KEYS[1], ARGV[1])
+end
+return 0
+"""
+
+def _redis():
+    cache = getattr(current_app, 'cache', None)
+    return cache.redis_client if cache and cache.available else None
+
+def counter_key(user_id, quiz_id):
+    return f'{COUNTER_PREFIX}{user_id}:{quiz_id}'
+
+def saved_attempts(user_id, quiz_id):
+    return Score.query.filter_by(user_id=user_id, quiz_id=quiz_id).count()
+
+def reserve_attempt(user_id, quiz_id, limit):
+    """Take one of a user's attempts at a quiz.
+
+    Returns True if it was reserved, False if the limit is reached, or None when
+    Redis is unavailable and the caller has to check the database itself.
+    """
+    client = _redis()
+    if client is None:
+        return None
+    key = counter_key(user_id, quiz_id)
+    try:
+        result = client.eval(RESERVE_ATTEMPT_SCRIPT, 1, key, limit)
+        if result == -1:
+            seed = saved_attempts(user_id, quiz_id) + pending_attempts(user_id, quiz_id)
+            client.set(key, seed, nx=True, ex=current_app.config['ATTEMPT_COUNTER_TTL'])
+            result = client.eval(RESERVE_ATTEMPT_SCRIPT, 1, key, limit)
+    except Exception as e:
+        current_app.logger.warning(f"Attempt counter unavailable, counting scores instead: {e}")
+        return None
+    return result > 0
+
+def release_attempt(user_id, quiz_id):
+    """Give back an attempt reserved for a submission that was not saved"""
+    client = _redis()
+    if client is None:
+        return
+    try:
+        client.eval(RELEASE_ATTEMPT_SCRIPT, 1, counter_key(user_id, quiz_id))
+    except Exception as e:
+        # Corrected by the next reconcile-attempt-counters run
+        current_app.logger.warning(f"Could not release attempt of user {user_id} at quiz {quiz_id}: {e}")
+
+def add_attempts(counts):
+    """Count attempts saved without a reservation ({(user_id, quiz_id): n}), e.g. bulk uploads"""
+    client = _redis()
+    if client is None or not counts:
+        return
+    try:
+        pipe = client.pipeline(transaction=False)
+        for (user_id, quiz_id), count in counts.items():
+            pipe.eval(ADD_ATTEMPTS_SCRIPT, 1, counter_key(user_id, quiz_id), count)
+        pipe.execute()
+    except Exception as e:
+        current_app.logger.warning(f"Could not update attempt counters: {e}")
+
+def attempt_counts(pairs):
+    """Current counters of the given (user_id, quiz_id) pairs; pairs without one are left out"""
+    client = _redis()
+    pairs = list(pairs)
+    if client is None or not pairs:
+        return {}
+    try:
+        values = client.mget([counter_key(user_id, quiz_id) for user_id, quiz_id in pairs])
+    except Exception:
+        return {}
+    return {pair: int(value) for pair, value in zip(pairs, values) if value is not None}
+
+def reconcile_counters():
+    """Rebuild every counter from scores plus queued submissions and drop the rest.
+
+    Attempts in flight while this runs may be missed until the next run, so it
+    is scheduled off-peak.
+    """
+    client = _redis()
+    if client is None:
+        return None
+
+    counts = {
+        counter_key(user_id, quiz_id): count for user_id, quiz_id, count in
+        db.session.query(Score.user_id, Score.quiz_id, func.count(Score.id)).group_by(Score.user_id, Score.quiz_id)
+    }
+    for field, count in client.hgetall(PENDING_KEY).items():
+        if int(count) > 0:
+            key = COUNTER_PREFIX + (field.decode() if isinstance(field, bytes) else field)
+            counts[key] = counts.get(key, 0) + int(count)
+
+    stale = [key for key in client.scan_iter(match=COUNTER_PREFIX + '*', count=1000)
+             if (key.decode() if isinstance(key, bytes) else key) not in counts]
+    ttl = current_app.config['ATTEMPT_COUNTER_TTL']
+    pipe = client.pipeline(transaction=False)
+    for key, count in counts.items():
+        pipe.set(key, count, ex=ttl)
+    if stale:
+        pipe.delete(*stale)
+    pipe.execute()
+    return {'counters': len(counts), 'removed': len(stale)}
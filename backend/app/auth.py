@@ -5,6 +5,7 @@ from flask_jwt_extended import (
 )
 from functools import wraps
 from .models.user import User, Role
+from .models.stats import record_registration
 from .database import db
 
 def admin_required():
@@ -39,6 +40,22 @@ def user_required():
         return decorator
     return wrapper
 
+def proctor_required():
+    # Decorator to require the proctor or admin role
+    def wrapper(fn):
+        @wraps(fn)
+        def decorator(*args, **kwargs):
+            current_user_id = get_jwt_identity()
+            if current_user_id:
+                user = User.query.get(int(current_user_id))
+                if not user or not user.is_active or not (user.is_admin() or user.has_role('proctor')):
+                    return {"error": "Proctor access required"}, 403
+            else:
+                return {"error": "Authentication required"}, 401
+            return fn(*args, **kwargs)
+        return decorator
+    return wrapper
+
 def authenticate_user(username, password):
     """Authenticate user and return user object if valid"""
     user = User.query.filter_by(username=username).first()
@@ -64,6 +81,9 @@ def init_admin_user():
     if not user_role:
         user_role = Role(name='user', description='Regular user role')
         db.session.add(user_role)
+
+    if not Role.query.filter_by(name='proctor').first():
+        db.session.add(Role(name='proctor', description='Uploads attempts collected offline'))
     
     db.session.commit()
     
@@ -79,6 +99,8 @@ def init_admin_user():
         admin_user.set_password('Admin@123')  # Updated password
         admin_user.roles.append(admin_role)
         db.session.add(admin_user)
+        db.session.flush()
+        record_registration(admin_user)
         db.session.commit()
         print("Admin user created with username: admin, password: Admin@123")
     
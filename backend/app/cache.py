@@ -1,14 +1,228 @@
 import redis
 import json
-import pickle
+import zlib
+import hashlib
 from functools import wraps
-from flask import current_app
+from flask import current_app, request
+from werkzeug.http import http_date, quote_etag
+from flask_jwt_extended import get_jwt_identity
+from sqlalchemy import event
 import os
-from datetime import timedelta
+import math
+import random
+import time
+import threading
+import uuid
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+try:
+    import orjson
+except ImportError:  # optional speedup; the stdlib encoder produces the same JSON
+    orjson = None
+
+GENERATION_PREFIX = 'gen:'
+LOCK_PREFIX = 'lock:'
+MISSING = object()
+
+# Delete a lock only if it still holds our token, so a lock that expired and
+# was taken over by another worker is never released by the original holder
+RELEASE_LOCK_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+class JsonCodec:
+    """Encodes cache values as JSON behind a one-byte format header.
+
+    Payloads of compress_threshold bytes or more are zlib-compressed when that
+    makes them smaller. Values must be JSON-compatible (API response dicts),
+    and nothing read back from Redis is ever executed, unlike pickle. Blobs with
+    an unknown header, including entries pickled by older versions, decode as
+    a miss.
+    """
+    RAW = b'j'
+    ZLIB = b'z'
+
+    def __init__(self, compress_threshold=1024, compress_level=1):
+        self.compress_threshold = compress_threshold
+        self.compress_level = compress_level
+
+    @staticmethod
+    def _encode(value):
+        if orjson:
+            return orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS)
+        return json.dumps(value, separators=(',', ':')).encode()
+
+    @staticmethod
+    def _decode(data):
+        return orjson.loads(data) if orjson else json.loads(data)
+
+    def dumps(self, value):
+        data = self._encode(value)
+        if self.compress_threshold is not None and len(data) >= self.compress_threshold:
+            compressed = zlib.compress(data, self.compress_level)
+            if len(compressed) < len(data):
+                return self.ZLIB + compressed
+        return self.RAW + data
+
+    def loads(self, blob):
+        header, payload = blob[:1], blob[1:]
+        if header == self.ZLIB:
+            payload = zlib.decompress(payload)
+        elif header != self.RAW:
+            raise ValueError(f'Unknown cache value format {header!r}')
+        return self._decode(payload)
+
+class LocalCache:
+    """Bounded, thread-safe LRU with a per-entry TTL, kept in each worker process.
+
+    Values are shared, not copied: callers must treat them as read-only.
+    """
+    def __init__(self, max_entries=1024, ttl=5):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Cached value, or MISSING"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return MISSING
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key, value, ttl=None):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + (ttl or self.ttl), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def evict(self, keys):
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': round(self.hits / lookups, 4) if lookups else None
+            }
+
+# Failures that mean Redis is unreachable, as opposed to a bad command or value
+CONNECTION_ERRORS = (redis.ConnectionError, redis.TimeoutError)
+
+class CircuitBreaker:
+    """Stops sending commands to Redis after consecutive connection failures.
+
+    While open, a background thread pings Redis every retry_interval seconds
+    and closes the circuit (calling on_close) as soon as it answers.
+    """
+    def __init__(self, probe, failure_threshold=3, retry_interval=5, on_close=None):
+        self.probe = probe
+        self.failure_threshold = failure_threshold
+        self.retry_interval = retry_interval
+        self.on_close = on_close
+        self.state = 'closed'
+        self.failures = 0
+        self.trips = 0
+        self.opened_at = None
+        self.last_error = None
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stopped = threading.Event()
+
+    @property
+    def closed(self):
+        return self.state == 'closed'
+
+    def record_success(self):
+        if self.failures:
+            with self._lock:
+                self.failures = 0
+
+    def record_failure(self, error):
+        with self._lock:
+            self.failures += 1
+            self.last_error = repr(error)
+            if self.closed and self.failures >= self.failure_threshold:
+                self._open()
+
+    def trip(self, error):
+        """Open immediately, e.g. when Redis is down at startup"""
+        with self._lock:
+            self.last_error = repr(error)
+            if self.closed:
+                self._open()
+
+    def _open(self):
+        self.state = 'open'
+        self.opened_at = time.time()
+        self.trips += 1
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._reconnect, name='cache-reconnect', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """End the reconnect thread, e.g. when the cache is initialised again with a new breaker"""
+        self._stopped.set()
+
+    def _reconnect(self):
+        while not self._stopped.wait(self.retry_interval):
+            try:
+                self.probe()
+            except Exception as e:
+                self.last_error = repr(e)
+                continue
+            with self._lock:
+                self.state = 'closed'
+                self.failures = 0
+                self.opened_at = None
+            if self.on_close:
+                self.on_close()
+            return
+
+    def stats(self):
+        return {
+            'state': self.state,
+            'consecutive_failures': self.failures,
+            'trips': self.trips,
+            'open_for': round(time.time() - self.opened_at, 1) if self.opened_at else None,
+            'last_error': self.last_error
+        }
 
 class RedisCache:
-    def __init__(self, app=None):
+    def __init__(self, app=None, codec=None):
         self.redis_client = None
+        self.breaker = None
+        self.fallback = None
+        self._missed_invalidations = set()
+        self.codec = codec
+        self.local = None
+        self.channel = None
+        self._listener = None
+        self._listener_pid = None
         if app:
             self.init_app(app)
     
@@ -16,113 +230,628 @@ class RedisCache:
         """Initialize Redis cache with Flask app"""
         redis_url = app.config.get('CACHE_REDIS_URL', 'redis://localhost:6379/1')  # Use DB 1 for cache
 
+        # Initialised again (another app in this process): retire the old client's threads
+        if self.breaker:
+            self.breaker.stop()
+        self._stop_listener()
+
+        socket_timeout = app.config.get('CACHE_SOCKET_TIMEOUT', 0.5)
+        self.redis_client = redis.from_url(
+            redis_url,
+            decode_responses=False,
+            socket_connect_timeout=socket_timeout,
+            socket_timeout=socket_timeout,
+            retry_on_timeout=False
+        )
+        self.breaker = CircuitBreaker(
+            self.redis_client.ping,
+            failure_threshold=app.config.get('CACHE_FAILURE_THRESHOLD', 3),
+            retry_interval=app.config.get('CACHE_RETRY_INTERVAL', 5),
+            on_close=self._on_reconnect
+        )
+        # Serves this process while the circuit is open; never shared between workers
+        self.fallback = LocalCache(app.config.get('CACHE_FALLBACK_MAX_ENTRIES', 512),
+                                   app.config.get('CACHE_FALLBACK_TTL', 30))
+
         try:
-            self.redis_client = redis.from_url(
-                redis_url,
-                decode_responses=False,
-                socket_connect_timeout=2,
-                socket_timeout=2,
-                retry_on_timeout=False
-            )
             self.redis_client.ping()
+        except Exception as e:
+            self.breaker.trip(e)
 
-        except Exception:
-            self.redis_client = None
+        if self.codec is None:
+            self.codec = JsonCodec(app.config.get('CACHE_COMPRESS_THRESHOLD', 1024))
+
+        max_entries = app.config.get('CACHE_LOCAL_MAX_ENTRIES', 0)
+        self.local = LocalCache(max_entries, app.config.get('CACHE_LOCAL_TTL', 5)) if max_entries else None
+        self.channel = app.config.get('CACHE_INVALIDATION_CHANNEL', 'cache:invalidate')
+
+        self.stale_grace = app.config.get('CACHE_STALE_GRACE', 300)
+        self.lock_timeout_ms = app.config.get('CACHE_LOCK_TIMEOUT_MS', 10000)
+        self.lock_wait = app.config.get('CACHE_LOCK_WAIT', 5)
+        self.xfetch_beta = app.config.get('CACHE_XFETCH_BETA', 1.0)
 
         app.cache = self
+
+    @property
+    def available(self):
+        """Whether commands currently go to Redis rather than the in-process fallback"""
+        return self.redis_client is not None and self.breaker.closed
+
+    def _failed(self, error):
+        if isinstance(error, CONNECTION_ERRORS):
+            self.breaker.record_failure(error)
+
+    def _on_reconnect(self):
+        """Redis is back: replay the invalidations it missed and drop everything served meanwhile"""
+        missed, self._missed_invalidations = self._missed_invalidations, set()
+        self.fallback.clear()
+        if self.local:
+            self.local.clear()
+        if missed:
+            self.invalidate(*sorted(missed))
+
+    def _ensure_listener(self):
+        """Subscribe this process to invalidation broadcasts (once per pid, so forked workers resubscribe)"""
+        if not self.local or not self.available or self._listener_pid == os.getpid():
+            return
+        self._listener_pid = os.getpid()
+        try:
+            pubsub = self.redis_client.pubsub(ignore_subscribe_messages=True)
+            pubsub.subscribe(**{self.channel: self._on_invalidation})
+            self._listener = pubsub.run_in_thread(sleep_time=1, daemon=True,
+                                                  exception_handler=self._on_listener_error)
+        except Exception:
+            # Without broadcasts, local entries are only bounded by their TTL
+            self._listener_pid = None
+
+    def _stop_listener(self):
+        if self._listener:
+            self._listener.stop()
+        self._listener = None
+        self._listener_pid = None
+
+    def _on_invalidation(self, message):
+        try:
+            tags = json.loads(message['data'])
+        except (TypeError, ValueError):
+            self.local.clear()
+            return
+        self.local.evict(GENERATION_PREFIX + tag for tag in tags)
+
+    def _on_listener_error(self, error, pubsub, thread):
+        # Broadcasts may have been missed while disconnected
+        self.local.clear()
+        time.sleep(1)
     
     def get(self, key):
         """Get value from cache"""
-        if not self.redis_client:
-            return None
+        if not self.available:
+            value = self.fallback.get(key) if self.fallback else MISSING
+            return None if value is MISSING else value
         
         try:
             value = self.redis_client.get(key)
+            self.breaker.record_success()
             if value:
-                return pickle.loads(value)
+                return self.codec.loads(value)
             return None
-        except Exception:
+        except Exception as e:
+            self._failed(e)
             return None
     
     def set(self, key, value, timeout=300):
         """Set value in cache with timeout (default 5 minutes)"""
-        if not self.redis_client:
-            return False
+        if not self.available:
+            if not self.fallback:
+                return False
+            self.fallback.set(key, value, min(timeout, self.fallback.ttl))
+            return True
         
         try:
-            serialized_value = pickle.dumps(value)
+            serialized_value = self.codec.dumps(value)
             return self.redis_client.setex(key, timeout, serialized_value)
-        except Exception:
+        except Exception as e:
+            self._failed(e)
             return False
     
     def delete(self, key):
         """Delete key from cache"""
-        if not self.redis_client:
-            return False
+        if not self.available:
+            if self.fallback:
+                self.fallback.evict([key])
+            return True
         
         try:
             return self.redis_client.delete(key)
-        except Exception:
+        except Exception as e:
+            self._failed(e)
             return False
     
-    def clear_pattern(self, pattern):
-        """Clear all keys matching pattern"""
+    def generations(self, namespaces):
+        """Current generation of each namespace.
+
+        With the local tier on, known generations come from process memory and
+        only the rest are fetched; broadcasts evict them when a tag is bumped.
+        """
+        names = [GENERATION_PREFIX + namespace for namespace in namespaces]
+        if not self.available:
+            return self._fallback_generations(names)
+        if not self.local:
+            return self._fetch_generations(names)
+
+        self._ensure_listener()
+        values = [self.local.get(name) for name in names]
+        unknown = [name for name, value in zip(names, values) if value is MISSING]
+        if unknown:
+            fetched = dict(zip(unknown, self._fetch_generations(unknown)))
+            for name, value in fetched.items():
+                self.local.set(name, value)
+            values = [fetched[name] if value is MISSING else value for name, value in zip(names, values)]
+        return values
+
+    def _fetch_generations(self, names):
+        """Generations from Redis in one MGET.
+
+        A missing counter (never used, or evicted) is seeded from the clock rather
+        than 0, so it can never come back to a generation that still has live entries.
+        """
+        try:
+            values = self.redis_client.mget(names)
+            missing = [name for name, value in zip(names, values) if value is None]
+            if missing:
+                seed = int(time.time() * 1000)
+                pipe = self.redis_client.pipeline()
+                for name in missing:
+                    pipe.set(name, seed, nx=True)
+                pipe.mget(names)
+                values = pipe.execute()[-1]
+        except Exception as e:
+            self._failed(e)
+            raise
+        self.breaker.record_success()
+        return [int(value) for value in values]
+
+    def _fallback_generations(self, names):
+        """Generations kept in process memory while Redis is unreachable"""
+        values = []
+        for name in names:
+            value = self.fallback.get(name)
+            if value is MISSING:
+                value = int(time.time() * 1000)
+                self.fallback.set(name, value)
+            values.append(value)
+        return values
+
+    def version(self, namespaces):
+        """String identifying the current generations of the namespaces"""
+        generations = self.generations(namespaces)
+        return ','.join(f"{namespace}.{generation}" for namespace, generation in zip(namespaces, generations))
+
+    def versioned_key(self, key, namespaces):
+        """Key embedding the generations of the namespaces it belongs to"""
+        return f"{key}@{self.version(namespaces)}"
+
+    def get_versioned(self, key, namespaces, local=False):
+        """Get a value stored with set_versioned; misses once any namespace is invalidated.
+
+        local=True serves hot, small values from process memory when the local tier is on.
+        """
+        if not self.redis_client:
+            return None
+
+        try:
+            if not self.available:
+                return self.get(self.versioned_key(key, namespaces))
+            versioned = self.versioned_key(key, namespaces)
+            if local and self.local:
+                value = self.local.get(versioned)
+                if value is not MISSING:
+                    return value
+            value = self.get(versioned)
+            if local and self.local and value is not None:
+                self.local.set(versioned, value)
+            return value
+        except Exception:
+            return None
+
+    def set_versioned(self, key, value, namespaces, timeout=300, local=False):
+        """Set a value under the current generations of its namespaces"""
         if not self.redis_client:
             return False
-        
+
+        try:
+            versioned = self.versioned_key(key, namespaces)
+            if local and self.local and self.available:
+                self.local.set(versioned, value)
+            return self.set(versioned, value, timeout)
+        except Exception:
+            return False
+
+    def get_or_compute(self, key, fn, ttl=300, tags=(), local=False, force=False):
+        """Return the cached value of key, calling fn() to (re)build it at most once at a time.
+
+        The entry is kept for ttl + CACHE_STALE_GRACE seconds along with the tag
+        generations it was built under, when it was built, its logical expiry
+        and how long fn took.
+        - Fresh entry: returned, unless XFetch decides to refresh it early. The
+          closer the expiry and the slower fn is, the likelier that becomes.
+        - Expired, invalidated or early-refreshed entry: the worker that wins the
+          SET NX lock rebuilds it. The others keep serving the old value meanwhile.
+        - No entry at all: losers wait up to CACHE_LOCK_WAIT seconds for the
+          winner, then compute it themselves.
+        force=True rebuilds even a fresh entry; workers forcing the same key at
+        once wait for a single rebuild. Without Redis, fn() is simply called.
+        """
         try:
-            keys = self.redis_client.keys(pattern)
-            if keys:
-                return self.redis_client.delete(*keys)
+            version = self.version(tags) if self.redis_client else None
+        except Exception:
+            version = None
+        return self._get_or_compute_envelope(key, fn, ttl, version, local, force)['value']
+
+    def _get_or_compute_envelope(self, key, fn, ttl, version, local=False, force=False, max_age=None):
+        """get_or_compute for a precomputed version (None when unknown: fn() is
+        called uncached). Entries built more than max_age seconds ago count as
+        expired. Returns the whole envelope, value and build time included."""
+        if version is None:
+            return self._envelope(fn(), version, ttl, 0)
+
+        try:
+            envelope = None if force else self._read_envelope(key, local)
+        except Exception:
+            return self._envelope(fn(), version, ttl, 0)
+
+        if envelope is not None and envelope['version'] == version and not self._refresh_due(envelope, max_age):
+            return envelope
+
+        # Forced rebuilds are single-flight too: concurrent ones share the winner's entry
+        requested = time.time()
+        token = self._acquire_lock(key)
+        if token:
+            try:
+                return self._compute(key, fn, ttl, version, local)
+            finally:
+                self._release_lock(key, token)
+
+        if envelope is not None:
+            return envelope
+
+        deadline = time.monotonic() + self.lock_wait
+        while time.monotonic() < deadline and self.available:
+            time.sleep(0.05)
+            envelope = self._read_envelope(key)
+            if envelope is not None and envelope['version'] == version and \
+                    (not force or envelope.get('built', 0) >= requested):
+                return envelope
+        return self._envelope(fn(), version, ttl, 0)
+
+    def _read_envelope(self, key, local=False):
+        if local and self.local and self.available:
+            envelope = self.local.get(key)
+            if envelope is not MISSING:
+                return envelope
+        envelope = self.get(key)
+        if local and self.local and envelope is not None:
+            self.local.set(key, envelope)
+        return envelope
+
+    def _refresh_due(self, envelope, max_age=None):
+        """XFetch: refresh early with probability rising as expiry nears"""
+        expires = envelope['expires']
+        if max_age is not None and 'built' in envelope:
+            expires = min(expires, envelope['built'] + max_age)
+        early = envelope['delta'] * self.xfetch_beta * -math.log(1.0 - random.random())
+        return time.time() + early >= expires
+
+    @staticmethod
+    def _envelope(value, version, ttl, delta):
+        built = time.time()
+        return {'value': value, 'version': version, 'built': built, 'expires': built + ttl, 'delta': delta}
+
+    def _compute(self, key, fn, ttl, version, local):
+        started = time.monotonic()
+        value = fn()
+        envelope = self._envelope(value, version, ttl, time.monotonic() - started)
+        self.set(key, envelope, timeout=ttl + self.stale_grace)
+        if local and self.local and self.available:
+            self.local.set(key, envelope)
+        return envelope
+
+    def _acquire_lock(self, key):
+        token = uuid.uuid4().hex
+        if not self.available:
+            return token  # nothing to coordinate with; each process computes its own
+        try:
+            if self.redis_client.set(LOCK_PREFIX + key, token, nx=True, px=self.lock_timeout_ms):
+                return token
+        except Exception as e:
+            self._failed(e)
+            return token if not self.available else None
+        return None
+
+    def _release_lock(self, key, token):
+        if not self.available:
+            return
+        try:
+            self.redis_client.eval(RELEASE_LOCK_SCRIPT, 1, LOCK_PREFIX + key, token)
+        except Exception:
+            pass  # the lock expires on its own
+
+    def invalidate(self, *namespaces):
+        """Invalidate every entry of the namespaces with one INCR each, in a single round trip.
+
+        Nothing is deleted: entries under old generations are no longer addressable
+        and expire on their own TTL.
+        """
+        if not self.redis_client or not namespaces:
+            return False
+
+        if self.local:
+            self.local.evict(GENERATION_PREFIX + namespace for namespace in namespaces)
+
+        if not self.available:
+            # Bump the fallback's generations now and Redis's once it is reachable again
+            self._missed_invalidations.update(namespaces)
+            names = [GENERATION_PREFIX + namespace for namespace in namespaces]
+            for name, value in zip(names, self._fallback_generations(names)):
+                self.fallback.set(name, value + 1)
+            return True
+
+        # Retry anything an earlier failed attempt could not deliver
+        namespaces = sorted(set(namespaces) | self._missed_invalidations)
+        try:
+            pipe = self.redis_client.pipeline(transaction=False)
+            for namespace in namespaces:
+                pipe.incr(GENERATION_PREFIX + namespace)
+            # Workers with a local tier drop their copies of these generations
+            pipe.publish(self.channel, json.dumps(list(namespaces)))
+            pipe.execute()
+            self._missed_invalidations.difference_update(namespaces)
             return True
         except Exception as e:
-            current_app.logger.error(f"Cache clear pattern error for {pattern}: {e}")
+            self._failed(e)
+            self._missed_invalidations.update(namespaces)
+            current_app.logger.error(f"Cache invalidate error for {namespaces}: {e}")
             return False
     
+    def track_model_changes(self, session):
+        """Invalidate the cache tags of every row a session writes, once it commits.
+
+        Tags come from each instance's cache_tags() (e.g. 'Subject', 'Quiz:3',
+        'Score:user:7'). They are collected at flush time, when new rows have ids,
+        and sent in one pipelined INCR after commit. A rollback discards them.
+        """
+        if event.contains(session, 'after_flush', self._collect_tags):
+            return
+        event.listen(session, 'after_flush', self._collect_tags)
+        event.listen(session, 'after_commit', self._invalidate_collected)
+        event.listen(session, 'after_rollback', self._discard_collected)
+
+    @staticmethod
+    def tag_writes(session, *tags):
+        """Queue tags for rows written outside the unit of work (bulk inserts, Core
+        statements), to be invalidated with the session's other tags on commit"""
+        session.info.setdefault('cache_tags', set()).update(tags)
+
+    @staticmethod
+    def _collect_tags(session, flush_context):
+        tags = session.info.setdefault('cache_tags', set())
+        for instance in list(session.new) + list(session.dirty) + list(session.deleted):
+            if not hasattr(instance, 'cache_tags'):
+                continue
+            if instance in session.dirty and not session.is_modified(instance, include_collections=False):
+                continue
+            tags.update(instance.cache_tags())
+
+    def _invalidate_collected(self, session):
+        tags = session.info.pop('cache_tags', None)
+        if tags:
+            self.invalidate(*sorted(tags))
+
+    @staticmethod
+    def _discard_collected(session):
+        session.info.pop('cache_tags', None)
+
+    def stats(self):
+        """Availability, circuit state and tier counters for health checks"""
+        return {
+            'redis': self.available,
+            'circuit': self.breaker.stats() if self.breaker else None,
+            'fallback': self.fallback.stats() if self.fallback and not self.available else None,
+            'local': self.local.stats() if self.local else None
+        }
+
     def flush_all(self):
         """Clear all cache"""
-        if not self.redis_client:
+        if self.local:
+            self.local.clear()
+        if self.fallback:
+            self.fallback.clear()
+        if not self.available:
             return False
         
         try:
             return self.redis_client.flushdb()
         except Exception as e:
+            self._failed(e)
             current_app.logger.error(f"Cache flush error: {e}")
             return False
 
-# Cache decorator for functions
-def cached(timeout=300, key_prefix=''):
+# Cache timeouts (in seconds) per cache policy; tagged entries are invalidated
+# on commit, so these only bound how long unused entries occupy memory
+CACHE_TIMEOUTS = {
+    'dashboard': 600,      # 10 minutes
+    'subjects': 3600,      # 1 hour
+    'chapters': 3600,      # 1 hour
+    'quizzes': 300,        # 5 minutes
+    'questions': 900,      # 15 minutes
+    'quiz_attempt': 900,   # 15 minutes
+    'scores': 180,         # 3 minutes
+    'users': 300,          # 5 minutes
+}
+
+# Query arguments that never change a response: freshness bounds and cache busters
+IGNORED_ARGS = frozenset(['max_age', '_t'])
+# Set in the WSGI environ of the warming job's in-process requests, which no
+# HTTP client can reach; such requests may set ?max_age= on any policy
+WARMING_ENVIRON_KEY = 'quiz_master.cache_warming'
+
+class CachePolicy:
+    """How the responses of one read endpoint are cached.
+
+    tags is a list of model tags, or a callable taking the JWT identity and the
+    view arguments and returning them. per_user marks endpoints whose output
+    depends on who is asking: the identity becomes part of the key. A callable
+    maps the identity to the audience that shares one entry instead (e.g. all
+    admins). Without it the identity passed around is None, and the endpoint
+    needs no JWT.
+
+    max_age (seconds, or a callable like tags; None for no bound) caps how old
+    an entry may be when served, for data whose changes are deliberately not in
+    tags. Callers it declares a bound for can ask for a tighter or looser one
+    with ?max_age=; for everyone else the argument is ignored, so it cannot be
+    used to force rebuilds of other entries. The warming job may set it anywhere.
+    """
+
+    def __init__(self, name, tags=(), per_user=False, local=False, max_age=None, report_age=False):
+        if name not in CACHE_TIMEOUTS:
+            raise KeyError(f"No cache timeout configured for '{name}'")
+        self.name = name
+        self._tags = tags
+        self.per_user = per_user
+        self.local = local
+        self._max_age = max_age
+        self.report_age = report_age
+
+    @property
+    def ttl(self):
+        return CACHE_TIMEOUTS[self.name]
+
+    def audience(self, identity):
+        if callable(self.per_user):
+            return self.per_user(identity)
+        return identity if self.per_user else None
+
+    def tags(self, identity, view_args):
+        if callable(self._tags):
+            return self._tags(identity, **view_args)
+        return list(self._tags)
+
+    def max_age(self, identity, view_args):
+        """The freshness bound for this request, capped at the TTL"""
+        declared = self._max_age(identity, **view_args) if callable(self._max_age) else self._max_age
+        requested = request.args.get('max_age', type=int)
+        trusted = declared is not None or request.environ.get(WARMING_ENVIRON_KEY)
+        if trusted and requested is not None and requested >= 0:
+            return min(requested, self.ttl)
+        return declared
+
+    def key(self, audience, view_args):
+        """Same request, same key, in every worker: a digest of the endpoint,
+        view arguments, sorted query arguments and (for per_user) the audience"""
+        args = sorted(
+            (name, value) for name, values in request.args.lists()
+            if name not in IGNORED_ARGS for value in values
+        )
+        material = json.dumps(
+            [request.endpoint, sorted(view_args.items()), args, audience],
+            default=str, separators=(',', ':')
+        )
+        return f"view:{self.name}:{hashlib.sha1(material.encode('utf-8')).hexdigest()}"
+
+# Registered policies by name
+CACHE_POLICIES = {}
+
+class _Uncacheable(Exception):
+    """Carries a non-200 view result out of get_or_compute without caching it"""
+
+    def __init__(self, response):
+        super().__init__()
+        self.response = response
+
+def _etag_matches(etag):
+    # Weak comparison, as proxies that compress responses weaken ETags; no '*',
+    # which would also match resources that do not exist
+    return request.if_none_match.is_strong(etag) or request.if_none_match.is_weak(etag)
+
+def cached(name, tags=(), per_user=False, local=False, max_age=None, report_age=False):
+    """Cache a Resource method's 200 responses under the policy called name.
+
+    Goes below jwt_required/admin_required so access checks still run on hits.
+    Other statuses are returned as they are and never stored. ?max_age=0
+    forces a rebuild where the policy accepts ?max_age (see CachePolicy).
+
+    Responses carry an ETag derived from the key and the current tag generations
+    (plus the build time for time-bounded entries), a Last-Modified and an Age
+    header of when the cached copy was built. A matching If-None-Match (or,
+    without one, an If-Modified-Since no older than the copy) gets a bodyless
+    304; for entries bounded by tags alone that happens without running the
+    view or reading the entry. report_age adds the same information to dict
+    bodies as 'freshness'.
+    """
+    policy = CachePolicy(name, tags, per_user, local, max_age, report_age)
+    CACHE_POLICIES[name] = policy
+    cache_control = 'private, no-cache' if per_user else 'no-cache'
+
     def decorator(f):
         @wraps(f)
         def decorated_function(*args, **kwargs):
-            # Generate cache key
-            cache_key = f"{key_prefix}:{f.__name__}:{hash(str(args) + str(sorted(kwargs.items())))}"
-            
-            # Try to get from cache
-            if hasattr(current_app, 'cache'):
-                cached_result = current_app.cache.get(cache_key)
-                if cached_result is not None:
-                    return cached_result
-            
-            # Execute function and cache result
-            result = f(*args, **kwargs)
-            
-            if hasattr(current_app, 'cache'):
-                current_app.cache.set(cache_key, result, timeout)
-            
-            return result
+            if not hasattr(current_app, 'cache'):
+                return f(*args, **kwargs)
+            cache = current_app.cache
+
+            def build():
+                result = f(*args, **kwargs)
+                if not (isinstance(result, tuple) and len(result) == 2 and result[1] == 200):
+                    raise _Uncacheable(result)
+                return result[0]
+
+            identity = get_jwt_identity() if policy.per_user else None
+            key = policy.key(policy.audience(identity), kwargs)
+            bound = policy.max_age(identity, kwargs)
+            try:
+                version = cache.version(policy.tags(identity, kwargs)) if cache.redis_client else None
+            except Exception:
+                version = None
+
+            headers = {'Cache-Control': cache_control}
+            if version is not None and bound is None:
+                etag = hashlib.sha1(f"{key}|{version}".encode('utf-8')).hexdigest()
+                headers['ETag'] = quote_etag(etag)
+                if _etag_matches(etag):
+                    return current_app.response_class(status=304, headers=headers)
+
+            try:
+                envelope = cache._get_or_compute_envelope(
+                    key, build, policy.ttl, version, policy.local, force=bound == 0, max_age=bound
+                )
+            except _Uncacheable as e:
+                return e.response
+
+            built = envelope.get('built', envelope['expires'] - policy.ttl)
+            age = max(0, int(time.time() - built))
+            headers['Last-Modified'] = http_date(int(built))
+            headers['Age'] = str(age)
+            if version is not None and bound is not None:
+                etag = hashlib.sha1(f"{key}|{version}|{built}".encode('utf-8')).hexdigest()
+                headers['ETag'] = quote_etag(etag)
+                if _etag_matches(etag):
+                    return current_app.response_class(status=304, headers=headers)
+
+            if_modified_since = request.if_modified_since
+            if (version is not None and not request.if_none_match
+                    and if_modified_since and int(built) <= if_modified_since.timestamp()):
+                return current_app.response_class(status=304, headers=headers)
+
+            body = envelope['value']
+            if policy.report_age and isinstance(body, dict):
+                body = {**body, 'freshness': {
+                    'generated_at': datetime.utcfromtimestamp(built).isoformat() + 'Z',
+                    'age': age,
+                    'max_age': bound
+                }}
+            return body, 200, headers
         return decorated_function
     return decorator
 
-# Cache timeouts (in seconds)
-CACHE_TIMEOUTS = {
-    'dashboard': 120,      # 2 minutes
-    'quiz_list': 300,      # 5 minutes
-    'subject_list': 600,   # 10 minutes
-    'user_scores': 180,    # 3 minutes
-    'quiz_questions': 900, # 15 minutes
-    'user_profile': 300,   # 5 minutes
-}
-
 # Initialize cache instance
 cache = RedisCache()
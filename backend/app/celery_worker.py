@@ -1,6 +1,7 @@
 from celery import Celery
 from celery.schedules import crontab
 import os
+from .config import Config
 
 def make_celery(app=None):
     celery = Celery(
@@ -34,6 +35,14 @@ celery.conf.beat_schedule = {
         'task': 'app.tasks.send_daily_reminders',
         'schedule': crontab(hour=21, minute=50),
     },
+    'warm-caches': {
+        'task': 'app.tasks.warm_caches',
+        'schedule': float(Config.CACHE_WARM_INTERVAL),
+    },
+    'drain-submissions': {
+        'task': 'app.tasks.drain_submissions',
+        'schedule': Config.SUBMISSION_DRAIN_INTERVAL,
+    },
     'generate-monthly-reports': {
         'task': 'app.tasks.generate_monthly_reports',
         'schedule': crontab(hour=9, minute=0, day_of_month=1),
@@ -42,6 +51,14 @@ celery.conf.beat_schedule = {
         'task': 'app.tasks.cleanup_old_results',
         'schedule': crontab(hour=2, minute=0, day_of_week=1),
     },
+    'reconcile-rollups': {
+        'task': 'app.tasks.reconcile_rollups',
+        'schedule': crontab(hour=3, minute=30),
+    },
+    'reconcile-attempt-counters': {
+        'task': 'app.tasks.reconcile_attempt_counters',
+        'schedule': crontab(hour=3, minute=45),
+    },
 }
 
 celery.conf.update(
@@ -0,0 +1,48 @@
+import click
+
+from .database import db
+from .models import UserStats, MonthlyActivity, UserMonthlyActivity
+from .warming import WARM_FAMILIES, warm_caches
+from .submissions import drain
+from .attempts import reconcile_counters
+
+def register_commands(app):
+    """Attach maintenance commands to the `flask` CLI"""
+
+    @app.cli.command('rebuild-user-stats')
+    @click.option('--user-id', 'user_ids', type=int, multiple=True, help='Only rebuild these users (repeatable).')
+    def rebuild_user_stats(user_ids):
+        """Recompute user_stats from the scores table in one bulk statement."""
+        rows = UserStats.rebuild(user_ids or None)
+        db.session.commit()
+        click.echo(f'Rebuilt statistics for {rows} user(s)')
+
+    @app.cli.command('rebuild-monthly-activity')
+    def rebuild_monthly_activity():
+        """Recompute the site-wide and per-user monthly rollups from scores and users."""
+        months = MonthlyActivity.rebuild()
+        user_months = UserMonthlyActivity.rebuild()
+        db.session.commit()
+        click.echo(f'Rebuilt {months} month(s) and {user_months} user month(s)')
+
+    @app.cli.command('warm-caches')
+    @click.option('--family', 'families', type=click.Choice(sorted(WARM_FAMILIES)), multiple=True,
+                  help='Only warm these key families (repeatable).')
+    def warm_caches_command(families):
+        """Pre-populate the hot cache entries, e.g. after a deploy or a Redis flush."""
+        report = warm_caches(app, list(families) or app.config['CACHE_WARM_FAMILIES'])
+        for family, result in report.items():
+            click.echo(f'{family}: {result}')
+
+    @app.cli.command('drain-submissions')
+    def drain_submissions():
+        """Save every submission waiting in the write-behind queue now."""
+        click.echo(f'Queued submissions: {drain()}')
+
+    @app.cli.command('rebuild-attempt-counters')
+    def rebuild_attempt_counters():
+        """Recompute the Redis attempt counters from scores and queued submissions."""
+        report = reconcile_counters()
+        if report is None:
+            raise click.ClickException('Redis is unavailable')
+        click.echo(f"Rebuilt {report['counters']} counter(s), removed {report['removed']}")
@@ -3,13 +3,60 @@ from datetime import timedelta
 
 BASE_PATH = os.path.abspath(os.path.dirname(__file__))
 
+def database_uri():
+    uri = os.environ.get('DATABASE_URL', f"sqlite:///{os.path.join(os.path.dirname(BASE_PATH), 'instance', 'quiz_master.db')}")
+    # Hosted PostgreSQL providers still hand out the scheme SQLAlchemy 1.4+ rejects
+    if uri.startswith('postgres://'):
+        uri = 'postgresql://' + uri[len('postgres://'):]
+    return uri
+
+def engine_options(uri):
+    """SQLAlchemy engine options for the database backend in uri"""
+    if uri.startswith('sqlite'):
+        return {
+            'pool_pre_ping': True,
+            'connect_args': {'check_same_thread': False}
+        }
+
+    # Size the pool per worker process: workers * (pool_size + max_overflow)
+    # must stay below the server's max_connections.
+    options = {
+        'pool_pre_ping': True,
+        'pool_size': int(os.environ.get('DB_POOL_SIZE', '5')),
+        'max_overflow': int(os.environ.get('DB_MAX_OVERFLOW', '10')),
+        'pool_timeout': int(os.environ.get('DB_POOL_TIMEOUT', '10')),
+        'pool_recycle': int(os.environ.get('DB_POOL_RECYCLE', '1800')),
+    }
+    if uri.startswith('postgresql'):
+        statement_timeout = int(os.environ.get('DB_STATEMENT_TIMEOUT_MS', '30000'))
+        options['connect_args'] = {
+            'application_name': 'quiz_master',
+            'options': f'-c statement_timeout={statement_timeout}'
+        }
+    return options
+
 class Config:
     SECRET_KEY = os.environ.get('SECRET_KEY', 'dev-secret-key')
-    SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL', f"sqlite:///{os.path.join(os.path.dirname(BASE_PATH), 'instance', 'quiz_master.db')}")
+    SQLALCHEMY_DATABASE_URI = database_uri()
     SQLALCHEMY_TRACK_MODIFICATIONS = False
-    SQLALCHEMY_ENGINE_OPTIONS = {
-        'pool_pre_ping': True,
-        'connect_args': {'check_same_thread': False}
+    SQLALCHEMY_ENGINE_OPTIONS = engine_options(SQLALCHEMY_DATABASE_URI)
+
+    # Rows fetched per round trip when streaming exports (server-side cursor on PostgreSQL)
+    EXPORT_BATCH_SIZE = int(os.environ.get('EXPORT_BATCH_SIZE', '500'))
+    # Uploaded attempts graded, inserted and committed together by POST /api/scores/bulk
+    BULK_INGEST_BATCH_SIZE = int(os.environ.get('BULK_INGEST_BATCH_SIZE', '500'))
+
+    # SQLite performance profile, applied to every new connection in order.
+    # WAL lets readers run alongside the single writer; busy_timeout makes
+    # writers wait for the lock instead of failing with "database is locked".
+    SQLITE_PRAGMAS = {
+        'busy_timeout': int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS', '5000')),
+        'journal_mode': os.environ.get('SQLITE_JOURNAL_MODE', 'WAL'),
+        'synchronous': os.environ.get('SQLITE_SYNCHRONOUS', 'NORMAL'),
+        'cache_size': -int(os.environ.get('SQLITE_CACHE_SIZE_KB', '65536')),  # negative = KiB
+        'mmap_size': int(os.environ.get('SQLITE_MMAP_SIZE', str(256 * 1024 * 1024))),
+        'temp_store': 'MEMORY',
+        'foreign_keys': 'ON',
     }
 
     JWT_SECRET_KEY = os.environ.get('JWT_SECRET_KEY', 'jwt-secret-key')
@@ -17,8 +64,52 @@ class Config:
     JWT_REFRESH_TOKEN_EXPIRES = timedelta(days=30)
 
     REDIS_URL = os.environ.get('REDIS_URL', 'redis://localhost:6379/1')
-    CACHE_DEFAULT_TIMEOUT = 300
     CACHE_REDIS_URL = os.environ.get('CACHE_REDIS_URL', 'redis://localhost:6379/1')
+    # Redis calls give up after CACHE_SOCKET_TIMEOUT seconds; CACHE_FAILURE_THRESHOLD
+    # consecutive failures open the circuit and a small per-process store stands in
+    # (bounded by CACHE_FALLBACK_*) while Redis is pinged every CACHE_RETRY_INTERVAL seconds
+    CACHE_SOCKET_TIMEOUT = float(os.environ.get('CACHE_SOCKET_TIMEOUT', '0.5'))
+    CACHE_FAILURE_THRESHOLD = int(os.environ.get('CACHE_FAILURE_THRESHOLD', '3'))
+    CACHE_RETRY_INTERVAL = float(os.environ.get('CACHE_RETRY_INTERVAL', '5'))
+    CACHE_FALLBACK_MAX_ENTRIES = int(os.environ.get('CACHE_FALLBACK_MAX_ENTRIES', '512'))
+    CACHE_FALLBACK_TTL = int(os.environ.get('CACHE_FALLBACK_TTL', '30'))
+    # Cached values at least this many bytes of JSON are zlib-compressed
+    CACHE_COMPRESS_THRESHOLD = int(os.environ.get('CACHE_COMPRESS_THRESHOLD', '1024'))
+    # get_or_compute: how long past expiry an entry may be served while one worker
+    # rebuilds it, the rebuild lock's lifetime, how long callers with nothing to
+    # serve wait for it, and how eagerly entries are refreshed before expiry
+    CACHE_STALE_GRACE = int(os.environ.get('CACHE_STALE_GRACE', '300'))
+    CACHE_LOCK_TIMEOUT_MS = int(os.environ.get('CACHE_LOCK_TIMEOUT_MS', '10000'))
+    CACHE_LOCK_WAIT = float(os.environ.get('CACHE_LOCK_WAIT', '5'))
+    CACHE_XFETCH_BETA = float(os.environ.get('CACHE_XFETCH_BETA', '1.0'))
+    # Per-process tier in front of Redis; 0 entries disables it
+    CACHE_LOCAL_MAX_ENTRIES = int(os.environ.get('CACHE_LOCAL_MAX_ENTRIES', '1024'))
+    CACHE_LOCAL_TTL = float(os.environ.get('CACHE_LOCAL_TTL', '5'))
+    CACHE_INVALIDATION_CHANNEL = os.environ.get('CACHE_INVALIDATION_CHANNEL', 'cache:invalidate')
+    # The warm-caches beat job runs every CACHE_WARM_INTERVAL seconds over these key
+    # families (see app/warming.py), rebuilding entries that would expire before its next run
+    CACHE_WARM_INTERVAL = int(os.environ.get('CACHE_WARM_INTERVAL', '300'))
+    CACHE_WARM_FAMILIES = [
+        family.strip() for family in
+        os.environ.get('CACHE_WARM_FAMILIES', 'catalog,quiz_attempts,admin_dashboard').split(',')
+        if family.strip()
+    ]
+
+    # Write-behind submissions: submitting an attempt grades it in memory, queues the score in
+    # Redis and answers 202 with a receipt; the drain-submissions job saves the queue
+    # every SUBMISSION_DRAIN_INTERVAL seconds, SUBMISSION_BATCH_SIZE rows per transaction
+    ASYNC_SUBMISSIONS = os.environ.get('ASYNC_SUBMISSIONS', 'False').lower() == 'true'
+    SUBMISSION_DRAIN_INTERVAL = float(os.environ.get('SUBMISSION_DRAIN_INTERVAL', '2'))
+    SUBMISSION_BATCH_SIZE = int(os.environ.get('SUBMISSION_BATCH_SIZE', '500'))
+    SUBMISSION_RECEIPT_TTL = int(os.environ.get('SUBMISSION_RECEIPT_TTL', '86400'))
+
+    # Redis attempt counters (app/attempts.py) idle out after this many seconds and are
+    # then re-seeded from scores; the reconcile-attempt-counters job rebuilds them nightly
+    ATTEMPT_COUNTER_TTL = int(os.environ.get('ATTEMPT_COUNTER_TTL', str(7 * 24 * 3600)))
+
+    # Attempt sessions (app/attempt_sessions.py) keep taking autosaves for this many
+    # seconds past the quiz's duration, to absorb client clock and network delays
+    ATTEMPT_SESSION_GRACE = int(os.environ.get('ATTEMPT_SESSION_GRACE', '30'))
 
     CELERY_BROKER_URL = os.environ.get('CELERY_BROKER_URL', 'redis://localhost:6379/0')
     CELERY_RESULT_BACKEND = os.environ.get('CELERY_RESULT_BACKEND', 'redis://localhost:6379/0')
@@ -32,6 +123,10 @@ class Config:
 
     GOOGLE_CHAT_WEBHOOK = os.environ.get('GOOGLE_CHAT_WEBHOOK', '')
 
+    # Apply pending schema migrations on startup, under a cross-process lock; disable to
+    # run `flask db upgrade` manually (the default in production, as a deploy step)
+    AUTO_MIGRATE = os.environ.get('AUTO_MIGRATE', 'True').lower() == 'true'
+
     CREATE_DEFAULT_DATA = os.environ.get('CREATE_DEFAULT_DATA', 'True').lower() == 'true'
     DEBUG = os.environ.get('DEBUG', 'True').lower() == 'true'
     SQLALCHEMY_ECHO = False
@@ -41,6 +136,7 @@ class DevelopmentConfig(Config):
 
 class ProductionConfig(Config):
     DEBUG = False
+    AUTO_MIGRATE = os.environ.get('AUTO_MIGRATE', 'False').lower() == 'true'
 
 config_dict = {
     'development': DevelopmentConfig,
@@ -1,2 +1,140 @@
+import os
+import threading
+from contextlib import contextmanager
+from alembic.runtime.migration import MigrationContext
+from alembic.script import ScriptDirectory
 from flask_sqlalchemy import SQLAlchemy
-db = SQLAlchemy()
\ No newline at end of file
+from flask_migrate import Migrate, upgrade, stamp
+from sqlalchemy import event, inspect, text
+from werkzeug.exceptions import ServiceUnavailable
+
+db = SQLAlchemy()
+migrate = Migrate()
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'migrations')
+BASELINE_REVISION = '0001_baseline'
+# pg_advisory_lock key held by startup_lock(), shared by every process of the app
+MIGRATION_LOCK_ID = 5_240_517
+
+try:
+    import fcntl
+except ImportError:  # Windows: SQLite migrations run unlocked
+    fcntl = None
+
+# Per-process connection pool counters, updated by pool events
+pool_metrics = {
+    'connects': 0,
+    'checkouts': 0,
+    'connect_failures': 0,
+    'invalidations': 0,
+    'peak_checked_out': 0,
+    'peak_overflow': 0,
+}
+_metrics_lock = threading.Lock()
+
+class DatabaseBusy(ServiceUnavailable):
+    """Raised instead of SQLite's 'database is locked' so clients get a retryable 503"""
+    description = 'The database is busy. Please retry shortly.'
+
+def configure_engine(app):
+    """Install per-connection setup and error translation on the app's engine"""
+    engine = db.engine
+    _track_pool(engine)
+    if engine.dialect.name != 'sqlite':
+        return
+
+    pragmas = app.config.get('SQLITE_PRAGMAS', {'foreign_keys': 'ON'})
+
+    @event.listens_for(engine, 'connect')
+    def set_sqlite_pragma(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+
+    @event.listens_for(engine, 'handle_error')
+    def translate_locked_error(context):
+        if 'database is locked' in str(context.original_exception):
+            return DatabaseBusy(retry_after=1)
+
+def _track_pool(engine):
+    @event.listens_for(engine, 'connect')
+    def count_connect(dbapi_connection, connection_record):
+        with _metrics_lock:
+            pool_metrics['connects'] += 1
+
+    @event.listens_for(engine, 'checkout')
+    def count_checkout(dbapi_connection, connection_record, connection_proxy):
+        checked_out = getattr(engine.pool, 'checkedout', lambda: 0)()
+        overflow = getattr(engine.pool, 'overflow', lambda: 0)()
+        with _metrics_lock:
+            pool_metrics['checkouts'] += 1
+            pool_metrics['peak_checked_out'] = max(pool_metrics['peak_checked_out'], checked_out)
+            pool_metrics['peak_overflow'] = max(pool_metrics['peak_overflow'], overflow)
+
+    @event.listens_for(engine, 'invalidate')
+    def count_invalidate(dbapi_connection, connection_record, exception):
+        with _metrics_lock:
+            pool_metrics['invalidations'] += 1
+
+    @event.listens_for(engine, 'handle_error')
+    def count_connect_failure(context):
+        if context.is_pre_ping or context.connection is None:
+            with _metrics_lock:
+                pool_metrics['connect_failures'] += 1
+
+def pool_status():
+    """Current pool occupancy plus cumulative counters for this process"""
+    pool = db.engine.pool
+    status = {'pool_class': type(pool).__name__}
+    for name in ('size', 'checkedin', 'checkedout', 'overflow'):
+        method = getattr(pool, name, None)
+        if method:
+            status[name] = method()
+    if hasattr(pool, '_max_overflow'):
+        status['max_overflow'] = pool._max_overflow
+    with _metrics_lock:
+        status.update(pool_metrics)
+    return status
+
+def upgrade_database():
+    """Apply pending migrations, adopting databases created by db.create_all().
+
+    Call it under startup_lock(): a schema another process already brought to
+    head then costs one version query.
+    """
+    if _schema_is_current():
+        return
+    tables = inspect(db.engine).get_table_names()
+    if 'users' in tables and 'alembic_version' not in tables:
+        # Pre-migration database: its tables match the baseline revision
+        stamp(directory=MIGRATIONS_DIR, revision=BASELINE_REVISION)
+    upgrade(directory=MIGRATIONS_DIR)
+
+def _schema_is_current():
+    heads = set(ScriptDirectory(MIGRATIONS_DIR).get_heads())
+    with db.engine.connect() as connection:
+        return set(MigrationContext.configure(connection).get_current_heads()) == heads
+
+@contextmanager
+def startup_lock():
+    """Serialize migrating and seeding across every process that builds an app
+    (web workers, Celery tasks): a PostgreSQL advisory lock, or an flock next
+    to a SQLite database file"""
+    engine = db.engine
+    if engine.dialect.name == 'postgresql':
+        with engine.connect() as connection:
+            connection.execute(text('SELECT pg_advisory_lock(:id)'), {'id': MIGRATION_LOCK_ID})
+            try:
+                yield
+            finally:
+                connection.execute(text('SELECT pg_advisory_unlock(:id)'), {'id': MIGRATION_LOCK_ID})
+    elif engine.dialect.name == 'sqlite' and fcntl and engine.url.database not in (None, '', ':memory:'):
+        with open(engine.url.database + '.migrate.lock', 'w') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+    else:
+        yield
@@ -1,4 +1,5 @@
 from .models import db, User, Role, Subject, Chapter, Quiz, Question, Score
+from .models.stats import record_score, record_registration
 from datetime import date
 import logging
 
@@ -23,6 +24,8 @@ def create_default_data():
             if user_role:
                 dummy_user.roles.append(user_role)
             db.session.add(dummy_user)
+            db.session.flush()
+            record_registration(dummy_user)
             db.session.commit()
 
         if not Subject.query.filter_by(name='Computer Science').first():
@@ -78,6 +81,8 @@ def create_default_data():
                     quiz_id=quiz.id
                 )
                 db.session.add(question)
+            db.session.flush()
+            quiz.refresh_total_marks()
             db.session.commit()
 
         dummy_user = User.query.filter_by(username='dummy').first()
@@ -87,9 +92,13 @@ def create_default_data():
                 quiz_id=quiz.id,
                 total_scored=75,
                 total_questions=4,
-                time_taken="15:30"
+                time_taken="15:30",
+                max_marks=quiz.total_marks,
+                percentage=Score.calculate_percentage(75, quiz.total_marks)
             )
             db.session.add(sample_score)
+            db.session.flush()
+            record_score(sample_score)
             db.session.commit()
 
         additional_subjects = [
@@ -0,0 +1,136 @@
+from array import array
+from flask import current_app
+
+from .cache import LocalCache, MISSING
+from .database import db
+from .models import Question
+
+try:
+    import numpy as np
+except ImportError:  # optional; batches are then graded one submission at a time
+    np = None
+
+VALID_OPTIONS = frozenset((1, 2, 3, 4))
+# Marks are stored in an unsigned 16-bit array
+MAX_QUESTION_MARKS = 0xFFFF
+
+class InvalidAnswer(ValueError):
+    def __init__(self, question_id, answer):
+        super().__init__(f'Invalid answer option {answer} for question {question_id}. Must be 1, 2, 3, or 4.')
+        self.question_id = question_id
+        self.answer = answer
+
+class AnswerKey:
+    """Compact answer key of one quiz, in question id order.
+
+    correct and marks are parallel arrays and index maps each question id, as
+    the string used for it in submitted answers, to its position. Grading a
+    submission touches only these, never ORM rows.
+    """
+    __slots__ = ('quiz_id', 'question_ids', 'correct', 'marks', 'index', 'max_marks')
+
+    def __init__(self, quiz_id, rows):
+        self.quiz_id = quiz_id
+        self.question_ids = array('L', (row[0] for row in rows))
+        self.correct = array('b', (row[1] for row in rows))
+        self.marks = array('H', (row[2] or 0 for row in rows))
+        self.index = {str(question_id): i for i, question_id in enumerate(self.question_ids)}
+        self.max_marks = sum(self.marks)
+
+    @classmethod
+    def load(cls, quiz_id):
+        rows = db.session.query(Question.id, Question.correct_option, Question.marks)\
+            .filter(Question.quiz_id == quiz_id).order_by(Question.id).all()
+        return cls(quiz_id, rows)
+
+    def __len__(self):
+        return len(self.question_ids)
+
+    def positions(self, answers):
+        """(position, option) of each answer ({question id string: option}).
+
+        Answers to questions outside the quiz and null answers are skipped. An
+        answer that is not one of the four options raises InvalidAnswer; with
+        several, the one for the earliest question is reported.
+        """
+        index = self.index
+        valid = []
+        invalid = None
+        for question_id, answer in answers.items():
+            i = index.get(question_id)
+            if i is None or answer is None:
+                continue
+            try:
+                ok = answer in VALID_OPTIONS
+            except TypeError:  # unhashable, e.g. a list
+                ok = False
+            if ok:
+                valid.append((i, answer))
+            elif invalid is None or i < invalid[0]:
+                invalid = (i, answer)
+        if invalid is not None:
+            raise InvalidAnswer(self.question_ids[invalid[0]], invalid[1])
+        return valid
+
+    def grade(self, answers):
+        """Total marks scored by one submission's answers"""
+        correct = self.correct
+        marks = self.marks
+        return sum(marks[i] for i, answer in self.positions(answers) if answer == correct[i])
+
+    def grade_many(self, submissions):
+        """Grade a batch of answer dicts at once.
+
+        Returns one total per submission, or the InvalidAnswer it would raise.
+        With NumPy the valid submissions become one matrix of chosen options
+        (0 = unanswered), compared against the key and multiplied by the marks.
+        """
+        if np is None:
+            results = []
+            for answers in submissions:
+                try:
+                    results.append(self.grade(answers))
+                except InvalidAnswer as e:
+                    results.append(e)
+            return results
+
+        results = [None] * len(submissions)
+        rows, columns, options = [], [], []
+        for row, answers in enumerate(submissions):
+            try:
+                positions = self.positions(answers)
+            except InvalidAnswer as e:
+                results[row] = e
+                continue
+            for i, answer in positions:
+                rows.append(row)
+                columns.append(i)
+                options.append(answer)
+        matrix = np.zeros((len(submissions), len(self)), dtype=np.int8)
+        matrix[rows, columns] = options
+
+        correct = np.frombuffer(self.correct, dtype=np.int8)
+        marks = np.frombuffer(self.marks, dtype=np.uint16).astype(np.int64)
+        totals = (matrix == correct).astype(np.int64) @ marks
+        return [int(total) if result is None else result for result, total in zip(results, totals)]
+
+# Keys are kept per process and tagged with the generation of their quiz's
+# questions, which Question.cache_tags bumps on any insert, update or delete
+_answer_keys = LocalCache(max_entries=512, ttl=3600)
+
+def answer_key(quiz_id):
+    """The current AnswerKey of a quiz, rebuilt after its questions change"""
+    cache = getattr(current_app, 'cache', None)
+    try:
+        version = cache.version([f'Question:quiz:{quiz_id}']) if cache and cache.redis_client else None
+    except Exception:
+        version = None
+    if version is None:
+        return AnswerKey.load(quiz_id)
+
+    cached = _answer_keys.get(quiz_id)
+    if cached is not MISSING and cached[0] == version:
+        return cached[1]
+    key = AnswerKey.load(quiz_id)
+    _answer_keys.set(quiz_id, (version, key))
+    return key
@@ -5,8 +5,10 @@ from .chapter import Chapter
 from .quiz import Quiz
 from .question import Question
 from .score import Score
+from .stats import UserStats, MonthlyActivity, UserMonthlyActivity
 
 __all__ = [
     'db', 'User', 'Role', 'UserRole', 'Subject', 'Chapter', 
-    'Quiz', 'Question', 'Score'
+    'Quiz', 'Question', 'Score', 'UserStats',
+    'MonthlyActivity', 'UserMonthlyActivity'
 ]
\ No newline at end of file
@@ -6,4 +6,9 @@ class BaseModel(db.Model):
     
     id = db.Column(db.Integer, primary_key=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
\ No newline at end of file
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def cache_tags(self):
+        """Cache tags to invalidate when this row is inserted, updated or deleted"""
+        name = type(self).__name__
+        return [name, f'{name}:{self.id}']
@@ -14,11 +14,15 @@ class Chapter(BaseModel):
     # backref uses one way and back_populates uses two way.
     
     # Unique constraint for chapter name within a subject
-    __table_args__ = (db.UniqueConstraint('name', 'subject_id'),)
+    __table_args__ = (
+        db.UniqueConstraint('name', 'subject_id'),
+        db.Index('ix_chapters_subject_id', 'subject_id'),
+    )
     
-    def convert_to_json(self):
-        from . import Quiz  # Import here to avoid circular imports
-        quiz_count = db.session.query(Quiz).filter_by(chapter_id=self.id).count()
+    def convert_to_json(self, quiz_count=None):
+        if quiz_count is None:
+            from . import Quiz  # Import here to avoid circular imports
+            quiz_count = db.session.query(Quiz).filter_by(chapter_id=self.id).count()
         return {
             'id': self.id,
             'name': self.name,
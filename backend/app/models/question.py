@@ -1,3 +1,4 @@
+from sqlalchemy import inspect
 from .base import BaseModel, db
 
 class Question(BaseModel):
@@ -11,6 +12,13 @@ class Question(BaseModel):
     option4 = db.Column(db.String(500))
     correct_option = db.Column(db.Integer, nullable=False)  # 1, 2, 3, or 4
     marks = db.Column(db.Integer, default=1)
+
+    __table_args__ = (db.Index('ix_questions_quiz_id', 'quiz_id'),)
+
+    def cache_tags(self):
+        # Answer keys are per quiz, including the quiz a question was moved out of
+        quiz_ids = {self.quiz_id, *inspect(self).attrs.quiz_id.history.deleted}
+        return super().cache_tags() + [f'Question:quiz:{quiz_id}' for quiz_id in sorted(quiz_ids) if quiz_id]
     
     def convert_to_json(self):
         return {
@@ -1,5 +1,6 @@
 from .base import BaseModel, db
 from datetime import datetime
+from sqlalchemy import func
 
 class Quiz(BaseModel):
     __tablename__ = 'quizzes'
@@ -10,12 +11,21 @@ class Quiz(BaseModel):
     remarks = db.Column(db.Text)
     title = db.Column(db.String(200), nullable=False)
     is_active = db.Column(db.Boolean, default=True)
+    total_marks = db.Column(db.Integer, nullable=False, default=0)  # Sum of question marks, kept in sync by QuestionApi
+    max_attempts = db.Column(db.Integer, nullable=False, default=5)  # Attempts allowed per user
     
     # Relationships
     questions = db.relationship('Question', backref='quiz', lazy='dynamic', cascade='all, delete-orphan')
     scores = db.relationship('Score', backref='quiz', lazy='dynamic', cascade='all, delete-orphan')
+
+    __table_args__ = (
+        db.Index('ix_quizzes_chapter_active', 'chapter_id', 'is_active'),
+        db.Index('ix_quizzes_is_active', 'is_active'),
+    )
     
-    def convert_to_json(self):
+    def convert_to_json(self, question_count=None):
+        if question_count is None:
+            question_count = self.questions.count()
         return {
             'id': self.id,
             'title': self.title,
@@ -27,10 +37,20 @@ class Quiz(BaseModel):
             'time_duration': self.time_duration,
             'remarks': self.remarks,
             'is_active': self.is_active,
-            'question_count': self.questions.count(),
+            'question_count': question_count,
+            'total_marks': self.total_marks or 0,
+            'max_attempts': self.max_attempts,
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'updated_at': self.updated_at.isoformat() if self.updated_at else None
         }
     
+    def refresh_total_marks(self):
+        """Recompute the stored total marks from this quiz's questions"""
+        from .question import Question
+        self.total_marks = db.session.query(
+            func.coalesce(func.sum(Question.marks), 0)
+        ).filter(Question.quiz_id == self.id).scalar()
+        return self.total_marks
+
     def __repr__(self):
         return f'<Quiz {self.title}>'
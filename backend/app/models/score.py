@@ -10,20 +10,33 @@ class Score(BaseModel):
     total_scored = db.Column(db.Integer, nullable=False, default=0)
     total_questions = db.Column(db.Integer, nullable=False)
     time_taken = db.Column(db.String(8))  # Actual time taken to complete in HH:MM:SS format
+    max_marks = db.Column(db.Integer, nullable=False, default=0)  # Quiz total marks at submit time
+    percentage = db.Column(db.Float, nullable=False, default=0)  # Snapshot of total_scored / max_marks
+    receipt = db.Column(db.String(32))  # Set on attempts saved from the write-behind queue
     
     # Unique constraint to prevent multiple attempts (if needed)
     # __table_args__ = (db.UniqueConstraint('quiz_id', 'user_id'),)
+
+    # Indexes for the attempt-limit check, per-user history and monthly trends
+    __table_args__ = (
+        db.Index('ix_scores_user_quiz', 'user_id', 'quiz_id'),
+        db.Index('ix_scores_user_attempted', 'user_id', 'time_stamp_of_attempt'),
+        db.Index('ix_scores_attempted', 'time_stamp_of_attempt'),
+        db.Index('ix_scores_quiz_id', 'quiz_id'),
+        db.Index('ix_scores_receipt', 'receipt', unique=True),
+    )
+
+    @staticmethod
+    def calculate_percentage(total_scored, max_marks):
+        """Percentage of max_marks scored, rounded to 2 decimals"""
+        if not max_marks:
+            return 0
+        return round(total_scored / max_marks * 100, 2)
     
-    def convert_to_json(self):
-        # Calculate percentage based on actual total possible marks
-        percentage = 0
-        if self.quiz and self.total_questions > 0:
-            from sqlalchemy import func
-            from .question import Question
-            total_possible_marks = db.session.query(func.sum(Question.marks)).filter_by(quiz_id=self.quiz_id).scalar() or 0
-            if total_possible_marks > 0:
-                percentage = round((self.total_scored / total_possible_marks * 100), 2)
+    def cache_tags(self):
+        return super().cache_tags() + [f'Score:user:{self.user_id}', f'Score:quiz:{self.quiz_id}']
 
+    def convert_to_json(self):
         return {
             'id': self.id,
             'quiz_id': self.quiz_id,
@@ -33,11 +46,12 @@ class Score(BaseModel):
             'time_stamp_of_attempt': self.time_stamp_of_attempt.isoformat() if self.time_stamp_of_attempt else None,
             'total_scored': self.total_scored,
             'total_questions': self.total_questions,
-            'percentage': percentage,
+            'max_marks': self.max_marks or 0,
+            'percentage': self.percentage or 0,
             'time_taken': self.time_taken,
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'updated_at': self.updated_at.isoformat() if self.updated_at else None
         }
     
     def __repr__(self):
-        return f'<Score User:{self.user_id} Quiz:{self.quiz_id} Score:{self.total_scored}>'
\ No newline at end of file
+        return f'<Score User:{self.user_id} Quiz:{self.quiz_id} Score:{self.total_scored}>'
@@ -0,0 +1,288 @@
+from .base import BaseModel, db
+from datetime import date
+from sqlalchemy import case, func
+from sqlalchemy.exc import IntegrityError
+
+def month_of(when):
+    """First day of the month containing `when`, the key of the monthly rollups"""
+    return date(when.year, when.month, 1)
+
+def _increment(model, key, **deltas):
+    """Add deltas to the rollup row identified by key, creating it on first use"""
+    updated = db.session.query(model).filter_by(**key).update(
+        {getattr(model, name): getattr(model, name) + delta for name, delta in deltas.items()},
+        synchronize_session=False
+    )
+    if updated:
+        return
+    try:
+        # A concurrent writer may create the same row first
+        with db.session.begin_nested():
+            db.session.add(model(**key, **deltas))
+    except IntegrityError:
+        _increment(model, key, **deltas)
+
+class UserStats(BaseModel):
+    """Running totals over a user's scores, updated in the same transaction as each submission"""
+    __tablename__ = 'user_stats'
+
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, unique=True)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    graded_attempts = db.Column(db.Integer, nullable=False, default=0)  # attempts on quizzes with marks
+    total_scored_sum = db.Column(db.Integer, nullable=False, default=0)
+    percentage_sum = db.Column(db.Float, nullable=False, default=0)
+    best_percentage = db.Column(db.Float, nullable=False, default=0)
+    last_attempt_at = db.Column(db.DateTime)
+
+    @property
+    def average_score(self):
+        return self.total_scored_sum / self.attempts if self.attempts else 0
+
+    @property
+    def average_percentage(self):
+        return self.percentage_sum / self.graded_attempts if self.graded_attempts else 0
+
+    @classmethod
+    def record_attempt(cls, score):
+        """Fold a new score into its user's totals without reading the row first"""
+        cls.record_attempts(score.user_id, [score])
+
+    @classmethod
+    def record_attempts(cls, user_id, scores):
+        """Fold new scores of one user (objects or dicts with Score's columns) into
+        their totals with a single UPDATE, or an insert on their first attempt"""
+        def field(score, name):
+            return score[name] if isinstance(score, dict) else getattr(score, name)
+
+        attempts = len(scores)
+        graded = [field(score, 'percentage') for score in scores if field(score, 'max_marks')]
+        total_scored = sum(field(score, 'total_scored') for score in scores)
+        percentage_sum = sum(graded)
+        best = max(graded, default=0)
+        last = max(field(score, 'time_stamp_of_attempt') for score in scores)
+
+        updated = db.session.query(cls).filter(cls.user_id == user_id).update({
+            cls.attempts: cls.attempts + attempts,
+            cls.graded_attempts: cls.graded_attempts + len(graded),
+            cls.total_scored_sum: cls.total_scored_sum + total_scored,
+            cls.percentage_sum: cls.percentage_sum + percentage_sum,
+            cls.best_percentage: case((cls.best_percentage < best, best), else_=cls.best_percentage),
+            cls.last_attempt_at: case(
+                (db.or_(cls.last_attempt_at.is_(None), cls.last_attempt_at < last), last),
+                else_=cls.last_attempt_at
+            )
+        }, synchronize_session=False)
+        if updated:
+            return
+
+        try:
+            # First attempt for this user; a concurrent first attempt may win the insert
+            with db.session.begin_nested():
+                db.session.add(cls(
+                    user_id=user_id,
+                    attempts=attempts,
+                    graded_attempts=len(graded),
+                    total_scored_sum=total_scored,
+                    percentage_sum=percentage_sum,
+                    best_percentage=best,
+                    last_attempt_at=last
+                ))
+        except IntegrityError:
+            cls.record_attempts(user_id, scores)
+
+    @classmethod
+    def aggregate_query(cls, user_ids=None):
+        """SELECT producing user_stats rows from the scores table"""
+        from .score import Score
+        graded = Score.max_marks > 0
+        query = db.select(
+            Score.user_id,
+            func.count(Score.id),
+            func.sum(case((graded, 1), else_=0)),
+            func.sum(Score.total_scored),
+            func.sum(case((graded, Score.percentage), else_=0)),
+            func.max(case((graded, Score.percentage), else_=0)),
+            func.max(Score.time_stamp_of_attempt),
+            func.now(),
+            func.now()
+        ).group_by(Score.user_id)
+        if user_ids is not None:
+            query = query.where(Score.user_id.in_(user_ids))
+        return query
+
+    @classmethod
+    def rebuild(cls, user_ids=None):
+        """Recompute stats from scores in bulk, for everyone or just user_ids"""
+        delete = db.delete(cls)
+        if user_ids is not None:
+            user_ids = list(user_ids)
+            if not user_ids:
+                return 0
+            delete = delete.where(cls.user_id.in_(user_ids))
+        db.session.execute(delete)
+        columns = ['user_id', 'attempts', 'graded_attempts', 'total_scored_sum', 'percentage_sum',
+                   'best_percentage', 'last_attempt_at', 'created_at', 'updated_at']
+        result = db.session.execute(db.insert(cls).from_select(columns, cls.aggregate_query(user_ids)))
+        return result.rowcount
+
+    def convert_to_json(self):
+        return {
+            'user_id': self.user_id,
+            'attempts': self.attempts,
+            'average_score': round(self.average_score, 2),
+            'average_percentage': round(self.average_percentage, 2),
+            'best_percentage': round(self.best_percentage or 0, 2),
+            'last_attempt_at': self.last_attempt_at.isoformat() if self.last_attempt_at else None
+        }
+
+    def __repr__(self):
+        return f'<UserStats User:{self.user_id} Attempts:{self.attempts}>'
+
+class MonthlyActivity(BaseModel):
+    """Site-wide attempts and registrations per calendar month"""
+    __tablename__ = 'monthly_activity'
+
+    month = db.Column(db.Date, nullable=False, unique=True)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    registrations = db.Column(db.Integer, nullable=False, default=0)
+
+    @classmethod
+    def series(cls, months):
+        """Rows from months[0] onwards keyed by month, in one range scan"""
+        rows = cls.query.filter(cls.month >= month_of(months[0])).all()
+        return {row.month: row for row in rows}
+
+    @classmethod
+    def rebuild(cls):
+        """Recompute every month from scores and users"""
+        from .score import Score
+        from .user import User
+        from ..aggregates import month_start
+        def counts(column, *filters):
+            bucket = month_start(column)
+            rows = db.session.query(bucket, func.count()).filter(*filters).group_by(bucket).all()
+            return {month_of(month): count for month, count in rows}
+
+        attempts = counts(Score.time_stamp_of_attempt)
+        registrations = counts(User.created_at, User.created_at.isnot(None))
+        db.session.execute(db.delete(cls))
+        months = set(attempts) | set(registrations)
+        db.session.add_all(cls(
+            month=month,
+            attempts=attempts.get(month, 0),
+            registrations=registrations.get(month, 0)
+        ) for month in months)
+        return len(months)
+
+    def __repr__(self):
+        return f'<MonthlyActivity {self.month:%Y-%m} Attempts:{self.attempts} Registrations:{self.registrations}>'
+
+class UserMonthlyActivity(BaseModel):
+    """Attempts per user per calendar month"""
+    __tablename__ = 'user_monthly_activity'
+
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    month = db.Column(db.Date, nullable=False)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'month', name='uq_user_monthly_activity'),
+    )
+
+    @classmethod
+    def series(cls, user_id, months):
+        """A user's rows from months[0] onwards keyed by month, in one index range scan"""
+        rows = cls.query.filter(cls.user_id == user_id, cls.month >= month_of(months[0])).all()
+        return {row.month: row for row in rows}
+
+    @classmethod
+    def rebuild(cls, user_ids=None):
+        """Recompute per-user months from scores, for everyone or just user_ids"""
+        from .score import Score
+        from ..aggregates import month_start
+        bucket = month_start(Score.time_stamp_of_attempt)
+        query = db.session.query(Score.user_id, bucket, func.count(Score.id)).group_by(Score.user_id, bucket)
+        delete = db.delete(cls)
+        if user_ids is not None:
+            user_ids = list(user_ids)
+            if not user_ids:
+                return 0
+            query = query.filter(Score.user_id.in_(user_ids))
+            delete = delete.where(cls.user_id.in_(user_ids))
+        rows = query.all()
+        db.session.execute(delete)
+        db.session.add_all(cls(user_id=user_id, month=month_of(month), attempts=count)
+                           for user_id, month, count in rows)
+        return len(rows)
+
+    def __repr__(self):
+        return f'<UserMonthlyActivity User:{self.user_id} {self.month:%Y-%m} Attempts:{self.attempts}>'
+
+def record_score(score):
+    """Fold a flushed score into every rollup, inside the caller's transaction"""
+    UserStats.record_attempt(score)
+    month = month_of(score.time_stamp_of_attempt)
+    _increment(MonthlyActivity, {'month': month}, attempts=1)
+    _increment(UserMonthlyActivity, {'user_id': score.user_id, 'month': month}, attempts=1)
+
+def record_scores(rows):
+    """Fold scores inserted in bulk (dicts with Score's columns) into every rollup,
+    with one statement per user and per (user, month) rather than per score"""
+    per_user = {}
+    per_user_month = {}
+    for row in rows:
+        per_user.setdefault(row['user_id'], []).append(row)
+        key = (row['user_id'], month_of(row['time_stamp_of_attempt']))
+        per_user_month[key] = per_user_month.get(key, 0) + 1
+
+    for user_id, scores in per_user.items():
+        UserStats.record_attempts(user_id, scores)
+
+    per_month = {}
+    for (user_id, month), count in per_user_month.items():
+        _increment(UserMonthlyActivity, {'user_id': user_id, 'month': month}, attempts=count)
+        per_month[month] = per_month.get(month, 0) + count
+    for month, count in per_month.items():
+        _increment(MonthlyActivity, {'month': month}, attempts=count)
+
+def record_registration(user):
+    """Count a flushed user towards its registration month"""
+    _increment(MonthlyActivity, {'month': month_of(user.created_at)}, registrations=1)
+
+def forget_scores(quiz_ids):
+    """Take the scores of the given quizzes (a list or a select of ids) out of the monthly
+    rollups before they are deleted; returns the affected user ids, whose UserStats must be
+    rebuilt once the scores are gone"""
+    from .score import Score
+    from ..aggregates import month_start
+    bucket = month_start(Score.time_stamp_of_attempt)
+    rows = db.session.query(Score.user_id, bucket, func.count(Score.id))\
+        .filter(Score.quiz_id.in_(quiz_ids)).group_by(Score.user_id, bucket).all()
+
+    per_month = {}
+    for user_id, month, count in rows:
+        month = month_of(month)
+        _increment(UserMonthlyActivity, {'user_id': user_id, 'month': month}, attempts=-count)
+        per_month[month] = per_month.get(month, 0) + count
+    for month, count in per_month.items():
+        _increment(MonthlyActivity, {'month': month}, attempts=-count)
+
+    # Emptied months would otherwise keep referencing users that are later deleted
+    user_ids = {user_id for user_id, _, _ in rows}
+    if user_ids:
+        db.session.execute(db.delete(UserMonthlyActivity).where(
+            UserMonthlyActivity.user_id.in_(user_ids), UserMonthlyActivity.attempts <= 0))
+    return user_ids
+
+def forget_user(user_id):
+    """Drop a user's rollup rows so the user itself can be deleted"""
+    db.session.execute(db.delete(UserStats).where(UserStats.user_id == user_id))
+    db.session.execute(db.delete(UserMonthlyActivity).where(UserMonthlyActivity.user_id == user_id))
+
+def rebuild_rollups():
+    """Recompute every rollup table from scores and users"""
+    return {
+        'user_stats': UserStats.rebuild(),
+        'user_monthly_activity': UserMonthlyActivity.rebuild(),
+        'monthly_activity': MonthlyActivity.rebuild()
+    }
@@ -9,9 +9,10 @@ class Subject(BaseModel):
     # Relationships
     chapters = db.relationship('Chapter', backref='subject', lazy='dynamic', cascade='all, delete-orphan')
     
-    def convert_to_json(self):
-        from . import Chapter  # Import here to avoid circular imports
-        chapter_count = db.session.query(Chapter).filter_by(subject_id=self.id).count()
+    def convert_to_json(self, chapter_count=None):
+        if chapter_count is None:
+            from . import Chapter  # Import here to avoid circular imports
+            chapter_count = db.session.query(Chapter).filter_by(subject_id=self.id).count()
         return {
             'id': self.id,
             'name': self.name,
@@ -7,6 +7,10 @@ class UserRole(BaseModel):
     role_id = db.Column(db.Integer, db.ForeignKey('roles.id'))
     __table_args__ = (db.UniqueConstraint('user_id', 'role_id'),)
 
+    def cache_tags(self):
+        # Role membership is part of the user
+        return ['User', f'User:{self.user_id}']
+
 class Role(BaseModel):
     __tablename__ = 'roles'
     name = db.Column(db.String(80), unique=True, nullable=False)
@@ -35,6 +39,8 @@ class User(BaseModel):
     # Relationships
     roles = db.relationship('Role', secondary='user_roles', backref=db.backref('users', lazy='dynamic'))
     scores = db.relationship('Score', backref='user', lazy='dynamic')
+
+    __table_args__ = (db.Index('ix_users_created_at', 'created_at'),)
     
     def set_password(self, password):
         self.password_hash = generate_password_hash(password)
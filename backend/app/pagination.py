@@ -0,0 +1,90 @@
+import base64
+import json
+from datetime import datetime
+from flask import request
+from sqlalchemy import or_, and_
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+class InvalidPageRequest(ValueError):
+    pass
+
+class Keyset:
+    """Ordered sort key for cursor pagination.
+
+    Each part is (column, serialized field name, parser for the cursor value).
+    The last part must be unique (normally the primary key) so pages never
+    overlap or skip rows.
+    """
+    def __init__(self, *parts, descending=False):
+        self.parts = parts
+        self.descending = descending
+
+    def order_by(self):
+        return [column.desc() if self.descending else column.asc() for column, _, _ in self.parts]
+
+    def after(self, values):
+        """WHERE clause selecting rows strictly after the cursor position"""
+        clauses = []
+        for index, (column, _, _) in enumerate(self.parts):
+            equal_prefix = [self.parts[i][0] == values[i] for i in range(index)]
+            beyond = column < values[index] if self.descending else column > values[index]
+            clauses.append(and_(*equal_prefix, beyond))
+        return or_(*clauses)
+
+    def encode(self, item):
+        values = [item[field] for _, field, _ in self.parts]
+        return base64.urlsafe_b64encode(json.dumps(values).encode()).decode().rstrip('=')
+
+    def decode(self, cursor):
+        try:
+            padded = cursor + '=' * (-len(cursor) % 4)
+            values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+            if len(values) != len(self.parts):
+                raise ValueError('cursor length mismatch')
+            return [parse(value) for (_, _, parse), value in zip(self.parts, values)]
+        except (ValueError, TypeError):
+            raise InvalidPageRequest('Invalid cursor')
+
+def by_id(model):
+    """Oldest first by primary key"""
+    return Keyset((model.id, 'id', int))
+
+def by_newest(model, timestamp):
+    """Newest first by a timestamp column, primary key breaking ties"""
+    return Keyset((timestamp, timestamp.key, datetime.fromisoformat), (model.id, 'id', int), descending=True)
+
+def page_args():
+    """(limit, cursor) from the query string; the first page of DEFAULT_PAGE_SIZE items by default"""
+    limit = request.args.get('limit')
+    cursor = request.args.get('cursor')
+    try:
+        limit = int(limit) if limit is not None else DEFAULT_PAGE_SIZE
+    except ValueError:
+        raise InvalidPageRequest('limit must be an integer')
+    if limit < 1:
+        raise InvalidPageRequest('limit must be positive')
+    return min(limit, MAX_PAGE_SIZE), cursor
+
+def paginate(query, keyset, serializer):
+    """Serialize one keyset page of query.
+
+    The response is an envelope holding at most `limit` items (DEFAULT_PAGE_SIZE
+    unless asked, never more than MAX_PAGE_SIZE) and the `next_cursor` to fetch
+    the following page (null on the last page), so no request serializes a
+    whole table. Each page costs one index range scan however deep it is.
+    """
+    query = query.order_by(*keyset.order_by())
+    limit, cursor = page_args()
+    if cursor:
+        query = query.filter(keyset.after(keyset.decode(cursor)))
+
+    items = serializer(query.limit(limit + 1))
+    has_more = len(items) > limit
+    items = items[:limit]
+    return {
+        'items': items,
+        'limit': limit,
+        'next_cursor': keyset.encode(items[-1]) if has_more else None
+    }
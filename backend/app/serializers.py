@@ -0,0 +1,45 @@
+from sqlalchemy import func
+from sqlalchemy.orm import selectinload
+from .database import db
+from .models import User, Subject, Chapter, Quiz, Question, Score
+
+# Bulk serializers for list endpoints. Each one loads relations with a single
+# selectinload per relationship and fetches child counts with one GROUP BY,
+# so the number of queries does not grow with the number of rows.
+
+def _load(items, *options):
+    """Run a query with eager-load options, or pass a list through unchanged"""
+    if hasattr(items, 'options'):
+        return items.options(*options).all()
+    return list(items)
+
+def _count_by(column, ids):
+    """Map each id to the number of rows whose column equals it"""
+    if not ids:
+        return {}
+    rows = db.session.query(column, func.count()).filter(column.in_(ids)).group_by(column).all()
+    return dict(rows)
+
+def serialize_subjects(subjects):
+    subjects = _load(subjects)
+    chapter_counts = _count_by(Chapter.subject_id, [subject.id for subject in subjects])
+    return [subject.convert_to_json(chapter_count=chapter_counts.get(subject.id, 0)) for subject in subjects]
+
+def serialize_chapters(chapters):
+    chapters = _load(chapters, selectinload(Chapter.subject))
+    quiz_counts = _count_by(Quiz.chapter_id, [chapter.id for chapter in chapters])
+    return [chapter.convert_to_json(quiz_count=quiz_counts.get(chapter.id, 0)) for chapter in chapters]
+
+def serialize_quizzes(quizzes):
+    quizzes = _load(quizzes, selectinload(Quiz.chapter).selectinload(Chapter.subject))
+    question_counts = _count_by(Question.quiz_id, [quiz.id for quiz in quizzes])
+    return [quiz.convert_to_json(question_count=question_counts.get(quiz.id, 0)) for quiz in quizzes]
+
+def serialize_questions(questions):
+    return [question.convert_to_json() for question in _load(questions)]
+
+def serialize_users(users):
+    return [user.convert_to_json() for user in _load(users, selectinload(User.roles))]
+
+def serialize_scores(scores):
+    return [score.convert_to_json() for score in _load(scores, selectinload(Score.quiz), selectinload(Score.user))]
@@ -0,0 +1,239 @@
+import json
+import uuid
+from datetime import datetime
+from flask import current_app
+from sqlalchemy.exc import OperationalError
+
+from .cache import RELEASE_LOCK_SCRIPT
+from .database import db, DatabaseBusy
+from .models import User, Quiz, Score
+from .models.stats import record_scores
+
+# Write-behind submissions. Submitting an attempt grades it, pushes the score
+# row onto QUEUE_KEY with a receipt and answers 202; the drain-submissions job
+# moves the queue head onto its own processing list in batches, inserts them
+# and records each receipt's outcome.
+QUEUE_KEY = 'submissions:queue'
+# Queued but not yet saved attempts per "user_id:quiz_id", for the attempt limit
+PENDING_KEY = 'submissions:pending'
+RECEIPT_PREFIX = 'submissions:receipt:'
+# Batch being saved by the drainer holding the lock token in the key's suffix
+PROCESSING_PREFIX = 'submissions:processing:'
+# Entries that could not be saved even on their own, kept for inspection
+DEAD_LETTER_KEY = 'submissions:dead'
+DRAIN_LOCK_KEY = 'submissions:drain'
+DRAIN_LOCK_TIMEOUT = 300
+
+EXTEND_LOCK_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('expire', KEYS[1], ARGV[2])
+end
+return 0
+"""
+
+# Up to ARGV[1] items from the head of KEYS[1] to the tail of KEYS[2], in order
+MOVE_BATCH_SCRIPT = """
+local moved = {}
+for i = 1, tonumber(ARGV[1]) do
+    local item = redis.call('lmove', KEYS[1], KEYS[2], 'LEFT', 'RIGHT')
+    if not item then
+        break
+    end
+    moved[i] = item
+end
+return moved
+"""
+
+# Everything on processing list KEYS[1] back to the head of the queue KEYS[2], in order
+REQUEUE_SCRIPT = """
+local items = redis.call('lrange', KEYS[1], 0, -1)
+for i = #items, 1, -1 do
+    redis.call('lpush', KEYS[2], items[i])
+end
+redis.call('del', KEYS[1])
+return #items
+"""
+
+def _redis():
+    cache = getattr(current_app, 'cache', None)
+    return cache.redis_client if cache and cache.available else None
+
+def _pending_field(user_id, quiz_id):
+    return f'{user_id}:{quiz_id}'
+
+def enqueue(row):
+    """Queue a graded score row (a dict of Score's columns) to be saved later.
+
+    Returns the receipt id, or None when Redis cannot take it, in which case the
+    caller saves the score synchronously.
+    """
+    client = _redis()
+    if client is None:
+        return None
+
+    receipt = uuid.uuid4().hex
+    item = dict(row, receipt=receipt, time_stamp_of_attempt=row['time_stamp_of_attempt'].isoformat())
+    status = {'status': 'queued', 'user_id': row['user_id']}
+    try:
+        pipe = client.pipeline(transaction=True)
+        pipe.set(RECEIPT_PREFIX + receipt, json.dumps(status), ex=current_app.config['SUBMISSION_RECEIPT_TTL'])
+        pipe.hincrby(PENDING_KEY, _pending_field(row['user_id'], row['quiz_id']), 1)
+        pipe.rpush(QUEUE_KEY, json.dumps(item))
+        pipe.execute()
+    except Exception as e:
+        current_app.logger.warning(f"Could not queue submission, saving it synchronously: {e}")
+        return None
+    return receipt
+
+def pending_attempts(user_id, quiz_id):
+    """Attempts of a user at a quiz that are queued but not saved yet"""
+    client = _redis()
+    if client is None:
+        return 0
+    try:
+        return max(0, int(client.hget(PENDING_KEY, _pending_field(user_id, quiz_id)) or 0))
+    except Exception:
+        return 0
+
+def receipt_status(receipt):
+    """{status: queued|saved|failed, user_id, score_id?, message?} or None if unknown or expired"""
+    client = _redis()
+    if client is None:
+        return None
+    try:
+        status = client.get(RECEIPT_PREFIX + receipt)
+    except Exception:
+        return None
+    return json.loads(status) if status else None
+
+def drain(batch_size=None):
+    """Save queued submissions, one transaction per batch, until the queue is empty.
+
+    Only one drainer runs at a time: the lock is extended before each batch and
+    the drain stops if it was lost. Each batch is moved onto the drainer's own
+    processing list and deleted from there once it commits, so no other entry
+    is ever removed. Batches left on a processing list by a failed or dead
+    drainer go back to the head of the queue; their receipts already in scores
+    are not inserted twice.
+    """
+    client = _redis()
+    if client is None:
+        return {'saved': 0, 'failed': 0, 'batches': 0, 'skipped': 'redis unavailable'}
+
+    batch_size = batch_size or current_app.config['SUBMISSION_BATCH_SIZE']
+    token = uuid.uuid4().hex
+    if not client.set(DRAIN_LOCK_KEY, token, nx=True, ex=DRAIN_LOCK_TIMEOUT):
+        return {'saved': 0, 'failed': 0, 'batches': 0, 'skipped': 'another drain is running'}
+
+    processing = PROCESSING_PREFIX + token
+    report = {'saved': 0, 'failed': 0, 'batches': 0}
+    try:
+        _requeue_abandoned(client)
+        while True:
+            if not client.eval(EXTEND_LOCK_SCRIPT, 1, DRAIN_LOCK_KEY, token, DRAIN_LOCK_TIMEOUT):
+                # Another drainer may hold the lock by now
+                report['stopped'] = 'drain lock lost'
+                break
+            items = client.eval(MOVE_BATCH_SCRIPT, 2, QUEUE_KEY, processing, batch_size)
+            if not items:
+                break
+            saved, failed = _save_batch(client, processing, items)
+            report['saved'] += saved
+            report['failed'] += failed
+            report['batches'] += 1
+    finally:
+        try:
+            client.eval(REQUEUE_SCRIPT, 2, processing, QUEUE_KEY)
+            client.eval(RELEASE_LOCK_SCRIPT, 1, DRAIN_LOCK_KEY, token)
+        except Exception:
+            pass  # the lock expires on its own; the next drain requeues the batch
+    return report
+
+def _requeue_abandoned(client):
+    """Return batches of drainers that died mid-batch to the queue"""
+    for key in list(client.scan_iter(match=PROCESSING_PREFIX + '*', count=100)):
+        client.eval(REQUEUE_SCRIPT, 2, key, QUEUE_KEY)
+
+def _save_batch(client, processing, items):
+    entries, raw, dead = [], {}, []
+    for item in items:
+        try:
+            entry = json.loads(item)
+            entry['time_stamp_of_attempt'] = datetime.fromisoformat(entry['time_stamp_of_attempt'])
+            raw[entry['receipt']] = item
+            entries.append(entry)
+        except (ValueError, TypeError, KeyError):
+            dead.append(item)
+
+    receipts = [entry['receipt'] for entry in entries]
+    already_saved = {receipt for receipt, in db.session.query(Score.receipt).filter(Score.receipt.in_(receipts))}
+    user_ids = {id for id, in db.session.query(User.id).filter(User.id.in_({e['user_id'] for e in entries}))}
+    quiz_ids = {id for id, in db.session.query(Quiz.id).filter(Quiz.id.in_({e['quiz_id'] for e in entries}))}
+
+    # Quizzes or users deleted while their attempts were queued cannot be saved
+    rows = [
+        entry for entry in entries
+        if entry['receipt'] not in already_saved and entry['user_id'] in user_ids and entry['quiz_id'] in quiz_ids
+    ]
+    errors = {}
+    if rows:
+        try:
+            _insert(rows)
+            db.session.commit()
+        except (OperationalError, DatabaseBusy):
+            # The database itself is unavailable: the batch goes back to the queue
+            db.session.rollback()
+            raise
+        except Exception as e:
+            db.session.rollback()
+            current_app.logger.warning(f"Saving {len(rows)} queued submissions failed, saving them one by one: {e}")
+            errors = _save_rows(rows)
+    score_ids = dict(db.session.query(Score.receipt, Score.id).filter(Score.receipt.in_(receipts)))
+
+    ttl = current_app.config['SUBMISSION_RECEIPT_TTL']
+    pipe = client.pipeline(transaction=True)
+    pipe.delete(processing)
+    for entry in entries:
+        if entry['receipt'] in score_ids:
+            status = {'status': 'saved', 'user_id': entry['user_id'], 'score_id': score_ids[entry['receipt']]}
+        elif entry['receipt'] in errors:
+            status = {'status': 'failed', 'user_id': entry['user_id'],
+                      'message': 'The attempt could not be saved'}
+            dead.append(raw[entry['receipt']])
+        else:
+            status = {'status': 'failed', 'user_id': entry['user_id'],
+                      'message': 'The quiz or user was deleted before the attempt could be saved'}
+        pipe.set(RECEIPT_PREFIX + entry['receipt'], json.dumps(status), ex=ttl)
+        pipe.hincrby(PENDING_KEY, _pending_field(entry['user_id'], entry['quiz_id']), -1)
+    if dead:
+        pipe.rpush(DEAD_LETTER_KEY, *dead)
+    pipe.execute()
+    if dead:
+        current_app.logger.error(f"Moved {len(dead)} queued submissions to {DEAD_LETTER_KEY}")
+
+    saved = len(score_ids)
+    return saved, len(items) - saved
+
+def _save_rows(rows):
+    """Save rows one transaction each; returns {receipt: error} of the rows that failed"""
+    errors = {}
+    for row in rows:
+        try:
+            _insert([row])
+            db.session.commit()
+        except (OperationalError, DatabaseBusy):
+            db.session.rollback()
+            raise
+        except Exception as e:
+            db.session.rollback()
+            errors[row['receipt']] = str(e)
+    return errors
+
+def _insert(rows):
+    db.session.execute(db.insert(Score), rows)
+    record_scores(rows)
+    current_app.cache.tag_writes(
+        db.session, 'Score',
+        *{f'Score:user:{row["user_id"]}' for row in rows},
+        *{f'Score:quiz:{row["quiz_id"]}' for row in rows}
+    )
@@ -13,6 +13,19 @@ import logging
 
 logger = logging.getLogger(__name__)
 
+_worker_app = None
+_worker_pid = None
+
+def worker_app():
+    """The Flask app of this worker process, built by its first task and reused by
+    the rest (a forked child builds its own: connections and threads do not survive a fork)"""
+    global _worker_app, _worker_pid
+    if _worker_app is None or _worker_pid != os.getpid():
+        from app import create_app
+        _worker_app = create_app()
+        _worker_pid = os.getpid()
+    return _worker_app
+
 def send_email(to_email, subject, body, attachment_path=None):
     try:
         msg = MIMEMultipart()
@@ -62,10 +75,9 @@ def send_webhook_notification(message):
 @celery.task(bind=True)
 def send_daily_reminders(self):
     try:
-        from app import create_app
         from app.models import User, Score, Quiz
 
-        app = create_app()
+        app = worker_app()
         with app.app_context():
             users = User.query.filter_by(is_active=True).all()
             reminder_count = 0
@@ -107,16 +119,50 @@ def send_daily_reminders(self):
         logger.error(f"Daily reminders failed: {e}")
         return {'status': 'FAILURE', 'error': str(e)}
 
+@celery.task(bind=True)
+def warm_caches(self, families=None):
+    try:
+        from app.warming import warm_caches as warm
+
+        app = worker_app()
+        with app.app_context():
+            report = warm(
+                app,
+                families or app.config['CACHE_WARM_FAMILIES'],
+                lead=app.config['CACHE_WARM_INTERVAL']
+            )
+
+            logger.info(f"Caches warmed in {report['total_seconds']}s: {report}")
+            return {'status': 'SUCCESS', 'report': report}
+
+    except Exception as e:
+        logger.error(f"Cache warming failed: {e}")
+        return {'status': 'FAILURE', 'error': str(e)}
+
+@celery.task(bind=True)
+def drain_submissions(self):
+    try:
+        from app.submissions import drain
+
+        app = worker_app()
+        with app.app_context():
+            report = drain()
+            if report['batches']:
+                logger.info(f"Saved queued submissions: {report}")
+            return {'status': 'SUCCESS', 'report': report}
+
+    except Exception as e:
+        logger.error(f"Draining queued submissions failed: {e}")
+        return {'status': 'FAILURE', 'error': str(e)}
+
 @celery.task(bind=True)
 def generate_monthly_reports(self):
     try:
-        from app import create_app
-        from app.models import User, Score, Quiz, Chapter, Subject
+        from app.models import User, Score, Quiz, Chapter, Subject, UserStats
         from calendar import monthrange
 
-        app = create_app()
+        app = worker_app()
         with app.app_context():
-            users = User.query.filter_by(is_active=True).all()
             report_count = 0
 
             today = datetime.utcnow()
@@ -131,10 +177,14 @@ def generate_monthly_reports(self):
                 month_name = month_start.strftime("%B")
                 year = today.year
 
-            for user in users:
-                if user.is_admin():
-                    continue
+            # Only users whose stats show an attempt since the month began can have anything to report
+            users = User.query.join(UserStats, UserStats.user_id == User.id).filter(
+                User.is_active == True,
+                ~User.roles.any(name='admin'),
+                UserStats.last_attempt_at >= month_start
+            ).all()
 
+            for user in users:
                 scores = Score.query.filter(
                     Score.user_id == user.id,
                     Score.time_stamp_of_attempt >= month_start,
@@ -145,7 +195,7 @@ def generate_monthly_reports(self):
                     continue
 
                 total_attempts = len(scores)
-                total_percentage = sum((s.total_scored / s.total_questions * 100) for s in scores if s.total_questions > 0)
+                total_percentage = sum(s.percentage or 0 for s in scores)
                 avg_percentage = total_percentage / total_attempts if total_attempts > 0 else 0
 
                 html_report = generate_monthly_report_html(user, month_name, year, total_attempts, avg_percentage, scores)
@@ -161,13 +211,12 @@ def generate_monthly_reports(self):
         return {'status': 'FAILURE', 'error': str(e)}
 
 def generate_monthly_report_html(user, month, year, total_quizzes, avg_score, scores):
-    best_score = max(scores, key=lambda s: s.total_scored / s.total_questions if s.total_questions > 0 else 0)
-    best_percentage = (best_score.total_scored / best_score.total_questions * 100) if best_score.total_questions > 0 else 0
+    best_percentage = max((s.percentage or 0) for s in scores)
 
     quiz_rows = ""
     for score in scores:
         quiz = score.quiz
-        percentage = (score.total_scored / score.total_questions * 100) if score.total_questions > 0 else 0
+        percentage = score.percentage or 0
         quiz_rows += f"""
         <tr>
             <td>{quiz.title if quiz else 'Unknown'}</td>
@@ -240,10 +289,10 @@ def generate_monthly_report_html(user, month, year, total_quizzes, avg_score, sc
 @celery.task(bind=True)
 def export_user_csv(self, user_id):
     try:
-        from app import create_app
-        from app.models import User, Quiz, Score, Chapter, Subject
+        from app.models import User
+        from app.api.export import user_score_rows
 
-        app = create_app()
+        app = worker_app()
         with app.app_context():
             user = User.query.get(user_id)
             if not user:
@@ -254,31 +303,29 @@ def export_user_csv(self, user_id):
             filename = f'user_{user_id}_quizzes_{timestamp}.csv'
             filepath = os.path.join('exports', filename)
 
-            scores = Score.query.filter_by(user_id=user_id).order_by(Score.time_stamp_of_attempt.desc()).all()
+            total_records = 0
 
             with open(filepath, 'w', newline='', encoding='utf-8') as csvfile:
                 writer = csv.writer(csvfile)
                 writer.writerow(['Quiz ID', 'Quiz Title', 'Subject', 'Chapter', 'Score', 'Total Questions', 'Percentage', 'Date'])
 
-                for score in scores:
-                    quiz = score.quiz
-                    percentage = (score.total_scored / score.total_questions * 100) if score.total_questions > 0 else 0
-
+                for row in user_score_rows(user_id):
                     writer.writerow([
-                        score.quiz_id,
-                        quiz.title if quiz else 'Unknown',
-                        quiz.chapter.subject.name if quiz and quiz.chapter and quiz.chapter.subject else 'Unknown',
-                        quiz.chapter.name if quiz and quiz.chapter else 'Unknown',
-                        score.total_scored,
-                        score.total_questions,
-                        f"{percentage:.1f}%",
-                        score.time_stamp_of_attempt.strftime('%Y-%m-%d %H:%M')
+                        row.quiz_id,
+                        row.quiz_title,
+                        row.subject_name or 'Unknown',
+                        row.chapter_name or 'Unknown',
+                        row.total_scored,
+                        row.total_questions,
+                        f"{row.percentage or 0:.1f}%",
+                        row.time_stamp_of_attempt.strftime('%Y-%m-%d %H:%M')
                     ])
+                    total_records += 1
 
             send_email(user.email, "CSV Export Ready", f"Your quiz data export is ready: {filename}")
             logger.info(f"CSV exported for user {user.email}")
 
-            return {'status': 'SUCCESS', 'filename': filename, 'total_records': len(scores)}
+            return {'status': 'SUCCESS', 'filename': filename, 'total_records': total_records}
 
     except Exception as e:
         logger.error(f"CSV export failed for user {user_id}: {e}")
@@ -287,10 +334,10 @@ def export_user_csv(self, user_id):
 @celery.task(bind=True)
 def export_admin_csv(self, admin_user_id):
     try:
-        from app import create_app
-        from app.models import User, Score
+        from app.models import User
+        from app.api.export import with_user_stats
 
-        app = create_app()
+        app = worker_app()
         with app.app_context():
             admin_user = User.query.get(admin_user_id)
             if not admin_user or not admin_user.is_admin():
@@ -301,19 +348,19 @@ def export_admin_csv(self, admin_user_id):
             filename = f'admin_users_performance_{timestamp}.csv'
             filepath = os.path.join('exports', filename)
 
-            users = User.query.filter(~User.roles.any(name='admin')).all()
+            users = with_user_stats(User.query.filter(~User.roles.any(name='admin'))).order_by(User.id)\
+                .yield_per(app.config.get('EXPORT_BATCH_SIZE', 500))
+            total_records = 0
 
             with open(filepath, 'w', newline='', encoding='utf-8') as csvfile:
                 writer = csv.writer(csvfile)
                 writer.writerow(['User ID', 'Name', 'Email', 'Qualification', 'Total Quizzes', 'Average Score', 'Performance'])
 
-                for user in users:
-                    scores = Score.query.filter_by(user_id=user.id).all()
-                    quizzes_taken = len(scores)
+                for user, stats in users:
+                    quizzes_taken = stats.attempts if stats else 0
 
                     if quizzes_taken > 0:
-                        total_percentage = sum((s.total_scored / s.total_questions * 100) for s in scores if s.total_questions > 0)
-                        avg_percentage = total_percentage / quizzes_taken
+                        avg_percentage = stats.average_percentage
 
                         if avg_percentage >= 80:
                             rating = "Excellent"
@@ -336,11 +383,12 @@ def export_admin_csv(self, admin_user_id):
                         f"{avg_percentage:.1f}%",
                         rating
                     ])
+                    total_records += 1
 
             send_email(admin_user.email, "Admin CSV Export Ready", f"User performance export ready: {filename}")
             logger.info(f"Admin CSV exported: {filename}")
 
-            return {'status': 'SUCCESS', 'filename': filename, 'total_records': len(users)}
+            return {'status': 'SUCCESS', 'filename': filename, 'total_records': total_records}
 
     except Exception as e:
         logger.error(f"Admin CSV export failed: {e}")
@@ -369,6 +417,39 @@ def cleanup_old_results(self):
         logger.error(f"Cleanup failed: {e}")
         raise
 
+@celery.task(bind=True)
+def reconcile_rollups(self):
+    try:
+        from app.models import db
+        from app.models.stats import rebuild_rollups
+
+        app = worker_app()
+        with app.app_context():
+            rebuilt = rebuild_rollups()
+            db.session.commit()
+
+            logger.info(f"Rollups reconciled: {rebuilt}")
+            return {'status': 'SUCCESS', 'rows': rebuilt}
+
+    except Exception as e:
+        logger.error(f"Rollup reconciliation failed: {e}")
+        raise
+
+@celery.task(bind=True)
+def reconcile_attempt_counters(self):
+    try:
+        from app.attempts import reconcile_counters
+
+        app = worker_app()
+        with app.app_context():
+            report = reconcile_counters()
+            logger.info(f"Attempt counters reconciled: {report}")
+            return {'status': 'SUCCESS', 'report': report}
+
+    except Exception as e:
+        logger.error(f"Attempt counter reconciliation failed: {e}")
+        return {'status': 'FAILURE', 'error': str(e)}
+
 def send_email_reminder(user, reason):
     subject = "Quiz Master - Daily Reminder"
     body = f"""
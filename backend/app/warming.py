@@ -0,0 +1,83 @@
+import time
+from flask_jwt_extended import create_access_token
+
+from .cache import CACHE_TIMEOUTS, WARMING_ENVIRON_KEY
+from .models import User, Role, Quiz
+
+# Hot endpoints to pre-populate, by key family. Each family lists
+# (cache policy, url, needs an admin token) for the current data.
+
+def _catalog():
+    return [
+        ('subjects', '/api/subjects', False),
+        ('chapters', '/api/chapters', False),
+        ('quizzes', '/api/quizzes', False),
+    ]
+
+def _quiz_attempts():
+    active = Quiz.query.with_entities(Quiz.id).filter_by(is_active=True).order_by(Quiz.id)
+    return [('quiz_attempt', f'/api/quiz-attempt/{quiz_id}', True) for quiz_id, in active]
+
+def _admin_dashboard():
+    return [('dashboard', '/api/dashboard', True)]
+
+WARM_FAMILIES = {
+    'catalog': _catalog,
+    'quiz_attempts': _quiz_attempts,
+    'admin_dashboard': _admin_dashboard,
+}
+
+def _admin_token():
+    admin = User.query.join(User.roles)\
+        .filter(Role.name == 'admin', User.is_active == True)\
+        .order_by(User.id).first()
+    return create_access_token(identity=str(admin.id)) if admin else None
+
+def warm_caches(app, families=None, lead=0):
+    """Request the hot endpoints of each family so their cache entries exist.
+
+    Goes through the real views and the @cached decorator, so the keys are
+    exactly those clients hit: the first page of each list, without filters.
+    Other pages and filtered lists are cached as clients ask for them.
+
+    Entries that would expire within `lead` seconds (e.g. before the next run)
+    are rebuilt now via ?max_age; fresher ones are left alone. The lead is
+    capped at half the policy's TTL, so a run never rebuilds an entry made in
+    the last half of it (quizzes live 300 s, as long as the default interval).
+    Returns per-family request, error and timing counts.
+    """
+    families = families or list(WARM_FAMILIES)
+    unknown = set(families) - set(WARM_FAMILIES)
+    if unknown:
+        raise ValueError(f"Unknown cache warming families: {', '.join(sorted(unknown))}")
+
+    client = app.test_client()
+    token = _admin_token()
+    report = {}
+    started = time.monotonic()
+
+    for family in families:
+        family_started = time.monotonic()
+        warmed = errors = 0
+        for policy, url, needs_admin in WARM_FAMILIES[family]():
+            if needs_admin and not token:
+                errors += 1
+                continue
+            headers = {'Authorization': f'Bearer {token}'} if needs_admin else {}
+            ttl = CACHE_TIMEOUTS[policy]
+            max_age = ttl - min(int(lead), ttl // 2)
+            response = client.get(url, query_string={'max_age': max_age}, headers=headers,
+                                  environ_overrides={WARMING_ENVIRON_KEY: True})
+            if response.status_code == 200:
+                warmed += 1
+            else:
+                errors += 1
+                app.logger.warning(f"Cache warming {url} returned {response.status_code}")
+        report[family] = {
+            'warmed': warmed,
+            'errors': errors,
+            'seconds': round(time.monotonic() - family_started, 3)
+        }
+
+    report['total_seconds'] = round(time.monotonic() - started, 3)
+    return report
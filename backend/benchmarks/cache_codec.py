@@ -0,0 +1,98 @@
+"""Compare pickle with the cache's JSON codec (raw and zlib-compressed) on
+real dashboard and quiz-list payloads: encode/decode time and bytes stored.
+
+Usage (from the backend directory):
+    python -m benchmarks.cache_codec --users 500 --quizzes 200 --scores 20000
+"""
+import argparse
+import os
+import pickle
+import random
+import sys
+import tempfile
+import timeit
+from datetime import datetime, timedelta
+
+DB_PATH = os.path.join(tempfile.mkdtemp(), 'cache_codec.db')
+os.environ['DATABASE_URL'] = f'sqlite:///{DB_PATH}'
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask
+from app.config import config_dict
+from app.database import db, migrate, upgrade_database, MIGRATIONS_DIR
+from app.models import User, Role, Subject, Chapter, Quiz, Question, Score
+from app.models.stats import rebuild_rollups
+from app.serializers import serialize_quizzes
+from app.api.dashboard import DashboardApi
+from app.cache import JsonCodec, orjson
+
+def seed(users, quizzes, scores):
+    now = datetime.utcnow()
+    user_role = Role(name='user')
+    admin_role = Role(name='admin')
+    db.session.add_all([user_role, admin_role])
+    db.session.add_all([Subject(id=i, name=f'Subject {i}', description='Benchmark subject') for i in range(1, 11)])
+    db.session.add_all([Chapter(id=i, name=f'Chapter {i}', description='Benchmark chapter', subject_id=i % 10 + 1)
+                        for i in range(1, 51)])
+    db.session.add_all([Quiz(id=i, chapter_id=i % 50 + 1, title=f'Quiz {i}', time_duration='00:30:00',
+                             date_of_quiz=now.date(), remarks='Benchmark quiz', total_marks=10)
+                        for i in range(1, quizzes + 1)])
+    db.session.add_all([Question(quiz_id=q, question_statement='Q', option1='a', option2='b', correct_option=1)
+                        for q in range(1, quizzes + 1) for _ in range(10)])
+    for i in range(1, users + 1):
+        user = User(id=i, email=f'u{i}@example.com', username=f'u{i}', password_hash='x', full_name=f'User {i}',
+                    created_at=now - timedelta(days=random.randint(0, 365)))
+        user.roles.append(admin_role if i == 1 else user_role)
+        db.session.add(user)
+    db.session.flush()
+    db.session.bulk_insert_mappings(Score, [{
+        'quiz_id': random.randint(1, quizzes), 'user_id': random.randint(2, users),
+        'time_stamp_of_attempt': now - timedelta(minutes=random.randint(0, 60 * 24 * 180)),
+        'total_scored': (scored := random.randint(0, 10)), 'total_questions': 10,
+        'max_marks': 10, 'percentage': scored * 10.0
+    } for _ in range(scores)])
+    rebuild_rollups()
+    db.session.commit()
+
+def payloads():
+    api = DashboardApi()
+    return {
+        'admin dashboard': api._get_admin_dashboard(),
+        'user dashboard': api._get_user_dashboard(db.session.get(User, 2)),
+        'quiz list': serialize_quizzes(Quiz.query),
+    }
+
+def bench(name, dumps, loads, value, number):
+    blob = dumps(value)
+    encode = timeit.timeit(lambda: dumps(value), number=number) / number
+    decode = timeit.timeit(lambda: loads(blob), number=number) / number
+    print(f"  {name:14} {len(blob):>10,} bytes   encode {encode * 1e6:9.1f} us   decode {decode * 1e6:9.1f} us")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--users', type=int, default=500)
+    parser.add_argument('--quizzes', type=int, default=200)
+    parser.add_argument('--scores', type=int, default=20000)
+    parser.add_argument('--number', type=int, default=200)
+    args = parser.parse_args()
+
+    app = Flask(__name__)
+    app.config.from_object(config_dict['development'])
+    db.init_app(app)
+    migrate.init_app(app, db, directory=MIGRATIONS_DIR, render_as_batch=True)
+    with app.app_context():
+        upgrade_database()
+        seed(args.users, args.quizzes, args.scores)
+        values = payloads()
+
+    raw = JsonCodec(compress_threshold=None)
+    compressed = JsonCodec()
+    print(f"JSON encoder: {'orjson' if orjson else 'stdlib json'}")
+    for label, value in values.items():
+        print(f"\n{label}")
+        bench('pickle', pickle.dumps, pickle.loads, value, args.number)
+        bench('json', raw.dumps, raw.loads, value, args.number)
+        bench('json+zlib', compressed.dumps, compressed.loads, value, args.number)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+"""Compare cache invalidation latency of a KEYS pattern scan + DEL against a
+generation INCR, on a Redis keyspace of --keys entries. Also samples how long
+an unrelated client's GET is stalled while each invalidation runs.
+
+Needs a disposable Redis database: it is flushed before and after the run.
+
+Usage (from the backend directory):
+    python -m benchmarks.cache_invalidation --url redis://localhost:6379/15 --keys 1000000
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import redis
+from flask import Flask
+from app.cache import RedisCache
+
+NAMESPACE = 'subjects'
+
+def fill(client, keys, matching, batch=10000):
+    """keys entries in total, `matching` of them under the invalidated namespace"""
+    pipe = client.pipeline(transaction=False)
+    for i in range(keys):
+        name = f"subjects_list_{i}" if i < matching else f"other:{i}"
+        pipe.set(name, b'x' * 64, ex=3600)
+        if i % batch == batch - 1:
+            pipe.execute()
+    pipe.execute()
+
+def watch_stalls(url, stop, samples):
+    """GET latency seen by another client, e.g. a Celery worker sharing the server"""
+    client = redis.from_url(url)
+    while not stop.is_set():
+        started = time.perf_counter()
+        client.get('probe')
+        samples.append(time.perf_counter() - started)
+
+def timed(url, action):
+    stop, samples = threading.Event(), []
+    watcher = threading.Thread(target=watch_stalls, args=(url, stop, samples))
+    watcher.start()
+    time.sleep(0.05)
+    started = time.perf_counter()
+    action()
+    elapsed = time.perf_counter() - started
+    stop.set()
+    watcher.join()
+    return elapsed, max(samples) if samples else 0
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--url', default='redis://localhost:6379/15')
+    parser.add_argument('--keys', type=int, default=1000000)
+    parser.add_argument('--matching', type=int, default=1000, help='Entries in the invalidated namespace')
+    args = parser.parse_args()
+
+    app = Flask(__name__)
+    app.config['CACHE_REDIS_URL'] = args.url
+    cache = RedisCache(app)
+    if not cache.redis_client:
+        sys.exit(f'Redis is not reachable at {args.url}')
+    client = cache.redis_client
+
+    client.flushdb()
+    print(f'Filling {args.keys} keys ...')
+    fill(client, args.keys, args.matching)
+
+    def keys_scan():
+        matched = client.keys('subjects_list_*')
+        if matched:
+            client.delete(*matched)
+
+    with app.app_context():
+        cache.generations([NAMESPACE])
+        results = {
+            'KEYS + DEL': timed(args.url, keys_scan),
+            'INCR generation': timed(args.url, lambda: cache.invalidate(NAMESPACE)),
+        }
+
+    for name, (elapsed, stall) in results.items():
+        print(f'{name:18} invalidate {elapsed * 1000:9.2f} ms   worst concurrent GET {stall * 1000:9.2f} ms')
+    client.flushdb()
+
+if __name__ == '__main__':
+    main()
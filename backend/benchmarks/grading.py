@@ -0,0 +1,94 @@
+"""Grades per second for 10-, 100- and 1,000-question quizzes: the former
+per-submission ORM load and loop versus a cached AnswerKey, one submission at
+a time and in batches (a NumPy answer matrix when NumPy is installed).
+
+Usage (from the backend directory):
+    python -m benchmarks.grading --sizes 10 100 1000 --seconds 2
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+DB_PATH = os.path.join(tempfile.mkdtemp(), 'grading.db')
+os.environ['DATABASE_URL'] = f'sqlite:///{DB_PATH}'
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask
+from app.config import config_dict
+from app.database import db, migrate, upgrade_database, MIGRATIONS_DIR
+from app.models import Subject, Chapter, Quiz, Question
+from app.grading import AnswerKey, np
+
+def seed(sizes):
+    db.session.add(Subject(id=1, name='Subject', description='Benchmark subject'))
+    db.session.add(Chapter(id=1, name='Chapter', description='Benchmark chapter', subject_id=1))
+    for quiz_id, size in enumerate(sizes, start=1):
+        db.session.add(Quiz(id=quiz_id, chapter_id=1, title=f'Quiz {size}', time_duration='00:30:00',
+                            date_of_quiz=datetime.utcnow().date(), remarks='Benchmark quiz'))
+        db.session.add_all([Question(quiz_id=quiz_id, question_statement=f'Q{i}', option1='a', option2='b',
+                                     option3='c', option4='d', correct_option=random.randint(1, 4),
+                                     marks=random.randint(1, 5))
+                            for i in range(size)])
+    db.session.commit()
+
+def legacy_grade(quiz, answers):
+    """The grading loop ScoreApi.post used before AnswerKey"""
+    questions = quiz.questions.all()
+    total_scored = 0
+    max_marks = 0
+    for question in questions:
+        max_marks += question.marks or 0
+        user_answer = answers.get(str(question.id))
+        if user_answer is not None and user_answer not in [1, 2, 3, 4]:
+            raise ValueError(user_answer)
+        if user_answer and user_answer == question.correct_option:
+            total_scored += question.marks
+    return total_scored
+
+def rate(fn, seconds):
+    count = 0
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        fn()
+        count += 1
+    return count / seconds
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10, 100, 1000])
+    parser.add_argument('--seconds', type=float, default=2.0)
+    parser.add_argument('--batch', type=int, default=1000, help='Submissions per grade_many call.')
+    args = parser.parse_args()
+
+    app = Flask(__name__)
+    app.config.from_object(config_dict['development'])
+    db.init_app(app)
+    migrate.init_app(app, db, directory=MIGRATIONS_DIR, render_as_batch=True)
+    with app.app_context():
+        upgrade_database()
+        seed(args.sizes)
+
+        print(f"Batches graded with {'NumPy' if np is not None else 'the per-submission loop (NumPy not installed)'}")
+        print(f"{'questions':>9}   {'ORM load + loop':>16}   {'key build':>10}   {'cached key':>12}   "
+              f"{'batch of ' + str(args.batch):>14}   speedup")
+        for quiz_id, size in enumerate(args.sizes, start=1):
+            quiz = db.session.get(Quiz, quiz_id)
+            key = AnswerKey.load(quiz_id)
+            answers = {str(question_id): random.randint(1, 4) for question_id in key.question_ids}
+            assert legacy_grade(quiz, answers) == key.grade(answers)
+
+            legacy = rate(lambda: (legacy_grade(quiz, answers), db.session.expire_all()), args.seconds)
+            build = rate(lambda: AnswerKey.load(quiz_id), args.seconds)
+            cached = rate(lambda: key.grade(answers), args.seconds)
+            batch = [answers] * args.batch
+            assert key.grade_many(batch[:1]) == [key.grade(answers)]
+            batched = rate(lambda: key.grade_many(batch), args.seconds) * args.batch
+            print(f"{size:>9}   {legacy:>12,.0f} /s   {build:>8,.0f} /s   {cached:>10,.0f} /s   "
+                  f"{batched:>12,.0f} /s   {max(cached, batched) / legacy:6.0f}x")
+
+if __name__ == '__main__':
+    main()
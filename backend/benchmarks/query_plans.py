@@ -0,0 +1,122 @@
+"""Compare query plans and timings for hot queries before and after the
+composite indexes in migration 0003_hot_query_indexes.
+
+Usage (from the backend directory):
+    python -m benchmarks.query_plans --scores 200000
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+DB_PATH = os.path.join(tempfile.mkdtemp(), 'query_plans.db')
+os.environ['DATABASE_URL'] = f'sqlite:///{DB_PATH}'
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask
+from flask_migrate import upgrade
+from sqlalchemy import text
+from app.config import config_dict
+from app.database import db, migrate, MIGRATIONS_DIR
+
+HOT_QUERIES = {
+    'attempt limit check': (
+        "SELECT COUNT(*) FROM scores WHERE user_id = :user_id AND quiz_id = :quiz_id", {}),
+    'recent attempts for user': (
+        "SELECT * FROM scores WHERE user_id = :user_id ORDER BY time_stamp_of_attempt DESC LIMIT 5", {}),
+    'user monthly activity': (
+        "SELECT strftime('%Y-%m', time_stamp_of_attempt), COUNT(*) FROM scores "
+        "WHERE user_id = :user_id AND time_stamp_of_attempt >= :since GROUP BY 1", {}),
+    'admin monthly activity': (
+        "SELECT strftime('%Y-%m', time_stamp_of_attempt), COUNT(*) FROM scores "
+        "WHERE time_stamp_of_attempt >= :since GROUP BY 1", {}),
+    'questions for quiz': (
+        "SELECT * FROM questions WHERE quiz_id = :quiz_id", {}),
+    'active quizzes in chapter': (
+        "SELECT * FROM quizzes WHERE chapter_id = :chapter_id AND is_active = 1", {}),
+}
+
+def seed(users, quizzes, scores, questions_per_quiz=20):
+    now = datetime.utcnow()
+    conn = db.session.connection()
+    conn.execute(text("INSERT INTO subjects (id, name) VALUES (1, 'Benchmark')"))
+    conn.execute(text("INSERT INTO chapters (id, name, subject_id) VALUES (:id, :name, 1)"),
+                 [{'id': i, 'name': f'Chapter {i}'} for i in range(1, 21)])
+    conn.execute(text("INSERT INTO users (id, email, username, password_hash, full_name, is_active, created_at) "
+                      "VALUES (:id, :email, :username, 'x', 'Bench User', 1, :created_at)"),
+                 [{'id': i, 'email': f'u{i}@example.com', 'username': f'u{i}',
+                   'created_at': now - timedelta(days=random.randint(0, 720))} for i in range(1, users + 1)])
+    conn.execute(text("INSERT INTO quizzes (id, chapter_id, date_of_quiz, time_duration, title, is_active, total_marks) "
+                      "VALUES (:id, :chapter_id, :day, '00:30:00', :title, :active, :marks)"),
+                 [{'id': i, 'chapter_id': i % 20 + 1, 'day': now.date(), 'title': f'Quiz {i}',
+                   'active': i % 5 != 0, 'marks': questions_per_quiz} for i in range(1, quizzes + 1)])
+    conn.execute(text("INSERT INTO questions (quiz_id, question_statement, option1, option2, correct_option, marks) "
+                      "VALUES (:quiz_id, 'Q', 'a', 'b', 1, 1)"),
+                 [{'quiz_id': q} for q in range(1, quizzes + 1) for _ in range(questions_per_quiz)])
+    batch = []
+    for _ in range(scores):
+        scored = random.randint(0, questions_per_quiz)
+        batch.append({'quiz_id': random.randint(1, quizzes), 'user_id': random.randint(1, users),
+                      'ts': now - timedelta(minutes=random.randint(0, 60 * 24 * 720)),
+                      'scored': scored, 'total': questions_per_quiz,
+                      'pct': round(scored * 100 / questions_per_quiz, 2)})
+        if len(batch) == 10000:
+            _insert_scores(conn, batch)
+            batch = []
+    if batch:
+        _insert_scores(conn, batch)
+    db.session.commit()
+
+def _insert_scores(conn, batch):
+    conn.execute(text("INSERT INTO scores (quiz_id, user_id, time_stamp_of_attempt, total_scored, total_questions, "
+                      "max_marks, percentage) VALUES (:quiz_id, :user_id, :ts, :scored, :total, :total, :pct)"), batch)
+
+def measure(label, params, repeat):
+    print(f"\n=== {label} ===")
+    results = {}
+    for name, (sql, _) in HOT_QUERIES.items():
+        plan = db.session.execute(text(f"EXPLAIN QUERY PLAN {sql}"), params).fetchall()
+        start = time.perf_counter()
+        for _ in range(repeat):
+            db.session.execute(text(sql), params).fetchall()
+        elapsed_ms = (time.perf_counter() - start) * 1000 / repeat
+        results[name] = elapsed_ms
+        print(f"{name:28} {elapsed_ms:9.3f} ms   " + ' | '.join(row[-1] for row in plan))
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--users', type=int, default=2000)
+    parser.add_argument('--quizzes', type=int, default=500)
+    parser.add_argument('--scores', type=int, default=200000)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    # Bare app without create_app's startup migration and default data
+    app = Flask(__name__)
+    app.config.from_object(config_dict['development'])
+    db.init_app(app)
+    migrate.init_app(app, db, directory=MIGRATIONS_DIR, render_as_batch=True)
+    with app.app_context():
+        upgrade(directory=MIGRATIONS_DIR, revision='0002_score_snapshots')
+        print(f"Seeding {args.scores} scores, {args.users} users, {args.quizzes} quizzes into {DB_PATH}")
+        seed(args.users, args.quizzes, args.scores)
+        db.session.execute(text("ANALYZE"))
+
+        params = {'user_id': args.users // 2, 'quiz_id': args.quizzes // 2, 'chapter_id': 3,
+                  'since': datetime.utcnow() - timedelta(days=180)}
+        before = measure('before (0002_score_snapshots)', params, args.repeat)
+
+        upgrade(directory=MIGRATIONS_DIR)
+        db.session.execute(text("ANALYZE"))
+        after = measure('after (head)', params, args.repeat)
+
+        print("\n=== speedup ===")
+        for name in HOT_QUERIES:
+            print(f"{name:28} {before[name] / after[name]:8.1f}x")
+
+if __name__ == '__main__':
+    main()
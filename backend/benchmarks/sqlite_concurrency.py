@@ -0,0 +1,110 @@
+"""Measure quiz submissions per second on SQLite while parallel readers load
+dashboard-style queries, comparing the default rollback journal with the
+SQLITE_PRAGMAS profile from Config.
+
+Usage (from the backend directory):
+    python -m benchmarks.sqlite_concurrency --writers 4 --readers 8 --seconds 10
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask
+from sqlalchemy import text, func
+from app.config import config_dict
+from app.database import db, migrate, configure_engine, upgrade_database, MIGRATIONS_DIR, DatabaseBusy
+from app.models import Score, Quiz, Chapter, Subject, User
+
+DEFAULT_PRAGMAS = {'foreign_keys': 'ON'}
+
+def build_app(pragmas):
+    path = os.path.join(tempfile.mkdtemp(), 'concurrency.db')
+    app = Flask(__name__)
+    app.config.from_object(config_dict['development'])
+    app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{path}'
+    app.config['SQLITE_PRAGMAS'] = pragmas
+    db.init_app(app)
+    migrate.init_app(app, db, directory=MIGRATIONS_DIR, render_as_batch=True)
+    with app.app_context():
+        configure_engine(app)
+        upgrade_database()
+        db.session.add(Subject(id=1, name='Benchmark'))
+        db.session.add(Chapter(id=1, name='Benchmark', subject_id=1))
+        db.session.add_all([Quiz(id=i, chapter_id=1, title=f'Quiz {i}', time_duration='00:30:00',
+                                 date_of_quiz=datetime.utcnow().date(), total_marks=10) for i in range(1, 21)])
+        db.session.add_all([User(id=i, email=f'u{i}@example.com', username=f'u{i}', password_hash='x',
+                                 full_name='Bench User') for i in range(1, 201)])
+        db.session.commit()
+    return app
+
+def writer(app, stop, stats):
+    with app.app_context():
+        while not stop.is_set():
+            user_id, quiz_id = random.randint(1, 200), random.randint(1, 20)
+            try:
+                # Same shape as ScoreApi.post: attempt-limit count, then insert and commit
+                Score.query.filter_by(user_id=user_id, quiz_id=quiz_id).count()
+                scored = random.randint(0, 10)
+                db.session.add(Score(user_id=user_id, quiz_id=quiz_id, total_scored=scored, total_questions=10,
+                                     max_marks=10, percentage=Score.calculate_percentage(scored, 10)))
+                db.session.commit()
+                stats['writes'] += 1
+            except DatabaseBusy:
+                db.session.rollback()
+                stats['busy'] += 1
+            except Exception:
+                db.session.rollback()
+                stats['errors'] += 1
+
+def reader(app, stop, stats):
+    with app.app_context():
+        while not stop.is_set():
+            try:
+                db.session.query(Score.quiz_id, func.count(), func.avg(Score.percentage)).group_by(Score.quiz_id).all()
+                Score.query.filter_by(user_id=random.randint(1, 200)).order_by(Score.time_stamp_of_attempt.desc()).limit(5).all()
+                db.session.rollback()
+                stats['reads'] += 1
+            except DatabaseBusy:
+                db.session.rollback()
+                stats['busy'] += 1
+            except Exception:
+                db.session.rollback()
+                stats['errors'] += 1
+
+def run(label, pragmas, args):
+    app = build_app(pragmas)
+    stop = threading.Event()
+    stats = {'writes': 0, 'reads': 0, 'busy': 0, 'errors': 0}
+    threads = [threading.Thread(target=writer, args=(app, stop, stats)) for _ in range(args.writers)]
+    threads += [threading.Thread(target=reader, args=(app, stop, stats)) for _ in range(args.readers)]
+    for thread in threads:
+        thread.start()
+    time.sleep(args.seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    with app.app_context():
+        mode = db.session.execute(text('PRAGMA journal_mode')).scalar()
+        db.engine.dispose()
+    print(f"{label:8} journal={mode:8} submissions/s={stats['writes'] / args.seconds:9.1f} "
+          f"reads/s={stats['reads'] / args.seconds:9.1f} busy={stats['busy']} errors={stats['errors']}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--writers', type=int, default=4)
+    parser.add_argument('--readers', type=int, default=8)
+    parser.add_argument('--seconds', type=float, default=10)
+    args = parser.parse_args()
+
+    run('default', DEFAULT_PRAGMAS, args)
+    run('tuned', config_dict['development'].SQLITE_PRAGMAS, args)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,49 @@
+"""quiz total marks and score percentage snapshots
+
+Revision ID: 0002_score_snapshots
+Revises: 0001_baseline
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0002_score_snapshots'
+down_revision = '0001_baseline'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('quizzes', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('total_marks', sa.Integer(), nullable=False, server_default='0'))
+
+    with op.batch_alter_table('scores', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('max_marks', sa.Integer(), nullable=False, server_default='0'))
+        batch_op.add_column(sa.Column('percentage', sa.Float(), nullable=False, server_default='0'))
+
+    # Backfill from the current question marks; historical attempts get the
+    # quiz's present total since the marks at submit time were never recorded.
+    op.execute("""
+        UPDATE quizzes SET total_marks = COALESCE(
+            (SELECT SUM(questions.marks) FROM questions WHERE questions.quiz_id = quizzes.id), 0)
+    """)
+    op.execute("""
+        UPDATE scores SET max_marks = COALESCE(
+            (SELECT quizzes.total_marks FROM quizzes WHERE quizzes.id = scores.quiz_id), 0)
+    """)
+    op.execute("""
+        UPDATE scores SET percentage = ROUND(CAST(total_scored AS NUMERIC) * 100 / max_marks, 2)
+        WHERE max_marks > 0
+    """)
+
+
+def downgrade():
+    with op.batch_alter_table('scores', schema=None) as batch_op:
+        batch_op.drop_column('percentage')
+        batch_op.drop_column('max_marks')
+
+    with op.batch_alter_table('quizzes', schema=None) as batch_op:
+        batch_op.drop_column('total_marks')
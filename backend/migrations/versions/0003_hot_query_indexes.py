@@ -0,0 +1,40 @@
+"""composite indexes for hot query shapes
+
+Revision ID: 0003_hot_query_indexes
+Revises: 0002_score_snapshots
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0003_hot_query_indexes'
+down_revision = '0002_score_snapshots'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_scores_user_quiz', 'scores', ['user_id', 'quiz_id'])
+    op.create_index('ix_scores_user_attempted', 'scores', ['user_id', 'time_stamp_of_attempt'])
+    op.create_index('ix_scores_attempted', 'scores', ['time_stamp_of_attempt'])
+    op.create_index('ix_scores_quiz_id', 'scores', ['quiz_id'])
+    op.create_index('ix_questions_quiz_id', 'questions', ['quiz_id'])
+    op.create_index('ix_quizzes_chapter_active', 'quizzes', ['chapter_id', 'is_active'])
+    op.create_index('ix_quizzes_is_active', 'quizzes', ['is_active'])
+    op.create_index('ix_chapters_subject_id', 'chapters', ['subject_id'])
+    op.create_index('ix_users_created_at', 'users', ['created_at'])
+
+
+def downgrade():
+    op.drop_index('ix_users_created_at', table_name='users')
+    op.drop_index('ix_chapters_subject_id', table_name='chapters')
+    op.drop_index('ix_quizzes_is_active', table_name='quizzes')
+    op.drop_index('ix_quizzes_chapter_active', table_name='quizzes')
+    op.drop_index('ix_questions_quiz_id', table_name='questions')
+    op.drop_index('ix_scores_quiz_id', table_name='scores')
+    op.drop_index('ix_scores_attempted', table_name='scores')
+    op.drop_index('ix_scores_user_attempted', table_name='scores')
+    op.drop_index('ix_scores_user_quiz', table_name='scores')
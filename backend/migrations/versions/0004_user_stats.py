@@ -0,0 +1,55 @@
+"""incrementally maintained per-user statistics
+
+Revision ID: 0004_user_stats
+Revises: 0003_hot_query_indexes
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0004_user_stats'
+down_revision = '0003_hot_query_indexes'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('user_stats',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('attempts', sa.Integer(), nullable=False),
+    sa.Column('graded_attempts', sa.Integer(), nullable=False),
+    sa.Column('total_scored_sum', sa.Integer(), nullable=False),
+    sa.Column('percentage_sum', sa.Float(), nullable=False),
+    sa.Column('best_percentage', sa.Float(), nullable=False),
+    sa.Column('last_attempt_at', sa.DateTime(), nullable=True),
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('user_id')
+    )
+
+    # Seed from existing scores; afterwards ScoreApi keeps the rows current.
+    op.execute("""
+        INSERT INTO user_stats (user_id, attempts, graded_attempts, total_scored_sum, percentage_sum,
+                                best_percentage, last_attempt_at, created_at, updated_at)
+        SELECT user_id,
+               COUNT(id),
+               SUM(CASE WHEN max_marks > 0 THEN 1 ELSE 0 END),
+               SUM(total_scored),
+               SUM(CASE WHEN max_marks > 0 THEN percentage ELSE 0 END),
+               MAX(CASE WHEN max_marks > 0 THEN percentage ELSE 0 END),
+               MAX(time_stamp_of_attempt),
+               CURRENT_TIMESTAMP,
+               CURRENT_TIMESTAMP
+        FROM scores
+        GROUP BY user_id
+    """)
+
+
+def downgrade():
+    op.drop_table('user_stats')
@@ -0,0 +1,73 @@
+"""monthly rollups of attempts and registrations
+
+Revision ID: 0005_monthly_activity
+Revises: 0004_user_stats
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0005_monthly_activity'
+down_revision = '0004_user_stats'
+branch_labels = None
+depends_on = None
+
+
+def _month_start(column):
+    if op.get_bind().dialect.name == 'postgresql':
+        return f"CAST(date_trunc('month', {column}) AS DATE)"
+    return f"date({column}, 'start of month')"
+
+
+def upgrade():
+    op.create_table('monthly_activity',
+    sa.Column('month', sa.Date(), nullable=False),
+    sa.Column('attempts', sa.Integer(), nullable=False),
+    sa.Column('registrations', sa.Integer(), nullable=False),
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('month')
+    )
+    op.create_table('user_monthly_activity',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('month', sa.Date(), nullable=False),
+    sa.Column('attempts', sa.Integer(), nullable=False),
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('user_id', 'month', name='uq_user_monthly_activity')
+    )
+
+    # Seed from existing history; afterwards writes keep the rows current.
+    score_month = _month_start('time_stamp_of_attempt')
+    user_month = _month_start('created_at')
+    op.execute(f"""
+        INSERT INTO user_monthly_activity (user_id, month, attempts, created_at, updated_at)
+        SELECT user_id, {score_month}, COUNT(id), CURRENT_TIMESTAMP, CURRENT_TIMESTAMP
+        FROM scores
+        GROUP BY user_id, {score_month}
+    """)
+    op.execute(f"""
+        INSERT INTO monthly_activity (month, attempts, registrations, created_at, updated_at)
+        SELECT month, SUM(attempts), SUM(registrations), CURRENT_TIMESTAMP, CURRENT_TIMESTAMP
+        FROM (
+            SELECT {score_month} AS month, COUNT(id) AS attempts, 0 AS registrations
+            FROM scores GROUP BY {score_month}
+            UNION ALL
+            SELECT {user_month} AS month, 0 AS attempts, COUNT(id) AS registrations
+            FROM users WHERE created_at IS NOT NULL GROUP BY {user_month}
+        ) AS months
+        GROUP BY month
+    """)
+
+
+def downgrade():
+    op.drop_table('user_monthly_activity')
+    op.drop_table('monthly_activity')
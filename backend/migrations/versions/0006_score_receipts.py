@@ -0,0 +1,28 @@
+"""receipts of attempts saved from the write-behind queue
+
+Revision ID: 0006_score_receipts
+Revises: 0005_monthly_activity
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0006_score_receipts'
+down_revision = '0005_monthly_activity'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('scores', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('receipt', sa.String(length=32), nullable=True))
+    op.create_index('ix_scores_receipt', 'scores', ['receipt'], unique=True)
+
+
+def downgrade():
+    op.drop_index('ix_scores_receipt', table_name='scores')
+    with op.batch_alter_table('scores', schema=None) as batch_op:
+        batch_op.drop_column('receipt')
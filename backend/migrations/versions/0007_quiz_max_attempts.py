@@ -0,0 +1,26 @@
+"""per-quiz attempt limit
+
+Revision ID: 0007_quiz_max_attempts
+Revises: 0006_score_receipts
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0007_quiz_max_attempts'
+down_revision = '0006_score_receipts'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('quizzes', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('max_attempts', sa.Integer(), nullable=False, server_default='5'))
+
+
+def downgrade():
+    with op.batch_alter_table('quizzes', schema=None) as batch_op:
+        batch_op.drop_column('max_attempts')
@@ -0,0 +1,66 @@
+import os
+import sys
+import tempfile
+
+import fakeredis
+import pytest
+
+# The config module reads these when it is imported, so they are set first
+_db_dir = tempfile.mkdtemp()
+os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(_db_dir, 'test.db')
+os.environ.setdefault('CACHE_REDIS_URL', 'redis://localhost:6390/15')
+# Lock contention tests should not wait out the default five seconds
+os.environ['SQLITE_BUSY_TIMEOUT_MS'] = '100'
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app
+from app.cache import cache, CircuitBreaker
+
+@pytest.fixture(scope='session')
+def app():
+    return create_app()
+
+@pytest.fixture(autouse=True)
+def _no_redis(app):
+    """Every test starts without Redis, whatever listens on CACHE_REDIS_URL;
+    tests that need it ask for the redis fixture"""
+    client, breaker = cache.redis_client, cache.breaker
+    cache.redis_client = None
+    _clear_process_caches()
+    yield
+    cache.redis_client, cache.breaker = client, breaker
+    _clear_process_caches()
+
+@pytest.fixture()
+def redis_server():
+    """The in-memory server behind the redis fixture; set connected = False to take it down"""
+    return fakeredis.FakeServer()
+
+@pytest.fixture()
+def redis(_no_redis, redis_server):
+    """An empty in-memory Redis (Lua scripts included) behind the app's cache"""
+    client = fakeredis.FakeRedis(server=redis_server)
+    cache.redis_client = client
+    cache.breaker = CircuitBreaker(client.ping, retry_interval=0.1, on_close=cache._on_reconnect)
+    cache._missed_invalidations.clear()
+    # Subscribe to this server's invalidation broadcasts on first use
+    cache._stop_listener()
+    yield client
+    cache._stop_listener()
+
+def _clear_process_caches():
+    cache.fallback.clear()
+    if cache.local:
+        cache.local.clear()
+
+@pytest.fixture()
+def client(app):
+    return app.test_client()
+
+@pytest.fixture()
+def login(client):
+    def login(username, password):
+        response = client.post('/api/auth/login', json={'username': username, 'password': password})
+        assert response.status_code == 200, response.json
+        return {'Authorization': 'Bearer ' + response.json['access_token']}
+    return login
@@ -0,0 +1,22 @@
+from datetime import datetime
+
+from app import aggregates
+from app.aggregates import recent_months
+
+def test_recent_months_wrap_around_the_year():
+    assert recent_months(3, now=datetime(2026, 2, 15)) == [
+        datetime(2025, 12, 1), datetime(2026, 1, 1), datetime(2026, 2, 1)
+    ]
+
+def test_recent_months_follow_the_utc_month_the_rollups_use(monkeypatch):
+    class Clock(datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return cls(2026, 4, 1, 1, 0)  # local time, already in April
+
+        @classmethod
+        def utcnow(cls):
+            return cls(2026, 3, 31, 23, 0)
+    monkeypatch.setattr(aggregates, 'datetime', Clock)
+
+    assert recent_months(1) == [datetime(2026, 3, 1)]
@@ -0,0 +1,124 @@
+import uuid
+
+import pytest
+
+from app.attempt_sessions import SESSION_PREFIX, duration_seconds, format_duration
+from app.cache import cache
+from app.models import Quiz
+
+@pytest.fixture()
+def quiz(app):
+    with app.app_context():
+        quiz = Quiz.query.filter_by(title='Basic Programming Quiz').first()
+        question = quiz.questions[0]
+        return {'id': quiz.id, 'question': str(question.id), 'correct': question.correct_option,
+                'duration': duration_seconds(quiz.time_duration)}
+
+@pytest.fixture()
+def student(client, login):
+    """Auth headers of a new student, who has not attempted anything yet"""
+    username = 'student_' + uuid.uuid4().hex[:8]
+    response = client.post('/api/auth/register', json={
+        'username': username, 'email': f'{username}@example.com',
+        'password': 'Student@123', 'full_name': 'Session Student'
+    })
+    assert response.status_code == 201, response.json
+    return login(username, 'Student@123')
+
+@pytest.fixture()
+def start(client, redis, student, quiz):
+    def start():
+        response = client.post('/api/attempts', headers=student, json={'quiz_id': quiz['id']})
+        assert response.status_code == 201, response.json
+        return response.json
+    return start
+
+def _age(redis, session_id, seconds):
+    """Move a session's start and deadline back, as if it had been open for that much longer"""
+    key = SESSION_PREFIX + session_id
+    for field in ('started_at', 'deadline'):
+        redis.hset(key, field, repr(float(redis.hget(key, field)) - seconds))
+
+def test_start_resumes_the_open_session(client, student, start, quiz):
+    session = start()
+
+    assert session['quiz_id'] == quiz['id']
+    assert session['time_remaining'] in (quiz['duration'], quiz['duration'] - 1)
+    assert session['answers'] == {}
+    assert start()['session_id'] == session['session_id']
+
+def test_autosave_keeps_answers_in_the_session(client, student, start, quiz, login):
+    session_id = start()['session_id']
+    url = f'/api/attempts/{session_id}'
+
+    response = client.put(url + '/answers', headers=student, json={'answers': {quiz['question']: quiz['correct']}})
+    assert response.status_code == 200, response.json
+    assert response.json['saved'] == 1
+    assert client.get(url, headers=student).json['answers'] == {quiz['question']: quiz['correct']}
+
+    response = client.put(url + '/answers', headers=student, json={'answers': {quiz['question']: None}})
+    assert response.status_code == 200, response.json
+    assert client.get(url, headers=student).json['answers'] == {}
+
+    response = client.put(url + '/answers', headers=student, json={'answers': {quiz['question']: 99}})
+    assert response.status_code == 400, response.json
+    assert client.get(url, headers=login('dummy', 'dummy123')).status_code == 404
+
+def test_submit_is_timed_by_the_server(client, redis, student, start, quiz):
+    session_id = start()['session_id']
+    client.put(f'/api/attempts/{session_id}/answers', headers=student,
+               json={'answers': {quiz['question']: quiz['correct']}})
+    _age(redis, session_id, 90)
+
+    # A time_taken sent by the client is not used
+    response = client.post(f'/api/attempts/{session_id}/submit', headers=student, json={'time_taken': '00:00:01'})
+
+    assert response.status_code == 201, response.json
+    assert response.json['time_taken'] in ('00:01:30', '00:01:31')
+    assert response.json['total_scored'] > 0
+    assert client.get(f'/api/attempts/{session_id}', headers=student).status_code == 404
+    assert start()['session_id'] != session_id
+
+def test_answers_stop_at_the_deadline_and_time_taken_is_capped(client, app, redis, student, start, quiz):
+    session_id = start()['session_id']
+    _age(redis, session_id, quiz['duration'] + app.config['ATTEMPT_SESSION_GRACE'] + 1)
+
+    response = client.put(f'/api/attempts/{session_id}/answers', headers=student,
+                          json={'answers': {quiz['question']: quiz['correct']}})
+    assert response.status_code == 409, response.json
+
+    # Answers sent with a late submit are ignored as well
+    response = client.post(f'/api/attempts/{session_id}/submit', headers=student,
+                           json={'answers': {quiz['question']: quiz['correct']}})
+    assert response.status_code == 201, response.json
+    assert response.json['time_taken'] == format_duration(quiz['duration'])
+    assert response.json['total_scored'] == 0
+
+def test_a_session_is_submitted_once(client, redis, student, start):
+    session_id = start()['session_id']
+    redis.hset(SESSION_PREFIX + session_id, 'submitting', 1)
+
+    response = client.post(f'/api/attempts/{session_id}/submit', headers=student)
+
+    assert response.status_code == 409, response.json
+
+def test_scores_endpoint_only_takes_attempts_while_sessions_are_unavailable(client, redis, student, quiz):
+    answers = {'quiz_id': quiz['id'], 'answers': {quiz['question']: quiz['correct']}}
+
+    assert client.post('/api/scores', headers=student, json=answers).status_code == 409
+
+    cache.redis_client = None
+    response = client.post('/api/scores', headers=student, json=answers)
+    assert response.status_code == 201, response.json
+    assert response.json['time_taken'] is None
+
+def test_redis_errors_during_a_session_are_unavailable_and_reach_the_breaker(client, student, start, quiz,
+                                                                             redis_server):
+    session_id = start()['session_id']
+
+    redis_server.connected = False
+    response = client.put(f'/api/attempts/{session_id}/answers', headers=student,
+                          json={'answers': {quiz['question']: quiz['correct']}})
+
+    assert response.status_code == 503, response.json
+    assert cache.breaker.failures == 1
@@ -0,0 +1,33 @@
+from app.attempts import reserve_attempt, release_attempt, attempt_counts, add_attempts, counter_key
+from app.models import Quiz, User, Score
+
+def _dummy_and_quiz():
+    user_id = User.query.filter_by(username='dummy').first().id
+    quiz_id = Quiz.query.filter_by(title='Basic Programming Quiz').first().id
+    return user_id, quiz_id
+
+def test_counters_are_seeded_from_scores_and_stop_at_the_limit(app, redis):
+    with app.app_context():
+        user_id, quiz_id = _dummy_and_quiz()
+        saved = Score.query.filter_by(user_id=user_id, quiz_id=quiz_id).count()
+        limit = saved + 2
+
+        assert reserve_attempt(user_id, quiz_id, limit) is True
+        assert attempt_counts([(user_id, quiz_id)]) == {(user_id, quiz_id): saved + 1}
+        assert reserve_attempt(user_id, quiz_id, limit) is True
+        assert reserve_attempt(user_id, quiz_id, limit) is False
+
+        release_attempt(user_id, quiz_id)
+        assert attempt_counts([(user_id, quiz_id)]) == {(user_id, quiz_id): saved + 1}
+
+def test_bulk_additions_only_touch_existing_counters(app, redis):
+    with app.app_context():
+        redis.set(counter_key(1, 1), 2)
+        add_attempts({(1, 1): 3, (1, 2): 3})
+
+        assert attempt_counts([(1, 1), (1, 2)]) == {(1, 1): 5}
+
+def test_without_redis_the_caller_counts_scores_itself(app):
+    with app.app_context():
+        assert reserve_attempt(1, 1, 5) is None
+        assert attempt_counts([(1, 1)]) == {}
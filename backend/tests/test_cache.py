@@ -0,0 +1,124 @@
+import json
+import pickle
+import threading
+import time
+
+import pytest
+import redis as redis_lib
+from flask import Flask
+
+from app import cache as cache_module
+from app.cache import cache, CircuitBreaker, RedisCache, JsonCodec, GENERATION_PREFIX
+from app.models import db, Subject
+
+def _unreachable():
+    raise redis_lib.ConnectionError('down')
+
+def test_initialising_the_cache_again_stops_the_old_reconnect_thread(app):
+    other = Flask(__name__)
+    other.config.update(app.config, CACHE_REDIS_URL='redis://localhost:1/0', CACHE_RETRY_INTERVAL=0.01)
+    cache = RedisCache()
+    cache.init_app(other)
+    first = cache.breaker
+    assert not first.closed and first._thread.is_alive()
+
+    cache.init_app(other)
+
+    first._thread.join(timeout=1)
+    assert not first._thread.is_alive()
+    assert cache.breaker is not first
+
+def test_a_stopped_breaker_does_not_reconnect():
+    breaker = CircuitBreaker(_unreachable, retry_interval=0.01)
+    breaker.trip(redis_lib.ConnectionError('down'))
+    breaker.stop()
+    breaker._thread.join(timeout=1)
+    assert not breaker._thread.is_alive()
+    assert not breaker.closed
+
+def _counted(value='built'):
+    """A cache fill function that counts its calls"""
+    def fn():
+        fn.calls += 1
+        time.sleep(fn.delay)
+        return value
+    fn.calls = 0
+    fn.delay = 0
+    return fn
+
+def test_invalidating_a_tag_rebuilds_only_its_entries(app, redis):
+    subjects, users = _counted(), _counted()
+    with app.app_context():
+        for _ in range(2):
+            cache.get_or_compute('subjects', subjects, tags=['Subject'])
+            cache.get_or_compute('users', users, tags=['User'])
+        cache.invalidate('Subject')
+        cache.get_or_compute('subjects', subjects, tags=['Subject'])
+        cache.get_or_compute('users', users, tags=['User'])
+
+    assert subjects.calls == 2
+    assert users.calls == 1
+
+def test_committing_a_model_invalidates_its_tags(app, redis):
+    with app.app_context():
+        before = cache.version(['Subject'])
+        db.session.add(Subject(name='Generations', description='x'))
+        db.session.commit()
+        assert cache.version(['Subject']) != before
+
+def test_concurrent_misses_build_an_entry_once(app, redis):
+    fn = _counted()
+    fn.delay = 0.2
+    results = []
+
+    def read():
+        with app.app_context():
+            results.append(cache.get_or_compute('slow', fn, tags=['Quiz']))
+    threads = [threading.Thread(target=read) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results == ['built'] * 5
+    assert fn.calls == 1
+
+def test_xfetch_refreshes_slow_entries_before_they_expire(app, redis, monkeypatch):
+    monkeypatch.setattr(cache_module.random, 'random', lambda: 0.9)  # early = 2.3 * delta * beta
+    now = time.time()
+
+    assert cache._refresh_due({'expires': now + 10, 'delta': 5})
+    assert not cache._refresh_due({'expires': now + 10, 'delta': 1})
+    assert cache._refresh_due({'expires': now + 3600, 'built': now - 60, 'delta': 0}, max_age=30)
+
+def test_local_generations_are_evicted_by_invalidation_broadcasts(app, redis):
+    with app.app_context():
+        [before] = cache.generations(['Chapter'])
+        # Another worker bumps the tag; this one still has the old generation in memory
+        redis.incr(GENERATION_PREFIX + 'Chapter')
+        assert cache.generations(['Chapter']) == [before]
+
+        redis.publish(cache.channel, json.dumps(['Chapter']))
+        # Well within the local tier's TTL, so only the broadcast can have evicted it
+        deadline = time.monotonic() + cache.local.ttl / 2
+        while cache.generations(['Chapter']) == [before] and time.monotonic() < deadline:
+            time.sleep(0.05)
+        assert cache.generations(['Chapter']) == [before + 1]
+
+def test_json_codec_compresses_large_values_only():
+    codec = JsonCodec(compress_threshold=100)
+    small = {'id': 1, 'name': 'Python'}
+    large = {'items': [{'id': i, 'name': 'Python'} for i in range(50)]}
+
+    assert codec.dumps(small)[:1] == JsonCodec.RAW
+    assert codec.dumps(large)[:1] == JsonCodec.ZLIB
+    assert codec.loads(codec.dumps(small)) == small
+    assert codec.loads(codec.dumps(large)) == large
+
+def test_values_in_an_unknown_format_are_misses(app, redis):
+    with pytest.raises(ValueError):
+        JsonCodec().loads(pickle.dumps({'id': 1}))
+
+    redis.set('pickled', pickle.dumps({'id': 1}))
+    with app.app_context():
+        assert cache.get('pickled') is None
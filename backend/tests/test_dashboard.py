@@ -0,0 +1,22 @@
+from app.attempts import counter_key
+from app.models import Quiz, User
+
+def test_user_dashboard_is_time_bounded_for_inputs_no_tag_covers(app, client, login, redis):
+    student = login('dummy', 'dummy123')
+    with app.app_context():
+        user_id = User.query.filter_by(username='dummy').first().id
+        quiz = Quiz.query.filter_by(title='Basic Programming Quiz').first()
+        quiz_id, max_attempts = quiz.id, quiz.max_attempts
+
+    response = client.get('/api/dashboard', headers=student)
+    assert response.status_code == 200, response.json
+    assert response.json['freshness']['max_age'] == 30
+    etag = response.headers['ETag']
+    assert client.get('/api/dashboard', headers={**student, 'If-None-Match': etag}).status_code == 304
+
+    # An attempt reserved in Redis bumps no tag; a rebuild shows it under a new validator
+    redis.set(counter_key(user_id, quiz_id), max_attempts)
+    response = client.get('/api/dashboard?max_age=0', headers={**student, 'If-None-Match': etag})
+    assert response.status_code == 200
+    [quiz_json] = [q for q in response.json['quizzes'] if q['id'] == quiz_id]
+    assert quiz_json['attempts_left'] == 0
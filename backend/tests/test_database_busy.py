@@ -0,0 +1,22 @@
+import sqlite3
+
+import pytest
+
+from app.database import db
+
+@pytest.fixture()
+def write_lock(app):
+    """Hold SQLite's write lock from another connection"""
+    with app.app_context():
+        path = db.engine.url.database
+    connection = sqlite3.connect(path, isolation_level=None)
+    connection.execute('BEGIN EXCLUSIVE')
+    yield
+    connection.execute('ROLLBACK')
+    connection.close()
+
+def test_catalog_write_answers_503_while_locked(client, login, write_lock):
+    admin = login('admin', 'Admin@123')
+    response = client.post('/api/subjects', headers=admin, json={'name': 'Locked out', 'description': 'x'})
+    assert response.status_code == 503
+    assert response.headers.get('Retry-After') == '1'
@@ -0,0 +1,34 @@
+from app.api import export
+from app.database import DatabaseBusy
+
+def _failing_rows(error):
+    def rows(*args):
+        raise error
+        yield
+    return rows
+
+def test_export_answers_an_error_when_its_query_fails(client, login, monkeypatch):
+    student = login('dummy', 'dummy123')
+    monkeypatch.setattr(export, 'user_score_rows', _failing_rows(RuntimeError('no such table')))
+
+    response = client.post('/api/export/user-csv', headers=student)
+
+    assert response.status_code == 500
+    assert response.json == {'message': 'Export failed. Please try again.'}
+
+def test_export_of_a_busy_database_is_retryable(client, login, monkeypatch):
+    student = login('dummy', 'dummy123')
+    monkeypatch.setattr(export, 'user_score_rows', _failing_rows(DatabaseBusy(retry_after=1)))
+
+    response = client.post('/api/export/user-csv', headers=student)
+
+    assert response.status_code == 503
+    assert response.headers['Retry-After'] == '1'
+
+def test_export_streams_csv(client, login):
+    response = client.post('/api/export/admin-csv', headers=login('admin', 'Admin@123'))
+
+    assert response.status_code == 200
+    lines = response.get_data(as_text=True).splitlines()
+    assert lines[0].startswith('User ID,Username')
+    assert any(',dummy,' in line for line in lines[1:])
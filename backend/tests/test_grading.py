@@ -0,0 +1,41 @@
+import pytest
+
+from app import grading
+from app.grading import AnswerKey, InvalidAnswer
+
+# (question id, correct option, marks)
+KEY = AnswerKey(1, [(10, 1, 1), (11, 2, 2), (12, 3, None), (13, 4, 5)])
+
+def test_answer_key_is_indexed_by_question_id():
+    assert len(KEY) == 4
+    assert KEY.max_marks == 8
+    assert KEY.index == {'10': 0, '11': 1, '12': 2, '13': 3}
+
+def test_grade_skips_unknown_questions_and_blank_answers():
+    assert KEY.grade({'10': 1, '11': 2, '13': 3}) == 3
+    assert KEY.grade({'10': 1, '99': 1, '11': None}) == 1
+    assert KEY.grade({}) == 0
+
+def test_the_earliest_invalid_answer_is_reported():
+    with pytest.raises(InvalidAnswer) as raised:
+        KEY.grade({'13': 7, '11': [2], '10': 1})
+    assert raised.value.question_id == 11
+
+SUBMISSIONS = [
+    {'10': 1, '11': 2, '12': 3, '13': 4},
+    {'10': 2, '13': 4},
+    {'11': 5},
+    {},
+]
+
+@pytest.mark.parametrize('numpy', [True, False])
+def test_grade_many_matches_grade(monkeypatch, numpy):
+    if not numpy:
+        monkeypatch.setattr(grading, 'np', None)
+    elif grading.np is None:
+        pytest.skip('NumPy is not installed')
+
+    results = KEY.grade_many(SUBMISSIONS)
+
+    assert results[0] == 8 and results[1] == 5 and results[3] == 0
+    assert isinstance(results[2], InvalidAnswer) and results[2].question_id == 11
@@ -0,0 +1,47 @@
+from datetime import datetime
+
+import pytest
+
+from app.models import Score, User
+from app.pagination import Keyset, InvalidPageRequest, by_id, by_newest
+
+def test_cursor_round_trips_the_sort_key(app):
+    keyset = by_newest(Score, Score.time_stamp_of_attempt)
+    item = {'time_stamp_of_attempt': '2026-03-01T10:00:00', 'id': 7}
+
+    assert keyset.decode(keyset.encode(item)) == [datetime(2026, 3, 1, 10), 7]
+
+@pytest.mark.parametrize('cursor', ['not base64!', 'WzFd', 'WyJ4Il0'])
+def test_malformed_cursors_are_rejected(app, cursor):
+    with pytest.raises(InvalidPageRequest):
+        by_newest(Score, Score.time_stamp_of_attempt).decode(cursor)
+
+def test_pages_neither_overlap_nor_skip_rows(app, client, login):
+    admin = login('admin', 'Admin@123')
+    for i in range(5):
+        response = client.post('/api/auth/register', json={
+            'username': f'paged_{i}', 'email': f'paged_{i}@example.com',
+            'password': 'Student@123', 'full_name': f'Paged {i}'
+        })
+        assert response.status_code == 201, response.json
+    with app.app_context():
+        expected = [user.id for user in User.query.order_by(User.id)]
+
+    seen, cursor = [], None
+    while True:
+        response = client.get('/api/users', headers=admin,
+                              query_string={'limit': 2, **({'cursor': cursor} if cursor else {})})
+        assert response.status_code == 200, response.json
+        assert len(response.json['items']) <= 2
+        seen += [item['id'] for item in response.json['items']]
+        cursor = response.json['next_cursor']
+        if cursor is None:
+            break
+
+    assert seen == expected
+
+def test_limit_must_be_a_positive_integer(client, login):
+    admin = login('admin', 'Admin@123')
+    assert client.get('/api/users?limit=0', headers=admin).status_code == 400
+    assert client.get('/api/users?limit=ten', headers=admin).status_code == 400
+    assert client.get('/api/users?cursor=bad', headers=admin).status_code == 400
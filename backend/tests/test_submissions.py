@@ -0,0 +1,100 @@
+from datetime import datetime
+
+import pytest
+
+from app import submissions
+from app.models import Quiz, Score, User
+from app.submissions import (enqueue, drain, receipt_status, pending_attempts, QUEUE_KEY, PROCESSING_PREFIX,
+                             DRAIN_LOCK_KEY, DEAD_LETTER_KEY)
+
+@pytest.fixture()
+def queue(app, redis):
+    """enqueue(n) queues n graded attempts of the default student and returns their receipts"""
+    with app.app_context():
+        user_id = User.query.filter_by(username='dummy').first().id
+        quiz_id = Quiz.query.filter_by(title='Basic Programming Quiz').first().id
+
+        def queue(count, **overrides):
+            return [enqueue({
+                'quiz_id': quiz_id,
+                'user_id': user_id,
+                'time_stamp_of_attempt': datetime.utcnow(),
+                'total_scored': 1,
+                'total_questions': 1,
+                'time_taken': '00:01:00',
+                'max_marks': 1,
+                'percentage': 100.0,
+                **overrides
+            }) for _ in range(count)]
+        queue.user_id, queue.quiz_id = user_id, quiz_id
+        yield queue
+
+def test_drain_saves_every_queued_attempt_once(app, redis, queue):
+    receipts = queue(5)
+    assert pending_attempts(queue.user_id, queue.quiz_id) == 5
+
+    report = drain(batch_size=2)
+
+    assert report == {'saved': 5, 'failed': 0, 'batches': 3}
+    assert Score.query.filter(Score.receipt.in_(receipts)).count() == 5
+    assert all(receipt_status(receipt)['status'] == 'saved' for receipt in receipts)
+    assert pending_attempts(queue.user_id, queue.quiz_id) == 0
+    assert redis.llen(QUEUE_KEY) == 0
+    assert not list(redis.scan_iter(match=PROCESSING_PREFIX + '*'))
+
+def test_drain_stops_without_losing_entries_when_its_lock_is_taken_over(app, redis, queue, monkeypatch):
+    receipts = queue(3)
+    save_batch = submissions._save_batch
+
+    def save_then_lose_lock(*args):
+        result = save_batch(*args)
+        redis.set(DRAIN_LOCK_KEY, 'another drainer')
+        return result
+    monkeypatch.setattr(submissions, '_save_batch', save_then_lose_lock)
+
+    report = drain(batch_size=1)
+
+    assert report['batches'] == 1 and report['stopped'] == 'drain lock lost'
+    assert redis.llen(QUEUE_KEY) == 2
+    assert redis.get(DRAIN_LOCK_KEY) == b'another drainer'
+
+    redis.delete(DRAIN_LOCK_KEY)
+    monkeypatch.setattr(submissions, '_save_batch', save_batch)
+    assert drain()['saved'] == 2
+    assert Score.query.filter(Score.receipt.in_(receipts)).count() == 3
+
+def test_batch_of_a_failed_drain_goes_back_to_the_queue(app, redis, queue, monkeypatch):
+    receipts = queue(2)
+
+    def fail(*args):
+        raise RuntimeError('database went away')
+    monkeypatch.setattr(submissions, '_save_batch', fail)
+    with pytest.raises(RuntimeError):
+        drain()
+
+    assert redis.llen(QUEUE_KEY) == 2
+    assert Score.query.filter(Score.receipt.in_(receipts)).count() == 0
+
+def test_batch_abandoned_by_a_dead_drainer_is_saved_by_the_next(app, redis, queue):
+    receipts = queue(2)
+    redis.lmove(QUEUE_KEY, PROCESSING_PREFIX + 'dead', 'LEFT', 'RIGHT')
+
+    assert drain()['saved'] == 2
+    assert Score.query.filter(Score.receipt.in_(receipts)).count() == 2
+    assert not redis.exists(PROCESSING_PREFIX + 'dead')
+
+def test_entries_that_cannot_be_saved_are_dead_lettered_and_the_queue_moves_on(app, redis, queue):
+    good = queue(2)
+    [bad] = queue(1, total_questions=None)
+    redis.rpush(QUEUE_KEY, b'not json')
+    later = queue(1)
+
+    report = drain()
+
+    assert report['saved'] == 3 and report['failed'] == 2
+    assert Score.query.filter(Score.receipt.in_(good + later)).count() == 3
+    assert receipt_status(bad)['status'] == 'failed'
+    assert redis.llen(QUEUE_KEY) == 0
+    assert redis.lrange(DEAD_LETTER_KEY, 0, -1)[0] == b'not json'
+    assert redis.llen(DEAD_LETTER_KEY) == 2
+    assert pending_attempts(queue.user_id, queue.quiz_id) == 0
@@ -0,0 +1,14 @@
+import app as app_package
+from app import tasks
+
+def test_tasks_share_one_app_per_worker_process(monkeypatch):
+    built = []
+    monkeypatch.setattr(app_package, 'create_app', lambda: built.append(object()) or built[-1])
+    monkeypatch.setattr(tasks, '_worker_app', None)
+
+    assert tasks.worker_app() is tasks.worker_app()
+    assert len(built) == 1
+
+    monkeypatch.setattr(tasks, '_worker_pid', -1)  # as seen from a forked child
+    tasks.worker_app()
+    assert len(built) == 2
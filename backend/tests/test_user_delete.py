@@ -0,0 +1,39 @@
+from app.cache import cache
+from app.models.stats import UserMonthlyActivity, UserStats
+
+def test_delete_user_after_their_quiz_was_deleted(app, client, login):
+    admin = login('admin', 'Admin@123')
+    response = client.post('/api/auth/register', json={
+        'username': 'rollup_student', 'email': 'rollup_student@example.com',
+        'password': 'Student@123', 'full_name': 'Rollup Student'
+    })
+    assert response.status_code == 201, response.json
+    student = login('rollup_student', 'Student@123')
+    user_id = response.json['user']['id']
+
+    response = client.post('/api/quizzes', headers=admin, json={
+        'chapter_id': 1, 'title': 'Rollup quiz', 'date_of_quiz': '2026-01-01', 'time_duration': '00:10:00',
+        'remarks': 'Deleted after one attempt'
+    })
+    assert response.status_code == 201, response.json
+    quiz_id = response.json['id']
+    response = client.post('/api/questions', headers=admin, json={
+        'quiz_id': quiz_id, 'question_statement': 'Pick b', 'option1': 'a', 'option2': 'b',
+        'correct_option': 2, 'marks': 1
+    })
+    assert response.status_code == 201, response.json
+
+    # Without Redis (see conftest) attempts go straight to /api/scores and are saved at once
+    assert cache.redis_client is None
+    response = client.post('/api/scores', headers=student, json={
+        'quiz_id': quiz_id, 'answers': {str(response.json['id']): 2}, 'time_taken': '00:01:00'
+    })
+    assert response.status_code == 201, response.json
+
+    assert client.delete(f'/api/quizzes/{quiz_id}', headers=admin).status_code == 200
+    with app.app_context():
+        assert UserMonthlyActivity.query.filter_by(user_id=user_id).count() == 0
+        assert UserStats.query.filter_by(user_id=user_id).count() == 0
+
+    response = client.delete(f'/api/users/{user_id}', headers=admin)
+    assert response.status_code == 200, response.json
@@ -0,0 +1,25 @@
+from app.api import subject, quiz
+from app.warming import warm_caches
+
+def _count_calls(monkeypatch, module, name):
+    calls = []
+    original = getattr(module, name)
+
+    def counted(*args, **kwargs):
+        calls.append(1)
+        return original(*args, **kwargs)
+    monkeypatch.setattr(module, name, counted)
+    return calls
+
+def test_warming_leaves_fresh_entries_alone(app, redis, monkeypatch):
+    subjects = _count_calls(monkeypatch, subject, 'serialize_subjects')
+    quizzes = _count_calls(monkeypatch, quiz, 'serialize_quizzes')
+
+    # The quiz TTL is no longer than the default interval used as the lead
+    with app.app_context():
+        for _ in range(2):
+            report = warm_caches(app, ['catalog'], lead=app.config['CACHE_WARM_INTERVAL'])
+            assert report['catalog']['warmed'] == 3 and report['catalog']['errors'] == 0
+
+    assert len(subjects) == 1
+    assert len(quizzes) == 1
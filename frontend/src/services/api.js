@@ -113,9 +113,9 @@ class ApiService {
   }
 
   // Dashboard
-  async getDashboard() {
+  async getDashboard(params = {}) {
     try {
-      const response = await this.client.get('/dashboard')
+      const response = await this.client.get('/dashboard', { params })
       return response.data
     } catch (error) {
       console.error('Dashboard error:', error)
@@ -175,6 +175,19 @@ class ApiService {
     return response.data
   }
 
+  // List endpoints return {items, limit, next_cursor}; this follows
+  // next_cursor through every page, for pickers that need the whole list
+  async getAllPages(fetchPage, params = {}) {
+    const items = []
+    let cursor = null
+    do {
+      const page = await fetchPage.call(this, { ...params, limit: 200, ...(cursor && { cursor }) })
+      items.push(...page.items)
+      cursor = page.next_cursor
+    } while (cursor)
+    return items
+  }
+
   // Quizzes
   async getQuizzes(params = {}) {
     const response = await this.client.get('/quizzes', { params })
@@ -244,6 +257,22 @@ class ApiService {
     return response.data
   }
 
+  // Attempt sessions
+  async startAttempt(quizId) {
+    const response = await this.client.post('/attempts', { quiz_id: quizId })
+    return response.data
+  }
+
+  async saveAttemptAnswers(sessionId, answers) {
+    const response = await this.client.put(`/attempts/${sessionId}/answers`, { answers })
+    return response.data
+  }
+
+  async submitAttempt(sessionId, answers) {
+    const response = await this.client.post(`/attempts/${sessionId}/submit`, { answers })
+    return response.data
+  }
+
   // Users (Admin only)
   async getUsers(params = {}) {
     const response = await this.client.get('/users', { params })